@@ -0,0 +1,106 @@
+"""How move generation, search and rendering scale with the number of pits.
+
+    python benchmarks/bench_board_sizes.py --pits 3 5 7 9 12 --depth 4
+
+For each BoardConfig(pits) with the default stone counts: the cost of
+listing and playing moves over random games, the engine's nodes per
+second and node count at a fixed depth from a few early positions, and
+the time BoardRenderer takes to draw one window-wide board.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from oanquan import AIEngine, BoardConfig, Direction, GameState
+from oanquan.gui import WINDOW_WIDTH
+from oanquan.spectator import BoardRenderer
+
+DIRECTIONS = (Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE)
+
+
+def random_states(config: BoardConfig, count: int, seed: int = 1):
+    rng = random.Random(seed)
+    states = []
+    state = GameState(config)
+    while len(states) < count:
+        if state.game_over:
+            state = GameState(config)
+        states.append(state.copy())
+        state.make_move_instant(rng.choice(state.get_valid_moves()), rng.choice(DIRECTIONS))
+    return states
+
+
+def move_generation(states) -> tuple:
+    # Touched copies, so get_valid_moves is computed rather than memoized
+    copies = [state.copy() for state in states]
+    for state in copies:
+        state.touch()
+    start = time.perf_counter()
+    moves = [state.get_valid_moves() for state in copies]
+    listing = time.perf_counter() - start
+
+    played = 0
+    start = time.perf_counter()
+    for state, valid_moves in zip(states, moves):
+        for move in valid_moves:
+            for direction in DIRECTIONS:
+                state.copy().make_move_instant(move, direction)
+                played += 1
+    playing = time.perf_counter() - start
+    return listing / len(states), playing / played, played / len(states)
+
+
+def search(config: BoardConfig, depth: int, positions: int) -> tuple:
+    nodes = 0
+    elapsed = 0.0
+    for state in random_states(config, positions * 3, seed=2)[::3]:
+        engine = AIEngine(max_depth=depth, weights_path=None, verbose=False)
+        start = time.perf_counter()
+        engine.get_best_move(state)
+        elapsed += time.perf_counter() - start
+        nodes += engine.nodes_evaluated
+    return nodes / positions, nodes / elapsed
+
+
+def rendering(config: BoardConfig, states, frames: int) -> float:
+    renderer = BoardRenderer(WINDOW_WIDTH, config)
+    surface = pygame.Surface((renderer.width, renderer.height))
+    for state in states[:frames]:
+        renderer.render(surface, (0, 0), state)
+    start = time.perf_counter()
+    for i in range(frames):
+        renderer.render(surface, (0, 0), states[i % len(states)])
+    return (time.perf_counter() - start) / frames
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pits", type=int, nargs="+", default=[3, 5, 7, 9, 12])
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--positions", type=int, default=4, help="positions searched per board size")
+    parser.add_argument("--states", type=int, default=5000, help="positions for move generation")
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+    pygame.init()
+
+    print(f"{'pits':>4} {'moves':>6} {'list us':>8} {'play us':>8} "
+          f"{'nodes@d' + str(args.depth):>10} {'nodes/s':>9} {'render us':>10}")
+    for pits in args.pits:
+        config = BoardConfig(pits)
+        states = random_states(config, args.states)
+        listing, playing, branching = move_generation(states)
+        nodes, nps = search(config, args.depth, args.positions)
+        render = rendering(config, states, args.frames)
+        print(f"{pits:4d} {branching:6.1f} {listing * 1e6:8.2f} {playing * 1e6:8.2f} "
+              f"{nodes:10.0f} {nps:9.0f} {render * 1e6:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
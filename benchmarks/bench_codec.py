@@ -0,0 +1,84 @@
+"""Position encoding: size and speed of the 16-byte records.
+
+    python benchmarks/bench_codec.py --positions 100000
+
+Compares pickling GameState objects with pickling their records (the
+server's IPC payload), tuple and bytes keys in a dict the size of a
+transposition table, and the per-state and batch codec functions.
+"""
+import argparse
+import os
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from oanquan import Direction, GameState
+from oanquan.codec import decode_batch, encode_batch, pack_batch, unpack_batch
+from oanquan.rules import position_key
+
+
+def sample_states(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    states = []
+    state = GameState()
+    while len(states) < count:
+        if state.game_over:
+            state = GameState()
+        states.append(state.copy())
+        state.make_move_instant(rng.choice(state.get_valid_moves()),
+                                rng.choice((Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE)))
+    return states
+
+
+def timed(label: str, count: int, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:34s} {elapsed * 1e9 / count:8.0f} ns/position")
+    return result
+
+
+def dict_bytes(states, make_key) -> int:
+    # Keys are built while tracing, so their own memory is counted
+    tracemalloc.start()
+    table = {make_key(state): None for state in states}
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del table
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=100000)
+    args = parser.parse_args()
+    n = args.positions
+    states = sample_states(n)
+
+    print("IPC payload")
+    payload = timed("pickle.dumps(GameState)", n, lambda: [pickle.dumps(s) for s in states])
+    print(f"  {'':34s} {sum(map(len, payload)) / n:8.1f} bytes/position")
+    keys = timed("position_key", n, lambda: [position_key(s) for s in states])
+    payload = timed("pickle.dumps(key)", n, lambda: [pickle.dumps(k) for k in keys])
+    print(f"  {'':34s} {sum(map(len, payload)) / n:8.1f} bytes/position")
+
+    print("Table keys (unique positions only)")
+    unique = list({key: state for key, state in zip(keys, states)}.values())
+    as_tuple = lambda s: (*s.board, s.player1_score, s.player2_score, s.current_player.value)
+    print(f"  {'tuple keys':34s} {dict_bytes(unique, as_tuple) / len(unique):8.1f} bytes/entry")
+    print(f"  {'16-byte keys':34s} {dict_bytes(unique, position_key) / len(unique):8.1f} bytes/entry")
+
+    print("Batch codec")
+    batch = timed("encode_batch", n, lambda: encode_batch(states))
+    timed("decode_batch", n, lambda: decode_batch(batch))
+    ints = timed("pack_batch", n, lambda: pack_batch(batch))
+    timed("unpack_batch", n, lambda: unpack_batch(ints))
+    print(f"  {'':34s} {batch.nbytes / n:8.1f} bytes/position as an array")
+
+
+if __name__ == "__main__":
+    main()
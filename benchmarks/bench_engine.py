@@ -0,0 +1,121 @@
+"""Search benchmark: depth reached and nodes per iteration at a fixed time.
+
+    python benchmarks/bench_engine.py --time 1.0 --positions 8
+
+Compares the PVS engine with the plain alpha-beta minimax it replaced,
+both run with iterative deepening under the same time budget.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from oanquan import AIEngine, Direction, GameState, Player, SearchTimeout
+
+
+class LegacyAlphaBeta(AIEngine):
+    """The original full-window minimax, with a deadline added for comparison."""
+
+    def get_best_move(self, state):
+        self.nodes_evaluated = 0
+        self.depth_reached = 0
+        self.iterations = []
+        start = time.perf_counter()
+        self._deadline = None
+        best = (None, Direction.CLOCKWISE)
+        maximizing = state.current_player == Player.PLAYER2
+        for depth in range(1, self.max_depth + 1):
+            nodes_before = self.nodes_evaluated
+            iteration_start = time.perf_counter()
+            try:
+                score, move, direction = self.minimax(state, depth, float('-inf'), float('inf'), maximizing)
+            except SearchTimeout:
+                break
+            best = (move, direction)
+            self.depth_reached = depth
+            self.iterations.append({"depth": depth, "nodes": self.nodes_evaluated - nodes_before,
+                                    "seconds": time.perf_counter() - iteration_start,
+                                    "total_seconds": time.perf_counter() - start, "score": score})
+            self._deadline = start + self.time_limit
+        self._deadline = None
+        return best
+
+    def minimax(self, state, depth, alpha, beta, maximizing):
+        self.nodes_evaluated += 1
+        if (self._deadline is not None and not self.nodes_evaluated & 1023 and
+                time.perf_counter() > self._deadline):
+            raise SearchTimeout()
+        if depth == 0 or state.game_over or not state.get_valid_moves():
+            return self.evaluate_state(state), None, Direction.CLOCKWISE
+
+        best_score = float('-inf') if maximizing else float('inf')
+        best_move, best_direction = None, Direction.CLOCKWISE
+        for move in state.get_valid_moves():
+            for direction in (Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE):
+                new_state = state.copy()
+                new_state.make_move_instant(move, direction)
+                score, _, _ = self.minimax(new_state, depth - 1, alpha, beta,
+                                           new_state.current_player == Player.PLAYER2)
+                if (score > best_score) if maximizing else (score < best_score):
+                    best_score, best_move, best_direction = score, move, direction
+                if maximizing:
+                    alpha = max(alpha, score)
+                else:
+                    beta = min(beta, score)
+                if beta <= alpha:
+                    return best_score, best_move, best_direction
+        return best_score, best_move, best_direction
+
+
+def sample_positions(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    positions = [GameState()]
+    while len(positions) < count:
+        state = GameState()
+        for _ in range(rng.randrange(4, 24)):
+            if state.game_over:
+                break
+            state.make_move_instant(rng.choice(state.get_valid_moves()),
+                                    rng.choice((Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE)))
+        if not state.game_over:
+            positions.append(state)
+    return positions
+
+
+def run(engine_class, positions, time_limit: float, max_depth: int):
+    depths = []
+    total_nodes = 0
+    total_seconds = 0.0
+    for index, state in enumerate(positions):
+        engine = engine_class(max_depth=max_depth, time_limit=time_limit, weights_path=None, verbose=False)
+        start = time.perf_counter()
+        engine.get_best_move(state)
+        elapsed = time.perf_counter() - start
+        depths.append(engine.depth_reached)
+        total_nodes += engine.nodes_evaluated
+        total_seconds += elapsed
+        per_iteration = " ".join(f"d{it['depth']}:{it['nodes']}" for it in engine.iterations)
+        print(f"  position {index}: depth {engine.depth_reached}, {engine.nodes_evaluated} nodes, "
+              f"{elapsed:.2f}s  [{per_iteration}]")
+    print(f"  mean depth {sum(depths) / len(depths):.2f}, "
+          f"{total_nodes / total_seconds:.0f} nodes/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--time", type=float, default=1.0, help="seconds per position")
+    parser.add_argument("--positions", type=int, default=8)
+    parser.add_argument("--max-depth", type=int, default=30)
+    args = parser.parse_args()
+
+    positions = sample_positions(args.positions)
+    for name, engine_class in (("legacy alpha-beta", LegacyAlphaBeta), ("pvs", AIEngine)):
+        print(f"{name} ({args.time}s per position)")
+        run(engine_class, positions, args.time, args.max_depth)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""CPU used by an idle game window, with and without idle mode.
+
+    python benchmarks/bench_idle_cpu.py --seconds 5
+
+Runs OAnQuanGame on the board screen with nothing animating, using SDL's
+dummy video driver unless SDL_VIDEODRIVER is already set. Reports process
+CPU time as a percentage of one core.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+from oanquan.gui import FPS, OAnQuanGame
+
+
+def measure(idle_mode: bool, seconds: float) -> float:
+    game = OAnQuanGame(idle_mode=idle_mode)
+    game.ai_engine.verbose = False
+    game.in_menu = False
+    # The window closes itself through a QUIT timer event
+    pygame.time.set_timer(pygame.QUIT, int(seconds * 1000), 1)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        game.run()
+    except SystemExit:
+        pass
+    return 100 * (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    for idle_mode in (False, True):
+        label = "idle mode" if idle_mode else f"redraw at {FPS} FPS"
+        print(f"{label}: {measure(idle_mode, args.seconds):.1f}% CPU")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Move previews: cost of computing every move's outcome against a frame.
+
+    python benchmarks/bench_preview.py --positions 2000
+
+The GUI calls move_outcomes once per position, when a turn starts; a
+frame at 60 FPS has 16.7 ms.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from oanquan import Direction, GameState
+from oanquan.preview import PreviewCache, move_outcomes
+
+
+def sample_states(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    states = []
+    state = GameState()
+    while len(states) < count:
+        if state.game_over:
+            state = GameState()
+        states.append(state.copy())
+        state.make_move_instant(rng.choice(state.get_valid_moves()),
+                                rng.choice((Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE)))
+    return states
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--positions", type=int, default=2000)
+    args = parser.parse_args()
+    states = sample_states(args.positions)
+
+    start = time.perf_counter()
+    times = []
+    for state in states:
+        before = time.perf_counter()
+        move_outcomes(state)
+        times.append(time.perf_counter() - before)
+    elapsed = time.perf_counter() - start
+    times.sort()
+    print(f"move_outcomes      {elapsed * 1e6 / len(states):8.1f} us/position "
+          f"(p99 {times[int(len(times) * 0.99)] * 1e6:.1f} us, max {times[-1] * 1e6:.1f} us)")
+
+    cache = PreviewCache(max_positions=len(states))
+    for state in states:
+        cache.outcomes(state)
+    cache.hits = cache.misses = 0
+    start = time.perf_counter()
+    for state in states:
+        cache.outcomes(state)
+    elapsed = time.perf_counter() - start
+    print(f"PreviewCache hit   {elapsed * 1e6 / len(states):8.1f} us/position "
+          f"({cache.hits} hits, {cache.misses} misses)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Seek cost in a recorded game: checkpoints vs replaying from the start.
+
+    python benchmarks/bench_replay.py --games 2000 --seeks 2000
+
+Plays random games, keeps the longest one, then times random seeks with
+Replay at several checkpoint intervals against replaying every move from
+the start position.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from oanquan import Direction, GameState
+from oanquan.replay import GameRecord, Replay
+
+
+def longest_random_game(games: int, seed: int = 1) -> GameRecord:
+    rng = random.Random(seed)
+    longest = []
+    for _ in range(games):
+        state = GameState()
+        moves = []
+        while not state.game_over:
+            move = (rng.choice(state.get_valid_moves()),
+                    rng.choice((Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE)))
+            state.make_move_instant(*move)
+            moves.append(move)
+        if len(moves) > len(longest):
+            longest = moves
+    return GameRecord(longest)
+
+
+def from_start(record: GameRecord, ply: int) -> GameState:
+    state = record.start_state()
+    for move in record.moves[:ply]:
+        state.make_move_instant(*move)
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=2000)
+    parser.add_argument("--seeks", type=int, default=2000)
+    args = parser.parse_args()
+
+    record = longest_random_game(args.games)
+    rng = random.Random(2)
+    targets = [rng.randrange(len(record.moves) + 1) for _ in range(args.seeks)]
+    print(f"game of {len(record.moves)} plies, {args.seeks} random seeks")
+
+    start = time.perf_counter()
+    for ply in targets:
+        from_start(record, ply)
+    print(f"  replay from start      {(time.perf_counter() - start) * 1e6 / args.seeks:8.1f} us/seek")
+    for interval in (1, 4, 16, 64):
+        replay = Replay(record, checkpoint_interval=interval)
+        start = time.perf_counter()
+        for ply in targets:
+            replay.seek(ply)
+        print(f"  checkpoints every {replay.interval:3d} {(time.perf_counter() - start) * 1e6 / args.seeks:8.1f} us/seek, "
+              f"{len(replay.checkpoints)} checkpoints of 16 bytes")
+    replay = Replay(record)
+    start = time.perf_counter()
+    for _ in range(len(record.moves)):
+        replay.step(1)
+    print(f"  stepping forward       {(time.perf_counter() - start) * 1e6 / len(record.moves):8.1f} us/step")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Lazy SMP: time to depth with a shared table against separate per-process tables.
+
+    python benchmarks/bench_shared_tt.py --workers 1 2 4 8 --depth 8 --positions 6
+
+Every configuration searches the same positions to the same depth with a
+fresh set of worker processes, started and warmed up before the clock
+runs. Speedup is against the first row: by default one worker with a
+private table, which is the plain AIEngine. Workers only run in parallel
+with a free core each, so the report starts with the core count.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from oanquan import AIEngine, Direction, GameState
+from oanquan.sharedtt import LazySMP
+
+
+def sample_positions(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    positions = [GameState()]
+    while len(positions) < count:
+        state = GameState()
+        for _ in range(rng.randrange(4, 24)):
+            if state.game_over:
+                break
+            state.make_move_instant(rng.choice(state.get_valid_moves()),
+                                    rng.choice((Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE)))
+        if not state.game_over:
+            positions.append(state)
+    return positions
+
+
+def run(workers: int, shared: bool, positions, depth: int, weights: dict):
+    smp = LazySMP(workers=workers, max_depth=1, weights=weights, shared=shared)
+    try:
+        # Start the processes and import everything in them before timing
+        smp.get_best_move(GameState())
+        smp.max_depth = depth
+        nodes = 0
+        start = time.perf_counter()
+        for state in positions:
+            smp.get_best_move(state)
+            nodes += smp.nodes_evaluated
+        return time.perf_counter() - start, nodes
+    finally:
+        smp.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--positions", type=int, default=6)
+    args = parser.parse_args()
+
+    positions = sample_positions(args.positions)
+    weights = AIEngine(verbose=False).weights
+    print(f"{os.cpu_count()} cores, {len(positions)} positions to depth {args.depth}")
+    print(f"{'workers':>7} {'table':>8} {'seconds':>8} {'nodes':>9} {'speedup':>7}")
+    baseline = None
+    for workers in args.workers:
+        for shared in (False, True):
+            seconds, nodes = run(workers, shared, positions, args.depth, weights)
+            if baseline is None:
+                baseline = seconds
+            print(f"{workers:7d} {'shared' if shared else 'separate':>8} {seconds:8.2f} {nodes:9d} "
+                  f"{baseline / seconds:7.2f}")
+
+
+if __name__ == "__main__":
+    main()
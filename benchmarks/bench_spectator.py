@@ -0,0 +1,54 @@
+"""Frame rate of the multi-board spectator view.
+
+    python benchmarks/bench_spectator.py --boards 64 --frames 600
+
+Draws N boards on a window-sized offscreen surface while random games
+advance M boards per frame. Compares SpectatorView, which redraws only
+changed tiles, with redrawing every tile every frame. Game stepping is
+not timed.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from oanquan.gui import WINDOW_HEIGHT, WINDOW_WIDTH
+from oanquan.spectator import SelfPlayFeed, SpectatorView
+
+
+def measure(boards: int, moves_per_frame: int, frames: int, full_redraw: bool) -> float:
+    surface = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+    view = SpectatorView(surface, boards)
+    feed = SelfPlayFeed(boards, depth=0, moves_per_frame=moves_per_frame, seed=1, restart_delay=0.0)
+    drawing = 0.0
+    for _ in range(frames):
+        feed.step()
+        if full_redraw:
+            view.invalidate()
+        start = time.perf_counter()
+        view.draw(feed.states)
+        drawing += time.perf_counter() - start
+    return frames / drawing
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boards", type=int, default=64)
+    parser.add_argument("--frames", type=int, default=600)
+    args = parser.parse_args()
+
+    pygame.init()
+    for moves_per_frame in (1, 8, args.boards):
+        changed = measure(args.boards, moves_per_frame, args.frames, full_redraw=False)
+        full = measure(args.boards, moves_per_frame, args.frames, full_redraw=True)
+        print(f"{args.boards} boards, {moves_per_frame:3d} moves/frame: changed tiles {changed:8.0f} FPS, "
+              f"full redraw {full:6.0f} FPS")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Startup cost of the core package, the GUI, the CLI tools and pool workers.
+
+    python benchmarks/bench_startup.py --repeat 5
+
+Each figure is the median wall time over --repeat fresh interpreters or
+fresh spawn-based process pools.
+"""
+import argparse
+import importlib
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMMANDS = {
+    "python (empty)": ["-c", "pass"],
+    "import oanquan": ["-c", "import oanquan"],
+    "import oanquan.gui": ["-c", "import oanquan.gui"],
+    "import oanquan.gui + pygame.init()": ["-c", "import oanquan.gui, pygame; pygame.init()"],
+    "oanquan.server --help": ["-m", "oanquan.server", "--help"],
+    "oanquan.training --help": ["-m", "oanquan.training", "--help"],
+}
+
+
+def _load(module: str) -> int:
+    importlib.import_module(module)
+    return os.getpid()
+
+
+def time_command(args, repeat: int) -> float:
+    env = dict(os.environ, SDL_VIDEODRIVER="dummy", SDL_AUDIODRIVER="dummy", PYGAME_HIDE_SUPPORT_PROMPT="1")
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, *args], cwd=ROOT, env=env, check=True, stdout=subprocess.DEVNULL)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def time_spawn_pool(module: str, workers: int, repeat: int) -> float:
+    # Time until every worker of a fresh spawn pool has imported the module
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as pool:
+            list(pool.map(_load, [module] * workers))
+            samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+    for label, command in COMMANDS.items():
+        print(f"{label:38s} {time_command(command, args.repeat) * 1000:8.1f} ms")
+    for module in ("oanquan.engine", "oanquan.gui"):
+        seconds = time_spawn_pool(module, args.workers, args.repeat)
+        print(f"{'spawn pool x%d, import %s' % (args.workers, module):38s} {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
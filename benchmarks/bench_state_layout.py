@@ -0,0 +1,207 @@
+"""Memory and attribute access of GameState and AnimationState, before and after __slots__.
+
+    python benchmarks/bench_state_layout.py --states 20000 --depth 6
+
+Both classes are compared with their earlier layouts, rebuilt here as
+plain classes with a __dict__: a GameState that copies by constructing a
+start position first, and the flat AnimationState. GameState is also
+measured with an array('B') board in place of the list, the more compact
+layout that rules.py does not use: it is smaller, but every board[i]
+read builds an int, so sowing and evaluation get slower.
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+from oanquan import AIEngine, Direction, GameState, Player
+from oanquan.gui import AnimationState
+from oanquan.particles import ParticlePool
+from oanquan.rules import STANDARD_BOARD, _state_versions
+
+
+class LegacyGameState:
+    """GameState's attributes and copy() as they were, in a __dict__."""
+
+    def __init__(self, config=STANDARD_BOARD):
+        self.config = config
+        self.board = config.initial_board()
+        self.current_player = Player.PLAYER1
+        self.player1_score = 0
+        self.player2_score = 0
+        self.game_over = False
+        self.winner = None
+        self.move_count = 0
+        self.version = next(_state_versions)
+        self._moves_version = 0
+        self._valid_moves = None
+        self._redistribution_version = 0
+        self._needs_redistribution = False
+
+    def copy(self):
+        new_state = LegacyGameState(self.config)
+        new_state.board = self.board.copy()
+        new_state.current_player = self.current_player
+        new_state.player1_score = self.player1_score
+        new_state.player2_score = self.player2_score
+        new_state.game_over = self.game_over
+        new_state.winner = self.winner
+        new_state.move_count = self.move_count
+        if self._moves_version == self.version:
+            new_state._valid_moves = self._valid_moves
+            new_state._moves_version = new_state.version
+        return new_state
+
+
+def array_board_state() -> GameState:
+    state = GameState()
+    state.board = array("B", state.board)
+    return state
+
+
+class LegacyAnimationState:
+    """The flat AnimationState, one __dict__ for every effect."""
+
+    def __init__(self):
+        self.is_animating = False
+        self.current_stones = 0
+        self.current_position = 0
+        self.animation_speed = 25
+        self.frame_count = 0
+        self.callback = None
+        self.direction = Direction.CLOCKWISE
+        self.capturing = False
+        self.capture_positions = []
+        self.capture_frame = 0
+        self.capture_speed = 8
+        self.hand_visible = False
+        self.hand_position = None
+        self.hand_target = None
+        self.hand_frame = 0
+        self.captured_stones = 0
+        self.hand_state = "reaching"
+        self.sowing_visible = False
+        self.sowing_position = None
+        self.sowing_frame = 0
+        self.sowing_particles = ParticlePool()
+        self.score_effect = False
+        self.score_effect_frame = 0
+        self.score_effect_player = None
+
+
+def bytes_per_instance(make, count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [make() for _ in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del instances
+    return used / count
+
+
+def best_of(function, repeats: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def copy_seconds(state, count: int) -> float:
+    def run():
+        copy = state.copy
+        for _ in range(count):
+            copy()
+    return best_of(run) / count
+
+
+def sow_seconds(state, count: int) -> float:
+    # One lap of the board per round, reading and writing every cell as a move does
+    board = state.board
+    cells = range(len(board))
+
+    def run():
+        for _ in range(count):
+            for cell in cells:
+                board[cell] += 1
+                board[cell] -= 1
+    return best_of(run) / count
+
+
+def hand_frames_flat(animation, frames: int):
+    # The old update_hand_animation: every field through self.animation
+    for _ in range(frames):
+        animation.hand_frame += 1
+        if animation.hand_state == "reaching" and animation.hand_frame < 10:
+            animation.hand_position[1] += 2
+        animation.hand_frame = 0
+
+
+def hand_frames_record(animation, frames: int):
+    # update_hand_animation now: the record bound to a local once
+    hand = animation.hand
+    for _ in range(frames):
+        hand.frame += 1
+        if hand.state == "reaching" and hand.frame < 10:
+            hand.position[1] += 2
+        hand.frame = 0
+
+
+def access_seconds(animation, step, frames: int) -> float:
+    animation.hand_position = [0, 0]
+    return best_of(lambda: step(animation, frames)) / frames
+
+
+def search_nps(make, depth: int) -> float:
+    engine = AIEngine(max_depth=depth, weights_path=None, verbose=False)
+
+    def run():
+        engine.tt.clear()
+        engine.get_best_move(make())
+    seconds = best_of(run, 3)
+    return engine.nodes_evaluated / seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--states", type=int, default=20000, help="instances per memory measurement")
+    parser.add_argument("--copies", type=int, default=200000)
+    parser.add_argument("--frames", type=int, default=200000, help="animation updates per access measurement")
+    parser.add_argument("--depth", type=int, default=6, help="search depth for nodes per second, 0 to skip")
+    args = parser.parse_args()
+
+    layouts = [("dict, list board", LegacyGameState),
+               ("slots, list board", GameState),
+               ("slots, array board", array_board_state)]
+    print(f"GameState, {args.states} instances, {args.copies} copies")
+    print(f"{'layout':<20} {'bytes':>7} {'copy us':>8} {'sow us':>7}" + (" nodes/s" if args.depth else ""))
+    for name, make in layouts:
+        state = make()
+        line = (f"{name:<20} {bytes_per_instance(make, args.states):7.0f} "
+                f"{copy_seconds(state, args.copies) * 1e6:8.2f} {sow_seconds(state, args.copies // 10) * 1e6:7.2f}")
+        if args.depth and make is not LegacyGameState:
+            line += f" {search_nps(make, args.depth):7.0f}"
+        print(line)
+
+    pool = bytes_per_instance(ParticlePool, args.states // 10)
+    print(f"\nAnimationState, {args.states // 10} instances (each with a {pool:.0f}-byte particle pool)")
+    print(f"{'layout':<20} {'bytes':>7}")
+    print(f"{'flat dict':<20} {bytes_per_instance(LegacyAnimationState, args.states // 10):7.0f}")
+    print(f"{'slotted records':<20} {bytes_per_instance(AnimationState, args.states // 10):7.0f}")
+
+    print(f"\nOne hand animation frame, {args.frames} frames")
+    print(f"{'access':<34} {'ns':>6}")
+    for name, animation, step in (("flat dict", LegacyAnimationState(), hand_frames_flat),
+                                  ("record bound to a local", AnimationState(), hand_frames_record),
+                                  ("old names forwarded to records", AnimationState(), hand_frames_flat)):
+        print(f"{name:<34} {access_seconds(animation, step, args.frames) * 1e9:6.0f}")
+
+
+if __name__ == "__main__":
+    main()
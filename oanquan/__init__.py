@@ -0,0 +1,35 @@
+"""O An Quan rules and engine core.
+
+Importing this package does not import pygame; the window lives in
+oanquan.gui.
+"""
+from .engine import AIEngine, SearchAborted, SearchTimeout
+from .evaluation import DEFAULT_WEIGHTS, WEIGHTS_PATH, evaluate_state, load_weights
+from .positiondb import DB_PATH, Analysis, PositionDB
+from .replay import GameRecord, Replay
+from .rules import (STANDARD_BOARD, BoardConfig, Direction, GameMode, GameState, Player, position_from_key,
+                    position_key, query_stats)
+
+__all__ = [
+    "AIEngine",
+    "Analysis",
+    "BoardConfig",
+    "DB_PATH",
+    "DEFAULT_WEIGHTS",
+    "Direction",
+    "GameMode",
+    "GameRecord",
+    "GameState",
+    "Player",
+    "PositionDB",
+    "Replay",
+    "SearchAborted",
+    "STANDARD_BOARD",
+    "SearchTimeout",
+    "WEIGHTS_PATH",
+    "evaluate_state",
+    "load_weights",
+    "position_from_key",
+    "position_key",
+    "query_stats",
+]
@@ -0,0 +1,163 @@
+"""Multi-PV analysis of the position on the board, deepening in the background.
+
+The search runs in a separate process, so it never competes with the
+window for the interpreter lock; a frame costs the same with analysis on
+or off. The process lowers its own priority, which keeps the frame rate
+on a single core too.
+"""
+import multiprocessing
+import os
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .engine import AIEngine, SearchAborted
+from .rules import BoardConfig, Direction, GameState, position_from_key, position_key
+
+# Scheduling priority the analysis process gives up in favour of the window
+WORKER_NICENESS = 10
+
+
+class Line(NamedTuple):
+    move: int
+    direction: Direction
+    # From the side to move's point of view
+    score: float
+    pv: List[Tuple[int, Direction]]
+
+
+def _analyse(engine: AIEngine, key: bytes, config: BoardConfig, depth: int, max_depth: int, count: int, updates):
+    state = position_from_key(key, config)
+    while depth < max_depth:
+        depth += 1
+        scored = engine.search_lines(state, depth, count)
+        if not scored:
+            return
+        updates.put((key, depth, [Line(move, direction, score,
+                                       engine.principal_variation(state, (move, direction), depth))
+                                  for score, (move, direction) in scored]))
+        # A forced result does not change with depth
+        if abs(scored[0][0]) >= engine.weights["terminal"]:
+            return
+
+
+def _worker(weights: dict, count: int, max_depth: int, commands, updates):
+    if hasattr(os, "nice"):
+        os.nice(WORKER_NICENESS)
+    engine = AIEngine(max_depth=max_depth, weights_path=None, verbose=False)
+    engine.weights = weights
+    latest = []
+    ready = threading.Condition()
+
+    def listen():
+        # A new command aborts the search in progress
+        while True:
+            command = commands.get()
+            with ready:
+                latest[:] = [command]
+                engine.stop()
+                ready.notify()
+
+    threading.Thread(target=listen, daemon=True).start()
+    while True:
+        with ready:
+            while not latest:
+                ready.wait()
+            command = latest.pop()
+            engine.stop_requested = False
+        if command is None:
+            updates.put(None)
+            return
+        if command == "stop":
+            continue
+        if len(engine.tt) > engine.TT_MAX_ENTRIES:
+            engine.tt.clear()
+        try:
+            _analyse(engine, *command, max_depth, count, updates)
+        except SearchAborted:
+            pass
+
+
+class Analyzer:
+    """Keeps the best few lines of one position, searched one depth at a time.
+
+    analyse() switches to a position and returns at once. The worker
+    publishes the lines after every completed depth and on_update is
+    called, from a helper thread, as each arrives. The worker keeps its
+    transposition table from position to position and finished results
+    are cached here by position key, so after a move, or when going back
+    to a position already analysed, the search picks up where it left off.
+    The worker is started by the first analyse().
+    """
+
+    MAX_RESULTS = 4096
+
+    def __init__(self, engine: AIEngine, lines: int = 3, max_depth: int = 12,
+                 on_update: Optional[Callable[[], None]] = None):
+        self.weights = dict(engine.weights)
+        self.lines = lines
+        self.max_depth = max_depth
+        self.on_update = on_update
+        self.results: Dict[bytes, Tuple[int, List[Line]]] = {}
+        self.lock = threading.Lock()
+        self.key = None
+        self.process = None
+        self.commands = None
+        self.updates = None
+
+    def analyse(self, state: GameState):
+        key = position_key(state)
+        if key == self.key:
+            return
+        self.key = key
+        with self.lock:
+            depth = self.results.get(key, (0, []))[0]
+        if state.game_over or depth >= self.max_depth:
+            self._send("stop")
+        else:
+            self._send((key, state.config, depth))
+
+    def stop(self):
+        if self.key is not None:
+            self.key = None
+            self._send("stop")
+
+    def close(self):
+        if self.process is not None:
+            self.commands.put(None)
+            self.process.join()
+            self.process = None
+        self.key = None
+
+    def result(self, state: GameState) -> Optional[Tuple[int, List[Line]]]:
+        """Depth and lines of the deepest finished search of `state`, if any."""
+        with self.lock:
+            return self.results.get(position_key(state))
+
+    def _send(self, command):
+        if self.process is None:
+            if command == "stop":
+                return
+            context = multiprocessing.get_context("spawn")
+            self.commands = context.Queue()
+            self.updates = context.Queue()
+            self.process = context.Process(target=_worker, daemon=True,
+                                           args=(self.weights, self.lines, self.max_depth,
+                                                 self.commands, self.updates))
+            self.process.start()
+            threading.Thread(target=self._receive, args=(self.updates,), daemon=True).start()
+        self.commands.put(command)
+
+    def _receive(self, updates):
+        while True:
+            update = updates.get()
+            if update is None:
+                return
+            key, depth, lines = update
+            with self.lock:
+                if len(self.results) >= self.MAX_RESULTS:
+                    self.results.clear()
+                previous = self.results.get(key)
+                if previous is None or depth > previous[0]:
+                    self.results[key] = (depth, lines)
+            if self.on_update is not None:
+                self.on_update()
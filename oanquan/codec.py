@@ -0,0 +1,75 @@
+"""Fixed-width position records and their NumPy batch forms.
+
+A position is the 16-byte record made by rules.position_key:
+
+    bytes 0-12   board cells (cell 0 is always 0)
+    byte 13      Player 1's score
+    byte 14      Player 2's score
+    byte 15      side to move (Player.value)
+
+The record is the key of the transposition table, the ponderer and the
+position database, and it is what the server sends to its workers. As an
+integer it is the big-endian value of the same 16 bytes. A batch of N
+positions is an (N, 16) uint8 array. Only the standard board fits this
+layout; keys of other BoardConfigs are key_size bytes long.
+
+Conversions between records, keys and integers work on whole arrays,
+with no Python loop over the rows. encode_batch and decode_batch
+still visit each GameState in Python, since a state is a Python object:
+one position_key or position_from_key call per row, which costs far
+more than the array work around it.
+"""
+from typing import Iterable, List
+
+import numpy as np
+
+from .rules import GameState, position_from_key, position_key
+
+RECORD_SIZE = 16
+SCORE1, SCORE2, SIDE = 13, 14, 15
+
+encode = position_key
+decode = position_from_key
+
+
+def pack(state: GameState) -> int:
+    return int.from_bytes(position_key(state), "big")
+
+
+def unpack(value: int) -> GameState:
+    return position_from_key(value.to_bytes(RECORD_SIZE, "big"))
+
+
+def encode_batch(states: Iterable[GameState]) -> np.ndarray:
+    return records_from_keys(map(position_key, states))
+
+
+def decode_batch(records: np.ndarray) -> List[GameState]:
+    return list(map(position_from_key, keys_from_records(records)))
+
+
+def records_from_keys(keys: Iterable[bytes]) -> np.ndarray:
+    return np.frombuffer(b"".join(keys), dtype=np.uint8).reshape(-1, RECORD_SIZE)
+
+
+def _contiguous(records: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(records, dtype=np.uint8).reshape(-1, RECORD_SIZE)
+
+
+def keys_from_records(records: np.ndarray) -> List[bytes]:
+    # A void item converts to its raw bytes, zeros included
+    return _contiguous(records).view(f"V{RECORD_SIZE}").ravel().tolist()
+
+
+def pack_batch(records: np.ndarray) -> List[int]:
+    # Each record read as two big-endian 64-bit words, joined as Python ints in an object array
+    words = _contiguous(records).view(">u8")
+    return (words[:, 0].astype(object) << 64 | words[:, 1].astype(object)).tolist()
+
+
+def unpack_batch(values: Iterable[int]) -> np.ndarray:
+    values = np.fromiter(values, dtype=object)
+    words = np.empty((len(values), 2), dtype=">u8")
+    words[:, 0] = values >> 64
+    words[:, 1] = values & (1 << 64) - 1
+    return words.view(np.uint8).reshape(-1, RECORD_SIZE)
@@ -0,0 +1,313 @@
+"""Game-tree search for the computer player."""
+import time
+from typing import Callable, List, Optional, Tuple
+
+from .evaluation import WEIGHTS_PATH, evaluate_state, load_weights
+from .positiondb import PositionDB
+from .rules import Direction, GameState, Player, position_key
+
+class SearchAborted(Exception):
+    pass
+
+class SearchTimeout(SearchAborted):
+    pass
+
+# Transposition table bound types
+TT_EXACT = 0
+TT_LOWER = 1
+TT_UPPER = 2
+
+def format_moves(moves: List[Tuple[int, Direction]]) -> str:
+    return " ".join(f"{pit}{'cw' if direction == Direction.CLOCKWISE else 'ccw'}" for pit, direction in moves)
+
+def parse_move(text: str) -> Tuple[int, Direction]:
+    """Inverse of format_moves for one move, e.g. "9cw" or "3ccw"."""
+    for suffix, direction in (("ccw", Direction.COUNTER_CLOCKWISE), ("cw", Direction.CLOCKWISE)):
+        if text.endswith(suffix) and text[:-len(suffix)].isdigit():
+            return int(text[:-len(suffix)]), direction
+    raise ValueError(f"not a move: {text!r}")
+
+def effective_branching_factor(iterations: List[dict]) -> Optional[float]:
+    # b such that b ** depth is the node count of all iterations together; the
+    # per-iteration ratio swings too much once the table carries results over
+    if not iterations:
+        return None
+    return sum(iteration["nodes"] for iteration in iterations) ** (1 / iterations[-1]["depth"])
+
+class AIEngine:
+    NULL_WINDOW = 1e-6
+    ASPIRATION_WINDOW = 2.0
+    # Late-move reductions apply from this depth and move index on, to quiet moves only
+    LMR_MIN_DEPTH = 3
+    LMR_MIN_INDEX = 3
+    CAPTURE_EXTENSION = True
+    TT_MAX_ENTRIES = 1 << 20
+
+    def __init__(self, max_depth: int = 4, weights_path: Optional[str] = WEIGHTS_PATH, verbose: bool = True,
+                 time_limit: Optional[float] = None, position_db: Optional[PositionDB] = None,
+                 node_limit: Optional[int] = None):
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        # Like time_limit, stops deepening once this many nodes are searched
+        self.node_limit = node_limit
+        self.nodes_evaluated = 0
+        self.weights = load_weights(weights_path)
+        self.verbose = verbose
+        # Set from another thread to abort a running search with SearchAborted
+        self.stop_requested = False
+        self.tt = {}
+        # Finished analyses are read from and written back to this store
+        self.position_db = position_db
+        if position_db is not None:
+            position_db.use_weights(self.weights)
+        self.depth_reached = 0
+        self.iterations = []
+        # Called with each entry of self.iterations as it is completed
+        self.on_iteration: Optional[Callable[[dict], None]] = None
+        self._deadline = None
+        self._node_budget = None
+        self._max_ply = 0
+        self._root_move = None
+
+    def stop(self):
+        self.stop_requested = True
+
+    def get_best_move(self, state: GameState) -> Tuple[int, Direction]:
+        # Iterative deepening up to max_depth, or until time_limit runs out
+        self.nodes_evaluated = 0
+        self.depth_reached = 0
+        self.iterations = []
+        # A shared table (oanquan.sharedtt) has a fixed size and replaces entries itself
+        if isinstance(self.tt, dict) and len(self.tt) > self.TT_MAX_ENTRIES:
+            self.tt.clear()
+        stored = self._probe_position_db(state)
+        if stored is not None:
+            return stored
+
+        start = time.perf_counter()
+        self._deadline = None
+        self._node_budget = None
+        best_move, best_direction = None, Direction.CLOCKWISE
+        score = 0.0
+        for depth in range(1, self.max_depth + 1):
+            nodes_before = self.nodes_evaluated
+            iteration_start = time.perf_counter()
+            try:
+                score = self._search_root(state, depth, score)
+            except SearchTimeout:
+                break
+            if self._root_move is None:
+                break
+            best_move, best_direction = self._root_move
+            self.depth_reached = depth
+            now = time.perf_counter()
+            self.iterations.append({
+                "depth": depth,
+                "nodes": self.nodes_evaluated - nodes_before,
+                "seconds": now - iteration_start,
+                "total_seconds": now - start,
+                "score": score,
+                "pv": self.principal_variation(state, self._root_move, depth),
+            })
+            if self.on_iteration is not None:
+                self.on_iteration(self.iterations[-1])
+            # The first iteration always completes so there is a move to play
+            if self.time_limit is not None:
+                self._deadline = start + self.time_limit
+            if self.node_limit is not None:
+                self._node_budget = self.node_limit
+            if abs(score) >= self.weights["terminal"]:
+                break
+        self._deadline = None
+        self._node_budget = None
+        if self.position_db is not None and best_move is not None:
+            self.position_db.store(state, best_move, best_direction, self.iterations[-1]["score"],
+                                   self.depth_reached, self.nodes_evaluated)
+
+        if self.verbose:
+            print(self.search_summary())
+        return best_move, best_direction
+
+    def search_summary(self) -> str:
+        """One line on the last get_best_move, from self.iterations."""
+        if not self.iterations:
+            return f"AI evaluated {self.nodes_evaluated} nodes (depth {self.depth_reached})"
+        last = self.iterations[-1]
+        ebf = effective_branching_factor(self.iterations)
+        return (f"AI evaluated {self.nodes_evaluated} nodes in {last['total_seconds']:.3f} s "
+                f"(depth {self.depth_reached}, EBF {'-' if ebf is None else f'{ebf:.2f}'}), "
+                f"score {last['score']:+.1f}, pv {format_moves(last['pv'])}")
+
+    def _probe_position_db(self, state: GameState) -> Optional[Tuple[int, Direction]]:
+        if self.position_db is None:
+            return None
+        analysis = self.position_db.lookup(state)
+        if analysis is None or analysis.move not in state.get_valid_moves():
+            return None
+        if analysis.depth >= self.max_depth:
+            self.depth_reached = analysis.depth
+            if self.verbose:
+                print(f"AI reused a stored analysis (depth {analysis.depth})")
+            return analysis.move, analysis.direction
+        # A shallower analysis still puts its move first at the root
+        key = position_key(state)
+        entry = self.tt.get(key)
+        if entry is None or entry[0] < analysis.depth:
+            self.tt[key] = (analysis.depth, analysis.score, TT_EXACT, (analysis.move, analysis.direction))
+        return None
+
+    def _search_root(self, state: GameState, depth: int, previous_score: float) -> float:
+        self._max_ply = depth + 2
+        if depth == 1:
+            alpha, beta = float('-inf'), float('inf')
+        else:
+            alpha = previous_score - self.ASPIRATION_WINDOW
+            beta = previous_score + self.ASPIRATION_WINDOW
+        while True:
+            self._root_move = None
+            score = self._negamax(state, depth, alpha, beta, 0)
+            if score <= alpha and alpha != float('-inf'):
+                alpha = float('-inf')
+            elif score >= beta and beta != float('inf'):
+                beta = float('inf')
+            else:
+                return score
+
+    def search_lines(self, state: GameState, depth: int, count: int) -> List[Tuple[float, Tuple[int, Direction]]]:
+        """The `count` best root moves at one depth with exact scores, best first.
+
+        Each root move is searched with its window's lower edge at the
+        count-th best score so far, so only moves that can enter the list
+        cost a full search. The transposition table is shared with
+        get_best_move.
+        """
+        valid_moves = state.get_valid_moves()
+        if state.game_over or not valid_moves:
+            return []
+        self._max_ply = depth + 2
+        key = position_key(state)
+        entry = self.tt.get(key)
+        lines = []
+        for move, child, gain in self._ordered_children(state, valid_moves, entry[3] if entry else None):
+            new_depth = depth - 1
+            if self.CAPTURE_EXTENSION and gain > 0 and new_depth == 0:
+                new_depth = 1
+            alpha = lines[count - 1][0] if len(lines) >= count else float('-inf')
+            score = self._search_child(state, child, new_depth, alpha, float('inf'), 0)
+            # A score at or below alpha is only a bound, and too low for the list anyway
+            if score > alpha:
+                lines.append((score, move))
+                lines.sort(key=lambda line: -line[0])
+                del lines[count:]
+        self.tt[key] = (depth, lines[0][0], TT_EXACT, lines[0][1])
+        return lines
+
+    def principal_variation(self, state: GameState, move: Tuple[int, Direction], length: int) -> List[Tuple[int, Direction]]:
+        # `move` followed by the hash moves of the positions it leads to
+        line = [move]
+        state = state.copy()
+        while state.make_move_instant(*move) and len(line) < length and not state.game_over:
+            entry = self.tt.get(position_key(state))
+            if entry is None or entry[3] is None:
+                break
+            move = entry[3]
+            line.append(move)
+        return line
+
+    def _negamax(self, state: GameState, depth: int, alpha: float, beta: float, ply: int) -> float:
+        # Principal variation search; scores are from the side to move's point of view
+        self.nodes_evaluated += 1
+        if self.stop_requested:
+            raise SearchAborted()
+        if not self.nodes_evaluated & 1023 and (
+                (self._deadline is not None and time.perf_counter() > self._deadline) or
+                (self._node_budget is not None and self.nodes_evaluated > self._node_budget)):
+            raise SearchTimeout()
+
+        if depth <= 0 or state.game_over:
+            return self._relative_eval(state)
+        valid_moves = state.get_valid_moves()
+        if not valid_moves:
+            return self._relative_eval(state)
+
+        key = position_key(state)
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            tt_depth, tt_score, tt_flag, tt_move = entry
+            if ply > 0 and tt_depth >= depth:
+                if (tt_flag == TT_EXACT or
+                        (tt_flag == TT_LOWER and tt_score >= beta) or
+                        (tt_flag == TT_UPPER and tt_score <= alpha)):
+                    return tt_score
+
+        original_alpha = alpha
+        best_score = float('-inf')
+        best_move = None
+        for index, (move, child, gain) in enumerate(self._ordered_children(state, valid_moves, tt_move)):
+            new_depth = depth - 1
+            # Captures at the horizon are searched one ply further
+            if self.CAPTURE_EXTENSION and gain > 0 and new_depth == 0 and ply < self._max_ply:
+                new_depth = 1
+
+            if index == 0:
+                score = self._search_child(state, child, new_depth, alpha, beta, ply)
+            else:
+                reduction = int(depth >= self.LMR_MIN_DEPTH and index >= self.LMR_MIN_INDEX and gain <= 0)
+                score = self._search_child(state, child, new_depth - reduction, alpha, alpha + self.NULL_WINDOW, ply)
+                if reduction and score > alpha:
+                    score = self._search_child(state, child, new_depth, alpha, alpha + self.NULL_WINDOW, ply)
+                if alpha < score < beta:
+                    score = self._search_child(state, child, new_depth, alpha, beta, ply)
+
+            if score > best_score:
+                best_score = score
+                best_move = move
+                if ply == 0:
+                    self._root_move = move
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+
+        if best_score <= original_alpha:
+            flag = TT_UPPER
+        elif best_score >= beta:
+            flag = TT_LOWER
+        else:
+            flag = TT_EXACT
+        self.tt[key] = (depth, best_score, flag, best_move)
+        return best_score
+
+    def _search_child(self, state: GameState, child: GameState, depth: int, alpha: float, beta: float, ply: int) -> float:
+        # Redistribution and game-ending moves leave the same player to move
+        if child.current_player == state.current_player:
+            return self._negamax(child, depth, alpha, beta, ply + 1)
+        return -self._negamax(child, depth, -beta, -alpha, ply + 1)
+
+    def _ordered_children(self, state: GameState, valid_moves: List[int], tt_move) -> list:
+        # Hash move first, then the moves that capture the most
+        if state.board[valid_moves[0]] == 0:
+            # Out of stones: every move is the same redistribution
+            moves = [(valid_moves[0], Direction.CLOCKWISE)]
+        else:
+            moves = [(move, direction) for move in valid_moves
+                     for direction in (Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE)]
+
+        player1 = state.current_player == Player.PLAYER1
+        score_before = state.player1_score if player1 else state.player2_score
+        children = []
+        for move in moves:
+            child = state.copy()
+            child.make_move_instant(*move)
+            gain = (child.player1_score if player1 else child.player2_score) - score_before
+            children.append((move, child, gain))
+        children.sort(key=lambda c: (c[0] != tt_move, -c[2]))
+        return children
+
+    def _relative_eval(self, state: GameState) -> float:
+        score = self.evaluate_state(state)
+        return score if state.current_player == Player.PLAYER2 else -score
+
+    def evaluate_state(self, state: GameState) -> float:
+        return evaluate_state(state, self.weights)
@@ -0,0 +1,42 @@
+"""Static evaluation of positions for AIEngine."""
+import json
+import os
+from typing import Optional
+
+from .rules import GameState, Player
+
+# Evaluation weights; a fitted weights file in the project root overrides them
+WEIGHTS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "weights.json")
+DEFAULT_WEIGHTS = {
+    "score_diff": 1.0,
+    "position_weight": 0.2,
+    "quan_value": 5.0,
+    "terminal": 1000.0,
+}
+
+def load_weights(path: Optional[str] = WEIGHTS_PATH) -> dict:
+    weights = dict(DEFAULT_WEIGHTS)
+    if path and os.path.exists(path):
+        with open(path) as f:
+            weights.update(json.load(f))
+    return weights
+
+def evaluate_state(state: GameState, weights: dict) -> float:
+    # Scores from Player 2's point of view
+    if state.game_over:
+        if state.winner == Player.PLAYER2:
+            return weights["terminal"]
+        elif state.winner == Player.PLAYER1:
+            return -weights["terminal"]
+        else:
+            return 0
+    
+    score_diff = state.player2_score - state.player1_score
+    config = state.config
+    p2_stones = sum(state.board[config.player2_row])
+    p1_stones = sum(state.board[config.player1_row])
+    position_value = (p2_stones - p1_stones) * weights["position_weight"]
+    left_quan, right_quan = config.quans
+    quan_safety = (state.board[left_quan] + state.board[right_quan]) * weights["quan_value"]
+    
+    return score_diff * weights["score_diff"] + position_value + quan_safety
@@ -0,0 +1,1335 @@
+"""Pygame front end: board rendering, animations and input handling."""
+import pygame
+import sys
+import math
+import operator
+from typing import Optional
+
+from .analysis import Analyzer
+from .engine import AIEngine, format_moves
+from .particles import ParticlePool, StoneSprites
+from .ponder import Ponderer
+from .positiondb import PositionDB
+from .preview import PreviewCache
+from .replay import GameRecord, Replay
+from .rules import STANDARD_BOARD, BoardConfig, Direction, GameMode, GameState, Player, query_stats
+from .solver import Hints, Outcome
+
+# Game configuration
+WINDOW_WIDTH = 1000
+WINDOW_HEIGHT = 700
+FPS = 60
+# Longest an idle window sleeps in pygame.event.wait before checking again
+IDLE_WAIT_MS = 1000
+# How often the AI checks again on a pondered search of its position that is still running
+PONDER_POLL_MS = 50
+# The pits of a row share the space between the quan
+PIT_ROW_X = 180
+PIT_ROW_WIDTH = 640
+PIT_GAP = 10
+# Narrower pits show their stone count instead of rings of stones
+MIN_RING_CELL_WIDTH = 80
+# Posted by the analysis thread whenever it finishes a depth
+ANALYSIS_EVENT = pygame.USEREVENT + 2
+ANALYSIS_LINES = 3
+# Posted when the solver behind the H hint finishes a position
+HINT_EVENT = pygame.USEREVENT + 3
+# Budget of one hint; positions it cannot settle show as unknown
+HINT_MAX_NODES = 200_000
+HINT_TIME_LIMIT = 10.0
+
+# Colors
+BACKGROUND_COLOR = (240, 235, 210)
+BOARD_COLOR = (139, 90, 43)
+STONE_COLOR = (105, 105, 105)
+QUAN_COLOR = (218, 165, 32)
+TEXT_COLOR = (70, 35, 10)
+HIGHLIGHT_COLOR = (255, 215, 0)
+PLAYER1_COLOR = (34, 139, 34)
+PLAYER2_COLOR = (220, 20, 60)
+ANIMATION_COLOR = (255, 50, 50)
+VALID_MOVE_COLOR = (180, 140, 100)
+DIRECTION_COLOR = (255, 255, 255)
+ARROW_COLOR = (70, 35, 10)
+# Outlines of the cells the LEFT and RIGHT moves of the previewed pit would capture
+PREVIEW_LEFT_COLOR = (30, 110, 230)
+PREVIEW_RIGHT_COLOR = (240, 120, 0)
+
+class MoveAnimation:
+    """Stones carried from pit to pit while a move is sown."""
+
+    __slots__ = ("active", "stones", "position", "speed", "frame", "direction")
+
+    def __init__(self):
+        self.active = False
+        self.stones = 0
+        self.position = 0
+        # Frames per stone sown
+        self.speed = 25
+        self.frame = 0
+        self.direction = Direction.CLOCKWISE
+
+
+class CaptureAnimation:
+    """Cells emptied one by one at the end of a move."""
+
+    __slots__ = ("active", "positions", "frame", "speed")
+
+    def __init__(self):
+        self.active = False
+        self.positions = []
+        self.frame = 0
+        self.speed = 8
+
+
+class HandAnimation:
+    """The hand that carries captured stones to the player's score."""
+
+    __slots__ = ("visible", "position", "target", "frame", "stones", "state")
+
+    def __init__(self):
+        self.visible = False
+        self.position = None
+        self.target = None
+        self.frame = 0
+        self.stones = 0
+        self.state = "reaching"
+
+
+class SowingAnimation:
+    """Particles trailing the pit being sown."""
+
+    __slots__ = ("visible", "position", "frame", "particles")
+
+    def __init__(self):
+        self.visible = False
+        self.position = None
+        self.frame = 0
+        self.particles = ParticlePool()
+
+
+class ScoreEffect:
+    """The glow on a player's score after a capture."""
+
+    __slots__ = ("active", "frame", "player")
+
+    def __init__(self):
+        self.active = False
+        self.frame = 0
+        self.player = None
+
+
+def _forward(record: str, field: str) -> property:
+    def set_field(self, value):
+        setattr(getattr(self, record), field, value)
+    return property(operator.attrgetter(f"{record}.{field}"), set_field)
+
+
+class AnimationState:
+    """Everything animating on the board, one record per kind of effect.
+
+    The game reads and writes the records, binding one to a local in the
+    per-frame updates. The flat names from before the split (is_animating,
+    hand_frame, ...) still reach the same fields for other callers, but
+    each goes through a property, several times slower than the record.
+    """
+
+    __slots__ = ("move", "capture", "hand", "sowing", "score", "callback")
+
+    def __init__(self):
+        self.move = MoveAnimation()
+        self.capture = CaptureAnimation()
+        self.hand = HandAnimation()
+        self.sowing = SowingAnimation()
+        self.score = ScoreEffect()
+        # Called when the running move or capture ends, shared by both
+        self.callback = None
+
+    is_animating = _forward("move", "active")
+    current_stones = _forward("move", "stones")
+    current_position = _forward("move", "position")
+    animation_speed = _forward("move", "speed")
+    frame_count = _forward("move", "frame")
+    direction = _forward("move", "direction")
+
+    capturing = _forward("capture", "active")
+    capture_positions = _forward("capture", "positions")
+    capture_frame = _forward("capture", "frame")
+    capture_speed = _forward("capture", "speed")
+
+    hand_visible = _forward("hand", "visible")
+    hand_position = _forward("hand", "position")
+    hand_target = _forward("hand", "target")
+    hand_frame = _forward("hand", "frame")
+    captured_stones = _forward("hand", "stones")
+    hand_state = _forward("hand", "state")
+
+    sowing_visible = _forward("sowing", "visible")
+    sowing_position = _forward("sowing", "position")
+    sowing_frame = _forward("sowing", "frame")
+    sowing_particles = _forward("sowing", "particles")
+
+    score_effect = _forward("score", "active")
+    score_effect_frame = _forward("score", "frame")
+    score_effect_player = _forward("score", "player")
+
+class OAnQuanGame:
+    def __init__(self, idle_mode: bool = True, replay: Optional[Replay] = None,
+                 config: BoardConfig = STANDARD_BOARD, ai_engine: Optional[AIEngine] = None):
+        pygame.init()
+        self.screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+        pygame.display.set_caption("O An Quan - Vietnamese Traditional Game")
+        self.clock = pygame.time.Clock()
+        
+        self.init_fonts()
+        
+        # A replay is shown on the board it was played on
+        self.config = replay.record.start_state().config if replay is not None else config
+        self.game_state = GameState(self.config)
+        # By default the computer player learns from and adds to the position database
+        self.ai_engine = ai_engine if ai_engine is not None else AIEngine(max_depth=4, position_db=PositionDB())
+        self.ponderer = Ponderer(self.ai_engine)
+        self.analyzer = Analyzer(self.ai_engine, lines=ANALYSIS_LINES,
+                                 on_update=lambda: pygame.event.post(pygame.event.Event(ANALYSIS_EVENT)))
+        # Toggled with A
+        self.show_analysis = False
+        self.hints = Hints(on_update=lambda: pygame.event.post(pygame.event.Event(HINT_EVENT)),
+                           max_nodes=HINT_MAX_NODES, max_entries=HINT_MAX_NODES, time_limit=HINT_TIME_LIMIT)
+        # Toggled with H
+        self.show_hint = False
+        # Outcomes of the moves of the position on the board, computed once per position
+        self.previews = PreviewCache()
+        self.move_previews = {}
+        self._previews_version = None
+        self.hover_cell = None
+        self.game_mode = GameMode.HUMAN_VS_HUMAN
+        self.selected_cell = None
+        self.waiting_for_direction = False
+        self.showing_direction_choice = False
+        self.animation = AnimationState()
+        self.stone_sprites = StoneSprites()
+        # Block on input instead of redrawing at FPS while nothing is animating
+        self.idle_mode = idle_mode
+        
+        self.in_menu = True
+        # Moves of the game in progress, saved with S
+        self.move_record = []
+        # Set while reviewing a recorded game instead of playing
+        self.replay = replay
+        if replay is not None:
+            self.in_menu = False
+            self.game_state = replay.seek(0)
+        self._background = None
+        self._cell_colors_key = None
+        self._cell_colors = {}
+        self.cell_positions = {}
+        self.setup_cell_positions()
+
+    def init_fonts(self):
+        try:
+            self.title_font = pygame.font.Font(None, 48)
+            self.font = pygame.font.Font(None, 28)
+            self.small_font = pygame.font.Font(None, 20)
+            self.tiny_font = pygame.font.Font(None, 18)
+        except:
+            self.title_font = pygame.font.SysFont('Arial', 48, bold=True)
+            self.font = pygame.font.SysFont('Arial', 28, bold=True)
+            self.small_font = pygame.font.SysFont('Arial', 20)
+            self.tiny_font = pygame.font.SysFont('Arial', 14)
+
+    def setup_cell_positions(self):
+        cell_height = 90
+        start_y = 250
+        left_quan, right_quan = self.config.quans
+        
+        self.cell_positions[left_quan] = (70, start_y + cell_height//2 + 50)
+        self.cell_positions[right_quan] = (WINDOW_WIDTH - 130, start_y + cell_height//2 + 50)
+        
+        for cell_index, rect in self.get_cell_rects().items():
+            self.cell_positions[cell_index] = rect.center
+
+    def check_auto_redistribute(self):
+        if self.game_state.needs_redistribution():
+            self.game_state._redistribute_stones()
+            return True
+        return False
+
+    def start_animation(self, start_pos: int, direction: Direction, callback=None):
+        move = self.animation.move
+        move.active = True
+        move.stones = self.game_state.board[start_pos]
+        move.position = start_pos
+        move.frame = 0
+        move.direction = direction
+        self.animation.callback = callback
+        
+        self.start_sowing_animation(start_pos)
+        self.game_state.board[start_pos] = 0
+        self.game_state.touch()
+
+    def start_sowing_animation(self, start_pos):
+        if start_pos in self.cell_positions:
+            sowing = self.animation.sowing
+            sowing.visible = True
+            sowing.position = list(self.cell_positions[start_pos])
+            sowing.frame = 0
+            sowing.particles.clear()
+
+    def update_animation(self):
+        animation = self.animation
+        if animation.capture.active:
+            self.update_capture_animation()
+            
+        self.update_hand_animation()
+        self.update_score_effect()
+        self.update_sowing_animation()
+            
+        move = animation.move
+        if not move.active:
+            return
+        
+        move.frame += 1
+        
+        if move.frame >= move.speed:
+            move.frame = 0
+            state = self.game_state
+            
+            if move.stones > 0:
+                move.position = state._next_position(move.position, move.direction)
+                
+                state.board[move.position] += 1
+                state.touch()
+                move.stones -= 1
+                
+                if move.position in self.cell_positions:
+                    animation.sowing.position = list(self.cell_positions[move.position])
+            else:
+                next_pos = state._next_position(move.position, move.direction)
+                
+                if next_pos in self.config.quans:
+                    # Sowing that stops before a quan captures nothing, as in make_move_instant
+                    move.active = False
+                    animation.sowing.visible = False
+                    if animation.callback:
+                        animation.callback(None)
+                elif state.board[next_pos] > 0:
+                    move.stones = state.board[next_pos]
+                    state.board[next_pos] = 0
+                    state.touch()
+                    move.position = next_pos
+                else:
+                    move.active = False
+                    animation.sowing.visible = False
+                    if animation.callback:
+                        animation.callback(move.position)
+
+    def update_sowing_animation(self):
+        sowing = self.animation.sowing
+        if not sowing.visible:
+            return
+            
+        sowing.frame += 1
+        
+        particles = sowing.particles
+        particles.update()
+        if sowing.frame % 10 == 0:
+            x, y = sowing.position
+            particles.spawn(x, y, vy=0.5, life=20)
+
+    def update_capture_animation(self):
+        animation = self.animation
+        capture = animation.capture
+        capture.frame += 1
+        
+        if capture.frame >= capture.speed:
+            capture.frame = 0
+            
+            if capture.positions:
+                state = self.game_state
+                pos = capture.positions.pop(0)
+                captured = state.board[pos]
+                state.board[pos] = 0
+                
+                self.start_hand_animation(pos, captured)
+                
+                if state.current_player == Player.PLAYER1:
+                    state.player1_score += captured
+                else:
+                    state.player2_score += captured
+                state.touch()
+                
+                score = animation.score
+                score.active = True
+                score.frame = 0
+                score.player = state.current_player
+                
+            else:
+                capture.active = False
+                if animation.callback:
+                    animation.callback(None)
+
+    def start_hand_animation(self, from_pos, stones):
+        if from_pos in self.cell_positions:
+            hand = self.animation.hand
+            hand.visible = True
+            hand.position = list(self.cell_positions[from_pos])
+            hand.stones = stones
+            hand.frame = 0
+            hand.state = "reaching"
+            
+            if self.game_state.current_player == Player.PLAYER1:
+                hand.target = [130, 120]
+            else:
+                hand.target = [WINDOW_WIDTH - 150, 120]
+
+    def update_hand_animation(self):
+        hand = self.animation.hand
+        if not hand.visible:
+            return
+            
+        hand.frame += 1
+        
+        if hand.state == "reaching":
+            if hand.frame < 10:
+                hand.position[1] += 2
+            else:
+                hand.state = "grabbing"
+                hand.frame = 0
+                
+        elif hand.state == "grabbing":
+            if hand.frame < 8:
+                shake = 2 * math.sin(hand.frame * 2)
+                hand.position[0] += shake
+            else:
+                hand.state = "moving"
+                hand.frame = 0
+                
+        elif hand.state == "moving":
+            if hand.frame < 30:
+                progress = hand.frame / 30
+                start_x, start_y = self.cell_positions[list(self.cell_positions.keys())[0]]
+                target_x, target_y = hand.target
+                
+                current_x = start_x + (target_x - start_x) * progress
+                current_y = start_y + (target_y - start_y) * progress
+                
+                hand.position = [current_x, current_y]
+            else:
+                hand.state = "releasing"
+                hand.frame = 0
+                
+        elif hand.state == "releasing":
+            if hand.frame < 10:
+                hand.position[1] -= 1
+            else:
+                hand.visible = False
+            
+    def update_score_effect(self):
+        score = self.animation.score
+        if score.active:
+            score.frame += 1
+            if score.frame > 20:
+                score.active = False
+
+    def start_capture_animation(self, positions, callback=None):
+        if not positions:
+            if callback:
+                callback(None)
+            return
+            
+        capture = self.animation.capture
+        capture.active = True
+        capture.positions = positions.copy()
+        capture.frame = 0
+        self.animation.callback = callback
+
+    def draw_gradient_background(self):
+        # Drawn line by line once, then blitted: the lines cost more than the rest of a frame
+        if self._background is None:
+            self._background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+            for y in range(WINDOW_HEIGHT):
+                ratio = y / WINDOW_HEIGHT
+                r = int(240 * (1 - ratio) + 220 * ratio)
+                g = int(235 * (1 - ratio) + 210 * ratio)
+                b = int(210 * (1 - ratio) + 180 * ratio)
+                pygame.draw.line(self._background, (r, g, b), (0, y), (WINDOW_WIDTH, y))
+        self.screen.blit(self._background, (0, 0))
+
+    def draw_stone_3d(self, surface, x, y, is_quan=False, is_moving=False, is_capturing=False, size_factor=1.0):
+        if is_quan:
+            radius = int(12 * size_factor)
+            color = QUAN_COLOR
+        else:
+            radius = int(8 * size_factor)
+            color = STONE_COLOR
+        
+        if is_moving:
+            color = ANIMATION_COLOR
+            radius += 2
+        elif is_capturing:
+            color = (255, 100, 100)
+            radius += 1
+        
+        pygame.draw.circle(surface, (0, 0, 0), (x + 2, y + 2), radius)
+        pygame.draw.circle(surface, color, (x, y), radius)
+        
+        highlight_color = (min(255, color[0] + 60), min(255, color[1] + 60), min(255, color[2] + 60))
+        pygame.draw.circle(surface, highlight_color, (x - radius//3, y - radius//3), max(1, radius//3))
+
+    def draw_sowing_hand(self, surface, x, y):
+        if not self.animation.sowing.visible:
+            return
+            
+        hand_points = [
+            (x - 8, y - 12), (x - 4, y - 15), (x, y - 14),
+            (x + 4, y - 15), (x + 8, y - 12), (x + 6, y - 4),
+            (x + 2, y + 2), (x - 2, y + 2), (x - 6, y - 4)
+        ]
+        
+        shadow_points = [(px + 1, py + 1) for px, py in hand_points]
+        pygame.draw.polygon(surface, (100, 100, 100), shadow_points)
+        
+        pygame.draw.polygon(surface, (255, 220, 177), hand_points)
+        pygame.draw.polygon(surface, (200, 180, 140), hand_points, 2)
+        
+        self.stone_sprites.draw_pool(surface, self.animation.sowing.particles, STONE_COLOR, 3)
+
+    def draw_hand_effect(self, surface, x, y, stones=0):
+        if not self.animation.hand.visible:
+            return
+            
+        hand_points = [
+            (x - 15, y - 20), (x - 8, y - 25), (x, y - 23),
+            (x + 8, y - 25), (x + 15, y - 20), (x + 12, y - 8),
+            (x + 8, y), (x - 8, y), (x - 12, y - 8)
+        ]
+        
+        shadow_points = [(px + 2, py + 2) for px, py in hand_points]
+        pygame.draw.polygon(surface, (100, 100, 100), shadow_points)
+        
+        pygame.draw.polygon(surface, (255, 220, 177), hand_points)
+        pygame.draw.polygon(surface, (200, 180, 140), hand_points, 2)
+        
+        finger_positions = [(x-10, y-18), (x-4, y-21), (x+4, y-21), (x+10, y-18)]
+        for i, (fx, fy) in enumerate(finger_positions):
+            finger_length = 8 if self.animation.hand.state == "grabbing" else 6
+            pygame.draw.circle(surface, (240, 200, 160), (fx, fy), 4)
+            pygame.draw.circle(surface, (200, 180, 140), (fx, fy), 4, 1)
+            
+            tip_y = fy - finger_length if self.animation.hand.state == "grabbing" else fy - 4
+            pygame.draw.circle(surface, (220, 180, 140), (fx, tip_y), 2)
+        
+        if stones > 0:
+            rows = min(3, (stones + 4) // 5)
+            for i in range(min(stones, 15)):
+                row = i // 5
+                col = i % 5
+                stone_x = x - 10 + col * 4
+                stone_y = y - 3 + row * 4
+                pygame.draw.circle(surface, STONE_COLOR, (stone_x, stone_y), 3)
+                pygame.draw.circle(surface, (150, 150, 150), (stone_x, stone_y), 3, 1)
+            
+            if stones > 15:
+                count_text = pygame.font.Font(None, 14).render(f"+{stones-15}", True, TEXT_COLOR)
+                surface.blit(count_text, (x - 8, y + 8))
+
+    def draw_flying_stones(self, surface):
+        if self.animation.hand.visible and self.animation.hand.stones > 0:
+            x, y = self.animation.hand.position
+            
+            stone_count = min(self.animation.hand.stones, 8)
+            radius = 20 + 5 * math.sin(self.animation.hand.frame * 0.3)
+            sprites = []
+            for i in range(stone_count):
+                angle = i * 2 * math.pi / stone_count
+                stone_x = x + radius * math.cos(angle)
+                stone_y = y + radius * math.sin(angle)
+                
+                alpha = 120 + 60 * math.sin(self.animation.hand.frame * 0.2 + i)
+                sprite = self.stone_sprites.get(STONE_COLOR, 3, int(alpha), glint=True)
+                sprites.append((sprite, (stone_x - 4, stone_y - 4)))
+            surface.blits(sprites, doreturn=False)
+
+    def draw_menu(self):
+        self.draw_gradient_background()
+        
+        title_text = "O AN QUAN"
+        title_surface = self.title_font.render(title_text, True, TEXT_COLOR)
+        title_rect = title_surface.get_rect(center=(WINDOW_WIDTH//2, 120))
+        self.screen.blit(title_surface, title_rect)
+        
+        subtitle_text = "Vietnamese Traditional Game"
+        subtitle_surface = self.small_font.render(subtitle_text, True, TEXT_COLOR)
+        subtitle_rect = subtitle_surface.get_rect(center=(WINDOW_WIDTH//2, 170))
+        self.screen.blit(subtitle_surface, subtitle_rect)
+        
+        button_width, button_height = 300, 70
+        hvh_rect = pygame.Rect(WINDOW_WIDTH//2 - button_width//2, 250, button_width, button_height)
+        hva_rect = pygame.Rect(WINDOW_WIDTH//2 - button_width//2, 350, button_width, button_height)
+        
+        self.draw_button(hvh_rect, "Human vs Human", PLAYER1_COLOR)
+        self.draw_button(hva_rect, "Human vs AI", PLAYER2_COLOR)
+        
+        instruction_lines = [
+            "• Click cell to select move",
+            "• LEFT/RIGHT arrows for direction", 
+            "• Player 2 directions are reversed",
+            "• Can capture quan (big cells) when empty-occupied pattern",
+            f"• Auto redistribute when out of stones (costs {self.config.pits} points)",
+            "• Game ends when both quan are captured",
+            "• R: Restart, M: Menu, S: Save game, A: Analysis, H: Hint"
+        ]
+        
+        for i, line in enumerate(instruction_lines):
+            text_surface = self.small_font.render(line, True, TEXT_COLOR)
+            text_rect = text_surface.get_rect(center=(WINDOW_WIDTH//2, 480 + i * 25))
+            self.screen.blit(text_surface, text_rect)
+        
+        return hvh_rect, hva_rect
+
+    def draw_button(self, rect, text, color):
+        shadow_rect = rect.copy()
+        shadow_rect.x += 3
+        shadow_rect.y += 3
+        pygame.draw.rect(self.screen, (50, 50, 50), shadow_rect)
+        
+        pygame.draw.rect(self.screen, color, rect)
+        pygame.draw.rect(self.screen, TEXT_COLOR, rect, 3)
+        
+        text_surface = self.font.render(text, True, (255, 255, 255))
+        text_rect = text_surface.get_rect(center=rect.center)
+        self.screen.blit(text_surface, text_rect)
+
+    def draw_board(self):
+        self.draw_gradient_background()
+        
+        title_surface = self.font.render("O AN QUAN", True, TEXT_COLOR)
+        title_rect = title_surface.get_rect(center=(WINDOW_WIDTH//2, 40))
+        self.screen.blit(title_surface, title_rect)
+        
+        board_bg = pygame.Rect(40, 200, WINDOW_WIDTH - 80, 350)
+        pygame.draw.rect(self.screen, (160, 130, 90), board_bg)
+        pygame.draw.rect(self.screen, TEXT_COLOR, board_bg, 4)
+        
+        left_quan, right_quan = self.config.quans
+        self.draw_quan_cell(left_quan, 70, 300)
+        self.draw_quan_cell(right_quan, WINDOW_WIDTH - 190, 300)
+        
+        valid_moves = self.game_state.get_valid_moves()
+        cell_colors = self.get_cell_colors(valid_moves)
+        
+        cell_rects = self.get_cell_rects()
+        for cell_index, rect in cell_rects.items():
+            self.draw_cell(rect, cell_colors[cell_index], cell_index)
+        
+        self.draw_move_preview()
+        self.draw_game_info()
+        if self.show_analysis:
+            self.draw_analysis_panel()
+        if self.show_hint:
+            self.draw_hint()
+        
+        if self.animation.sowing.visible:
+            x, y = self.animation.sowing.position
+            self.draw_sowing_hand(self.screen, int(x), int(y))
+        
+        self.draw_flying_stones(self.screen)
+        if self.animation.hand.visible:
+            x, y = self.animation.hand.position
+            self.draw_hand_effect(self.screen, int(x), int(y), self.animation.hand.stones)
+        
+        if self.waiting_for_direction:
+            if self.game_state.current_player == Player.PLAYER1:
+                instruction = "Press LEFT (counter-clockwise) or RIGHT (clockwise) arrow"
+            else:
+                instruction = "Press LEFT (clockwise) or RIGHT (counter-clockwise) arrow"
+            
+            text_surface = self.small_font.render(instruction, True, TEXT_COLOR)
+            text_rect = text_surface.get_rect(center=(WINDOW_WIDTH//2, 580))
+            
+            bg_rect = text_rect.copy()
+            bg_rect.inflate(20, 10)
+            pygame.draw.rect(self.screen, (255, 255, 255), bg_rect)
+            pygame.draw.rect(self.screen, TEXT_COLOR, bg_rect, 2)
+            
+            self.screen.blit(text_surface, text_rect)
+        
+        if not valid_moves and not self.game_state.game_over:
+            player_name = "Player 1" if self.game_state.current_player == Player.PLAYER1 else "Player 2"
+            score = self.game_state.player1_score if self.game_state.current_player == Player.PLAYER1 else self.game_state.player2_score
+            
+            if score >= self.config.pits:
+                msg = f"{player_name} out of stones! Auto redistributing..."
+                text_surface = self.small_font.render(msg, True, (255, 0, 0))
+                text_rect = text_surface.get_rect(center=(WINDOW_WIDTH//2, 600))
+                
+                bg_rect = text_rect.copy()
+                bg_rect.inflate(20, 10)
+                pygame.draw.rect(self.screen, (255, 255, 255), bg_rect)
+                pygame.draw.rect(self.screen, (255, 0, 0), bg_rect, 2)
+                
+                self.screen.blit(text_surface, text_rect)
+        
+        return cell_rects
+
+    def get_cell_colors(self, valid_moves):
+        # Pit colors only change with the game state or the selection
+        key = (self.game_state.version, self.selected_cell)
+        if self._cell_colors_key == key:
+            query_stats.hits["cell_colors"] += 1
+            return self._cell_colors
+        query_stats.misses["cell_colors"] += 1
+        
+        self._cell_colors = {i: self.get_cell_color(i, valid_moves)
+                             for i in (*self.config.player2_pits, *self.config.player1_pits)}
+        self._cell_colors_key = key
+        return self._cell_colors
+
+    def get_cell_color(self, cell_index, valid_moves):
+        if self.selected_cell == cell_index:
+            return HIGHLIGHT_COLOR
+        elif cell_index in valid_moves:
+            if ((self.game_state.current_player == Player.PLAYER1 and cell_index in self.config.player1_pits) or 
+                (self.game_state.current_player == Player.PLAYER2 and cell_index in self.config.player2_pits)):
+                return VALID_MOVE_COLOR
+        
+        return BOARD_COLOR
+
+    def draw_quan_cell(self, index, x, y):
+        rect = pygame.Rect(x, y, 120, 120)
+        color = HIGHLIGHT_COLOR if self.selected_cell == index else QUAN_COLOR
+        
+        shadow_rect = rect.copy()
+        shadow_rect.x += 3
+        shadow_rect.y += 3
+        pygame.draw.rect(self.screen, (50, 50, 50), shadow_rect)
+        
+        pygame.draw.rect(self.screen, color, rect)
+        pygame.draw.rect(self.screen, TEXT_COLOR, rect, 4)
+        
+        stones = self.game_state.board[index]
+        if stones > 0:
+            self.draw_stones_in_quan(rect, stones, index)
+
+    def draw_stones_in_quan(self, rect, stones, cell_index):
+        is_being_captured = (self.animation.capture.active and 
+                           cell_index in self.animation.capture.positions)
+        
+        if stones <= 12:
+            for i in range(stones):
+                angle = i * 2 * math.pi / stones if stones > 1 else 0
+                stone_x = rect.centerx + 30 * math.cos(angle)
+                stone_y = rect.centery + 30 * math.sin(angle)
+                self.draw_stone_3d(self.screen, int(stone_x), int(stone_y), 
+                                 is_quan=True, is_capturing=is_being_captured)
+        elif stones <= 24:
+            outer_count = min(12, stones)
+            inner_count = stones - outer_count
+            
+            for i in range(outer_count):
+                angle = i * 2 * math.pi / outer_count
+                stone_x = rect.centerx + 35 * math.cos(angle)
+                stone_y = rect.centery + 35 * math.sin(angle)
+                self.draw_stone_3d(self.screen, int(stone_x), int(stone_y), 
+                                 is_quan=True, is_capturing=is_being_captured)
+            
+            for i in range(inner_count):
+                angle = i * 2 * math.pi / inner_count if inner_count > 1 else 0
+                stone_x = rect.centerx + 15 * math.cos(angle)
+                stone_y = rect.centery + 15 * math.sin(angle)
+                self.draw_stone_3d(self.screen, int(stone_x), int(stone_y), 
+                                 is_quan=True, is_capturing=is_being_captured, size_factor=0.7)
+        else:
+            for i in range(8):
+                angle = i * 2 * math.pi / 8
+                stone_x = rect.centerx + 30 * math.cos(angle)
+                stone_y = rect.centery + 30 * math.sin(angle)
+                self.draw_stone_3d(self.screen, int(stone_x), int(stone_y), 
+                                 is_quan=True, is_capturing=is_being_captured)
+            
+            count_text = self.font.render(str(stones), True, TEXT_COLOR)
+            count_rect = count_text.get_rect(center=(rect.centerx, rect.y - 20))
+            
+            bg_rect = count_rect.copy()
+            bg_rect.inflate(10, 5)
+            pygame.draw.rect(self.screen, (255, 255, 255), bg_rect)
+            pygame.draw.rect(self.screen, TEXT_COLOR, bg_rect, 2)
+            
+            self.screen.blit(count_text, count_rect)
+
+    def draw_cell(self, rect, color, cell_index):
+        shadow_rect = rect.copy()
+        shadow_rect.x += 2
+        shadow_rect.y += 2
+        pygame.draw.rect(self.screen, (80, 80, 80), shadow_rect)
+        
+        pygame.draw.rect(self.screen, color, rect)
+        pygame.draw.rect(self.screen, TEXT_COLOR, rect, 3)
+        
+        stones = self.game_state.board[cell_index]
+        if stones > 0:
+            self.draw_stones_in_cell(rect, stones, cell_index)
+
+    def draw_stones_in_cell(self, rect, stones, cell_index):
+        is_being_captured = (self.animation.capture.active and 
+                           cell_index in self.animation.capture.positions)
+        
+        is_moving = (self.animation.move.active and 
+                   self.animation.move.position == cell_index and 
+                   self.animation.move.stones > 0)
+        
+        if rect.width < MIN_RING_CELL_WIDTH:
+            self.draw_stone_3d(self.screen, rect.centerx, rect.centery - 12,
+                               is_moving=is_moving, is_capturing=is_being_captured)
+            count_text = self.small_font.render(str(stones), True, TEXT_COLOR)
+            self.screen.blit(count_text, count_text.get_rect(center=(rect.centerx, rect.centery + 18)))
+        elif stones <= 8:
+            for i in range(stones):
+                angle = i * 2 * math.pi / stones if stones > 1 else 0
+                stone_x = rect.centerx + 20 * math.cos(angle)
+                stone_y = rect.centery + 20 * math.sin(angle)
+                self.draw_stone_3d(self.screen, int(stone_x), int(stone_y), 
+                                 is_moving=is_moving, is_capturing=is_being_captured)
+        elif stones <= 16:
+            outer_count = min(8, stones)
+            inner_count = stones - outer_count
+            
+            for i in range(outer_count):
+                angle = i * 2 * math.pi / outer_count
+                stone_x = rect.centerx + 25 * math.cos(angle)
+                stone_y = rect.centery + 25 * math.sin(angle)
+                self.draw_stone_3d(self.screen, int(stone_x), int(stone_y), 
+                                 is_moving=is_moving, is_capturing=is_being_captured)
+            
+            for i in range(inner_count):
+                angle = i * 2 * math.pi / inner_count if inner_count > 1 else 0
+                stone_x = rect.centerx + 10 * math.cos(angle)
+                stone_y = rect.centery + 10 * math.sin(angle)
+                self.draw_stone_3d(self.screen, int(stone_x), int(stone_y), 
+                                 is_moving=is_moving, is_capturing=is_being_captured, size_factor=0.7)
+        elif stones <= 24:
+            circles = [
+                {'radius': 28, 'count': 8, 'size': 1.0},
+                {'radius': 15, 'count': 8, 'size': 0.8},
+                {'radius': 5, 'count': stones - 16, 'size': 0.6}
+            ]
+            
+            stone_drawn = 0
+            for circle in circles:
+                count = min(circle['count'], stones - stone_drawn)
+                if count <= 0:
+                    break
+                    
+                for i in range(count):
+                    angle = i * 2 * math.pi / count if count > 1 else 0
+                    stone_x = rect.centerx + circle['radius'] * math.cos(angle)
+                    stone_y = rect.centery + circle['radius'] * math.sin(angle)
+                    self.draw_stone_3d(self.screen, int(stone_x), int(stone_y), 
+                                     is_moving=is_moving, is_capturing=is_being_captured, 
+                                     size_factor=circle['size'])
+                stone_drawn += count
+        else:
+            max_display = 20
+            cols = 5
+            rows = 4
+            
+            start_x = rect.x + 15
+            start_y = rect.y + 15
+            spacing = 18
+            
+            for i in range(min(stones, max_display)):
+                row = i // cols
+                col = i % cols
+                stone_x = start_x + col * spacing
+                stone_y = start_y + row * spacing
+                self.draw_stone_3d(self.screen, stone_x, stone_y, 
+                                 is_moving=is_moving, is_capturing=is_being_captured, 
+                                 size_factor=0.6)
+            
+            if stones > max_display:
+                count_text = self.small_font.render(f"{stones}", True, TEXT_COLOR)
+                count_rect = count_text.get_rect(center=(rect.centerx, rect.bottom - 8))
+                
+                bg_rect = count_rect.copy()
+                bg_rect.inflate(8, 4)
+                pygame.draw.rect(self.screen, (255, 255, 255), bg_rect)
+                pygame.draw.rect(self.screen, TEXT_COLOR, bg_rect, 1)
+                
+                self.screen.blit(count_text, count_rect)
+
+    def draw_game_info(self):
+        p1_rect = pygame.Rect(50, 80, 180, 80)
+        p2_rect = pygame.Rect(WINDOW_WIDTH - 230, 80, 180, 80)
+        
+        self.draw_score_panel(p1_rect, "Player 1", self.game_state.player1_score, PLAYER1_COLOR)
+        
+        p2_name = "Player 2" if self.game_mode == GameMode.HUMAN_VS_HUMAN else "Computer"
+        self.draw_score_panel(p2_rect, p2_name, self.game_state.player2_score, PLAYER2_COLOR)
+        
+        if not self.game_state.game_over and not self.animation.move.active:
+            current_name = "Player 1" if self.game_state.current_player == Player.PLAYER1 else p2_name
+            color = PLAYER1_COLOR if self.game_state.current_player == Player.PLAYER1 else PLAYER2_COLOR
+            
+            turn_rect = pygame.Rect(WINDOW_WIDTH//2 - 120, 100, 240, 35)
+            pygame.draw.rect(self.screen, color, turn_rect)
+            pygame.draw.rect(self.screen, TEXT_COLOR, turn_rect, 2)
+            
+            turn_text = self.small_font.render(f"Turn: {current_name}", True, (255, 255, 255))
+            turn_text_rect = turn_text.get_rect(center=turn_rect.center)
+            self.screen.blit(turn_text, turn_text_rect)
+
+    def update_analysis(self):
+        # Analyse the position on the board once a move has finished changing it
+        if (not self.show_analysis or self.in_menu or
+                self.animation.move.active or self.animation.capture.active):
+            self.analyzer.stop()
+        else:
+            self.analyzer.analyse(self.game_state)
+
+    def update_hint(self):
+        if (self.show_hint and not self.in_menu and not self.game_state.game_over and
+                not self.animation.move.active and not self.animation.capture.active):
+            self.hints.request(self.game_state)
+
+    def update_previews(self):
+        # Outcomes of every move, once per settled position instead of on every frame
+        if self.animation.move.active or self.animation.capture.active:
+            self.move_previews = {}
+            self._previews_version = None
+        elif self._previews_version != self.game_state.version:
+            self.move_previews = self.previews.outcomes(self.game_state)
+            self._previews_version = self.game_state.version
+
+    def update_hover(self, pos):
+        # Returns whether the pit under the mouse changed
+        hover_cell = None
+        for cell_index, rect in self.get_cell_rects().items():
+            if rect.collidepoint(pos):
+                hover_cell = cell_index
+        changed = hover_cell != self.hover_cell
+        self.hover_cell = hover_cell
+        return changed
+
+    def preview_rect(self, cell_index):
+        left_quan, right_quan = self.config.quans
+        if cell_index == left_quan:
+            return pygame.Rect(70, 300, 120, 120)
+        if cell_index == right_quan:
+            return pygame.Rect(WINDOW_WIDTH - 190, 300, 120, 120)
+        return self.get_cell_rects()[cell_index]
+
+    def draw_move_preview(self):
+        # The selected pit, or else the one under the mouse
+        pit = self.selected_cell if self.waiting_for_direction else self.hover_cell
+        if (self.replay is not None or self.in_menu or pit is None or
+                (self.game_mode == GameMode.HUMAN_VS_AI and self.game_state.current_player == Player.PLAYER2)):
+            return
+        if self.game_state.current_player == Player.PLAYER1:
+            keys = (("LEFT", Direction.COUNTER_CLOCKWISE, PREVIEW_LEFT_COLOR),
+                    ("RIGHT", Direction.CLOCKWISE, PREVIEW_RIGHT_COLOR))
+        else:
+            keys = (("LEFT", Direction.CLOCKWISE, PREVIEW_LEFT_COLOR),
+                    ("RIGHT", Direction.COUNTER_CLOCKWISE, PREVIEW_RIGHT_COLOR))
+        summary = []
+        for inset, (key_name, direction, color) in enumerate(keys):
+            outcome = self.move_previews.get((pit, direction))
+            if outcome is None:
+                return
+            for cell_index in outcome.captured:
+                pygame.draw.rect(self.screen, color, self.preview_rect(cell_index).inflate(-6 * inset, -6 * inset), 3)
+            if outcome.captured:
+                summary.append(f"{key_name}: {outcome.gain:+d}")
+            else:
+                summary.append(f"{key_name}: no capture")
+
+        text_surface = self.small_font.render("   ".join(summary), True, TEXT_COLOR)
+        text_rect = text_surface.get_rect(center=(WINDOW_WIDTH//2, 612))
+        self.screen.blit(text_surface, text_rect)
+
+    def draw_analysis_panel(self):
+        if self.animation.move.active or self.animation.capture.active or self.game_state.game_over:
+            return
+        panel_rect = pygame.Rect(WINDOW_WIDTH//2 - 250, 140, 500, 58)
+        pygame.draw.rect(self.screen, (255, 255, 255), panel_rect)
+        pygame.draw.rect(self.screen, TEXT_COLOR, panel_rect, 2)
+
+        result = self.analyzer.result(self.game_state)
+        to_move = "Player 1" if self.game_state.current_player == Player.PLAYER1 else "Player 2"
+        if result is None:
+            rows = [f"Analysis for {to_move}: searching..."]
+        else:
+            depth, lines = result
+            rows = [f"Analysis for {to_move}, depth {depth}"]
+            for rank, line in enumerate(lines, 1):
+                rows.append(f"{rank}. {line.score:+7.1f}   {format_moves(line.pv)}")
+        for i, row in enumerate(rows):
+            text_surface = self.tiny_font.render(row, True, TEXT_COLOR)
+            self.screen.blit(text_surface, (panel_rect.x + 10, panel_rect.y + 5 + 13 * i))
+
+    def draw_hint(self):
+        if self.animation.move.active or self.animation.capture.active or self.game_state.game_over:
+            return
+        result = self.hints.result(self.game_state)
+        if result is None:
+            text = "Solver: solving..."
+        elif result.outcome == Outcome.UNKNOWN:
+            text = f"Solver: unknown after {result.nodes} nodes"
+        else:
+            text = f"Solver: {result.outcome.name}"
+            if result.move is not None:
+                text += f", play {format_moves([result.move])}"
+            text += f" (proof {result.proof_size}, {result.seconds:.1f} s)"
+        text_surface = self.tiny_font.render(text, True, TEXT_COLOR)
+        self.screen.blit(text_surface, text_surface.get_rect(center=(WINDOW_WIDTH//2, 665)))
+
+    def draw_score_panel(self, rect, name, score, color):
+        glow = (self.animation.score.active and 
+                ((self.animation.score.player == Player.PLAYER1 and "Player 1" in name) or
+                 (self.animation.score.player == Player.PLAYER2 and ("Player 2" in name or "Computer" in name))))
+        
+        if glow:
+            glow_rect = rect.copy()
+            glow_rect.inflate(10, 10)
+            glow_color = (min(255, color[0] + 50), min(255, color[1] + 50), min(255, color[2] + 50))
+            pygame.draw.rect(self.screen, glow_color, glow_rect)
+        
+        pygame.draw.rect(self.screen, color, rect)
+        pygame.draw.rect(self.screen, TEXT_COLOR, rect, 3)
+        
+        name_surface = self.small_font.render(name, True, (255, 255, 255))
+        score_surface = self.font.render(str(score), True, (255, 255, 255))
+        
+        if glow:
+            pulse = 1.0 + 0.3 * math.sin(self.animation.score.frame * 0.5)
+            font_size = int(28 * pulse)
+            pulse_font = pygame.font.Font(None, font_size)
+            score_surface = pulse_font.render(str(score), True, (255, 255, 100))
+        
+        name_rect = name_surface.get_rect(center=(rect.centerx, rect.y + 20))
+        score_rect = score_surface.get_rect(center=(rect.centerx, rect.y + 50))
+        
+        self.screen.blit(name_surface, name_rect)
+        self.screen.blit(score_surface, score_rect)
+
+    def handle_click(self, pos, cell_rects):
+        if self.animation.move.active or self.animation.capture.active:
+            return
+        
+        if self.check_auto_redistribute():
+            return
+        
+        valid_moves = self.game_state.get_valid_moves()
+        for cell_index, rect in cell_rects.items():
+            if rect.collidepoint(pos):
+                if cell_index in valid_moves:
+                    if self.game_mode == GameMode.HUMAN_VS_AI and self.game_state.current_player == Player.PLAYER2:
+                        return
+                    
+                    self.selected_cell = cell_index
+                    self.waiting_for_direction = True
+
+    def handle_direction_key(self, direction):
+        if not self.waiting_for_direction or self.selected_cell is None:
+            return
+        
+        self.waiting_for_direction = False
+        self.move_record.append((self.selected_cell, direction))
+        
+        stones = self.game_state.board[self.selected_cell]
+        if stones > 0:
+            if self.game_mode == GameMode.HUMAN_VS_AI:
+                predicted = self.game_state.copy()
+                predicted.make_move_instant(self.selected_cell, direction)
+                self.ponderer.focus(predicted)
+            self.start_animation(self.selected_cell, direction, self.finish_move)
+        else:
+            # Out of stones: refill the row, then the same player sows, as in make_move_instant
+            self.game_state._redistribute_stones()
+        
+        self.selected_cell = None
+
+    def finish_move(self, last_position):
+        # Get positions to capture
+        if last_position is None:
+            capture_positions = []
+        else:
+            capture_positions = self.game_state._capture_stones_correct(last_position, self.animation.move.direction)
+        
+        # Start capture animation if there are positions to capture
+        if capture_positions:
+            self.start_capture_animation(capture_positions, self.finish_turn)
+        else:
+            self.finish_turn(None)
+
+    def finish_turn(self, _):
+        self.game_state._check_game_over()
+        
+        if not self.game_state.game_over:
+            self.game_state.current_player = Player.PLAYER2 if self.game_state.current_player == Player.PLAYER1 else Player.PLAYER1
+            self.game_state.touch()
+            self.game_state._check_game_over()
+            
+            if self.check_auto_redistribute():
+                pass
+            
+            if (self.game_mode == GameMode.HUMAN_VS_AI and 
+                self.game_state.current_player == Player.PLAYER2 and 
+                not self.game_state.game_over):
+                pygame.time.set_timer(pygame.USEREVENT + 1, 2000)
+            elif self.game_mode == GameMode.HUMAN_VS_AI and not self.game_state.game_over:
+                self.ponderer.start_turn(self.game_state)
+
+        self.game_state.move_count += 1
+
+    def ai_move(self):
+        if (self.game_state.current_player == Player.PLAYER2 and 
+            not self.game_state.game_over and 
+            not self.animation.move.active and
+            not self.animation.capture.active):
+            
+            if self.check_auto_redistribute():
+                return
+                
+            if not self.ponderer.ready(self.game_state):
+                # Keep drawing frames while the pondered search of this position finishes
+                pygame.time.set_timer(pygame.USEREVENT + 1, PONDER_POLL_MS)
+                return
+            pondered = self.ponderer.take(self.game_state)
+            if pondered is not None:
+                best_move, best_direction = pondered
+            else:
+                best_move, best_direction = self.ai_engine.get_best_move(self.game_state)
+            if best_move is not None:
+                self.move_record.append((best_move, best_direction))
+                stones = self.game_state.board[best_move]
+                if stones > 0:
+                    self.start_animation(best_move, best_direction, self.finish_move)
+                else:
+                    # The refilled row is played by the AI on its next timer event
+                    self.game_state._redistribute_stones()
+                    pygame.time.set_timer(pygame.USEREVENT + 1, 500)
+
+    def draw_game_over(self):
+        overlay = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT))
+        overlay.set_alpha(150)
+        overlay.fill((0, 0, 0))
+        self.screen.blit(overlay, (0, 0))
+        
+        result_rect = pygame.Rect(WINDOW_WIDTH//2 - 250, WINDOW_HEIGHT//2 - 120, 500, 240)
+        pygame.draw.rect(self.screen, (240, 240, 240), result_rect)
+        pygame.draw.rect(self.screen, TEXT_COLOR, result_rect, 4)
+        
+        if self.game_state.winner == Player.PLAYER1:
+            winner_text = "Player 1 Wins!"
+            color = PLAYER1_COLOR
+        elif self.game_state.winner == Player.PLAYER2:
+            winner_text = "Player 2 Wins!" if self.game_mode == GameMode.HUMAN_VS_HUMAN else "Computer Wins!"
+            color = PLAYER2_COLOR
+        else:
+            winner_text = "Draw!"
+            color = TEXT_COLOR
+        
+        winner_surface = self.font.render(winner_text, True, color)
+        winner_rect = winner_surface.get_rect(center=(result_rect.centerx, result_rect.centery - 40))
+        self.screen.blit(winner_surface, winner_rect)
+        
+        score_text = f"Score: {self.game_state.player1_score} - {self.game_state.player2_score}"
+        score_surface = self.font.render(score_text, True, TEXT_COLOR)
+        score_rect = score_surface.get_rect(center=(result_rect.centerx, result_rect.centery))
+        self.screen.blit(score_surface, score_rect)
+        
+        restart_text = "Press R to restart"
+        menu_text = "Press M for main menu"
+        
+        restart_surface = self.small_font.render(restart_text, True, TEXT_COLOR)
+        menu_surface = self.small_font.render(menu_text, True, TEXT_COLOR)
+        
+        restart_rect = restart_surface.get_rect(center=(result_rect.centerx, result_rect.centery + 40))
+        menu_rect = menu_surface.get_rect(center=(result_rect.centerx, result_rect.centery + 65))
+        
+        self.screen.blit(restart_surface, restart_rect)
+        self.screen.blit(menu_surface, menu_rect)
+
+    def get_cell_rects(self):
+        # 120 x 90 pits on the standard board, narrower when there are more of them
+        pits = self.config.pits
+        cell_width, cell_height = (PIT_ROW_WIDTH + PIT_GAP) // pits - PIT_GAP, 90
+        start_x, start_y = PIT_ROW_X, 250
+        cell_rects = {}
+        
+        for i in range(pits):
+            x = start_x + i * (cell_width + PIT_GAP)
+            y = start_y
+            cell_index = pits - i
+            rect = pygame.Rect(x, y, cell_width, cell_height)
+            cell_rects[cell_index] = rect
+        
+        for i in range(pits):
+            x = start_x + i * (cell_width + PIT_GAP)
+            y = start_y + cell_height + 70
+            cell_index = pits + 2 + i
+            rect = pygame.Rect(x, y, cell_width, cell_height)
+            cell_rects[cell_index] = rect
+        
+        return cell_rects
+
+    def handle_replay_key(self, key):
+        steps = {pygame.K_LEFT: -1, pygame.K_RIGHT: 1, pygame.K_DOWN: -10, pygame.K_UP: 10,
+                 pygame.K_PAGEDOWN: -self.replay.interval, pygame.K_PAGEUP: self.replay.interval}
+        if key in steps:
+            self.game_state = self.replay.step(steps[key])
+        elif key == pygame.K_HOME:
+            self.game_state = self.replay.seek(0)
+        elif key == pygame.K_END:
+            self.game_state = self.replay.seek(len(self.replay))
+        elif key in (pygame.K_m, pygame.K_ESCAPE):
+            # Leave the replay for a fresh game
+            self.replay = None
+            self.in_menu = True
+            self.game_state = GameState(self.config)
+        else:
+            return
+        last_move = self.replay.last_move() if self.replay is not None else None
+        self.selected_cell = last_move[0] if last_move else None
+
+    def draw_replay_bar(self):
+        last_move = self.replay.last_move()
+        played = f", last {last_move[0]} {last_move[1].name.lower().replace('_', '-')}" if last_move else ""
+        text = (f"Replay: ply {self.replay.ply}/{len(self.replay)}{played}   "
+                "LEFT/RIGHT step, UP/DOWN 10, HOME/END, M menu")
+        text_surface = self.small_font.render(text, True, TEXT_COLOR)
+        text_rect = text_surface.get_rect(center=(WINDOW_WIDTH//2, 640))
+        bg_rect = text_rect.inflate(20, 10)
+        pygame.draw.rect(self.screen, (255, 255, 255), bg_rect)
+        pygame.draw.rect(self.screen, TEXT_COLOR, bg_rect, 2)
+        self.screen.blit(text_surface, text_rect)
+
+    def has_active_effects(self):
+        animation = self.animation
+        return (animation.move.active or animation.capture.active or animation.hand.visible or
+                animation.sowing.visible or animation.score.active)
+
+    def wait_events(self):
+        # Sleep until input or a timer event (such as the AI's USEREVENT + 1) arrives
+        event = pygame.event.wait(IDLE_WAIT_MS)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event] + pygame.event.get()
+
+    def run(self):
+        running = True
+        needs_redraw = True
+        
+        while running:
+            animating = self.has_active_effects()
+            if self.idle_mode and not animating and not needs_redraw:
+                events = self.wait_events()
+            else:
+                events = pygame.event.get()
+            
+            for event in events:
+                if event.type != pygame.MOUSEMOTION:
+                    needs_redraw = True
+                
+                if event.type == pygame.MOUSEMOTION:
+                    # Only moving onto another pit changes the preview
+                    if self.update_hover(event.pos):
+                        needs_redraw = True
+                
+                elif event.type == pygame.QUIT:
+                    running = False
+                
+                elif event.type == pygame.MOUSEBUTTONDOWN:
+                    if self.in_menu:
+                        hvh_rect, hva_rect = self.draw_menu()
+                        if hvh_rect.collidepoint(event.pos):
+                            self.game_mode = GameMode.HUMAN_VS_HUMAN
+                            self.in_menu = False
+                        elif hva_rect.collidepoint(event.pos):
+                            self.game_mode = GameMode.HUMAN_VS_AI
+                            self.in_menu = False
+                            self.ponderer.start_turn(self.game_state)
+                    elif self.replay is None:
+                        if not self.game_state.game_over:
+                            temp_rects = self.get_cell_rects()
+                            self.handle_click(event.pos, temp_rects)
+                
+                elif event.type == pygame.USEREVENT + 1:
+                    pygame.time.set_timer(pygame.USEREVENT + 1, 0)
+                    self.ai_move()
+                
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_a and not self.in_menu:
+                    self.show_analysis = not self.show_analysis
+                
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_h and not self.in_menu:
+                    self.show_hint = not self.show_hint
+                
+                elif event.type == pygame.KEYDOWN and self.replay is not None:
+                    self.handle_replay_key(event.key)
+                
+                elif event.type == pygame.KEYDOWN:
+                    if event.key == pygame.K_s and not self.in_menu:
+                        path = GameRecord(self.move_record, start=GameState(self.config),
+                                          info={"mode": self.game_mode.name}).save()
+                        print(f"Saved game record to {path}")
+                    elif event.key == pygame.K_r:
+                        self.ponderer.stop()
+                        self.game_state = GameState(self.config)
+                        self.animation = AnimationState()
+                        self.selected_cell = None
+                        self.waiting_for_direction = False
+                        self.move_record = []
+                        if self.game_mode == GameMode.HUMAN_VS_AI:
+                            self.ponderer.start_turn(self.game_state)
+                    elif event.key == pygame.K_m:
+                        self.ponderer.stop()
+                        self.in_menu = True
+                        self.game_state = GameState(self.config)
+                        self.animation = AnimationState()
+                        self.selected_cell = None
+                        self.waiting_for_direction = False
+                        self.move_record = []
+                    elif event.key == pygame.K_LEFT:
+                        if self.game_state.current_player == Player.PLAYER1:
+                            self.handle_direction_key(Direction.COUNTER_CLOCKWISE)
+                        else:
+                            self.handle_direction_key(Direction.CLOCKWISE)
+                    elif event.key == pygame.K_RIGHT:
+                        if self.game_state.current_player == Player.PLAYER1:
+                            self.handle_direction_key(Direction.CLOCKWISE)
+                        else:
+                            self.handle_direction_key(Direction.COUNTER_CLOCKWISE)
+            
+            if (self.replay is None and not self.animation.move.active and not self.animation.capture.active and
+                    not self.game_state.game_over):
+                if self.check_auto_redistribute():
+                    needs_redraw = True
+            
+            self.update_animation()
+            self.update_analysis()
+            self.update_hint()
+            self.update_previews()
+            
+            # Also draw the frame on which the last effect finished
+            if needs_redraw or animating or not self.idle_mode:
+                if self.in_menu:
+                    self.draw_menu()
+                else:
+                    self.draw_board()
+                    if self.game_state.game_over:
+                        self.draw_game_over()
+                    if self.replay is not None:
+                        self.draw_replay_bar()
+                
+                pygame.display.flip()
+                needs_redraw = False
+            self.clock.tick(FPS)
+        
+        self.ponderer.stop()
+        self.analyzer.close()
+        self.hints.close()
+        if self.ai_engine.position_db is not None:
+            self.ai_engine.position_db.close()
+        print(f"Memoized queries - {query_stats.summary()}")
+        pygame.quit()
+        sys.exit()
@@ -0,0 +1,230 @@
+"""Search statistics and sampled search-tree traces.
+
+    python -m oanquan.instrument --depth 6 --trace trace.json
+
+InstrumentedEngine is an AIEngine that counts what every node of its
+search does. The counting lives in overrides of the engine's search
+methods, so a plain AIEngine runs exactly as before and pays nothing.
+
+A trace is a JSON file:
+
+    {"format": "oanquan-trace", "version": 1,
+     "position": "<position_key as hex>",
+     "stats": {...},
+     "nodes": [{"id": 0, "parent": null, "ply": 0, "depth": 4, "move": null,
+                "alpha": null, "beta": null, "score": -75.6, "kind": "all"}, ...]}
+
+Each iteration and aspiration re-search starts a new root. The first
+trace_full_plies plies are kept in full. Each node on the ply after them
+is kept with probability trace_rate, and a kept node keeps its whole
+subtree, so every kept node's parent is kept too. Infinite window
+bounds are written as null. A node's kind is "leaf", "tt" for a
+transposition table cutoff, "cut" when a move failed high, or "all".
+"""
+import argparse
+import json
+import random
+from typing import List, Optional
+
+from .engine import AIEngine, effective_branching_factor, format_moves
+from .rules import GameState, position_key
+from .replay import GameRecord, Replay
+
+TRACE_FORMAT = "oanquan-trace"
+TRACE_VERSION = 1
+
+
+class SearchStats:
+    """Counters of one get_best_move call."""
+
+    def __init__(self):
+        self.nodes_by_ply: List[int] = []
+        self.leaves = 0
+        self.tt_cutoffs = 0
+        self.cutoffs = 0
+        # cutoff_index[i] counts the cutoffs made by the i-th move searched at a node
+        self.cutoff_index: List[int] = []
+        self.iterations: List[dict] = []
+
+    @property
+    def nodes(self) -> int:
+        return sum(self.nodes_by_ply)
+
+    def ebf(self) -> Optional[float]:
+        return effective_branching_factor(self.iterations)
+
+    def first_move_cutoff_rate(self) -> Optional[float]:
+        return self.cutoff_index[0] / self.cutoffs if self.cutoffs else None
+
+    def to_json(self) -> dict:
+        return {
+            "nodes": self.nodes,
+            "nodes_by_ply": self.nodes_by_ply,
+            "leaves": self.leaves,
+            "tt_cutoffs": self.tt_cutoffs,
+            "cutoffs": self.cutoffs,
+            "cutoff_index": self.cutoff_index,
+            "ebf": self.ebf(),
+            "iterations": [dict(iteration, pv=[[pit, direction.value] for pit, direction in iteration["pv"]])
+                           for iteration in self.iterations],
+        }
+
+    def report(self) -> str:
+        lines = [f"{'depth':>5} {'nodes':>9} {'seconds':>8} {'total':>8} {'score':>8}  pv"]
+        for iteration in self.iterations:
+            lines.append(f"{iteration['depth']:5d} {iteration['nodes']:9d} {iteration['seconds']:8.3f} "
+                         f"{iteration['total_seconds']:8.3f} {iteration['score']:+8.1f}  {format_moves(iteration['pv'])}")
+        ebf = self.ebf()
+        first = self.first_move_cutoff_rate()
+        lines.append(f"nodes {self.nodes}, leaves {self.leaves}, EBF {'-' if ebf is None else f'{ebf:.2f}'}")
+        lines.append("nodes by ply " + " ".join(map(str, self.nodes_by_ply)))
+        lines.append(f"cutoffs {self.cutoffs} ({'-' if first is None else f'{first:.1%}'} by the first move), "
+                     f"transposition table cutoffs {self.tt_cutoffs}")
+        lines.append("cutoffs by move index " + " ".join(map(str, self.cutoff_index)))
+        return "\n".join(lines)
+
+
+class _Frame:
+    __slots__ = ("index", "child", "moves", "trace_id")
+
+    def __init__(self, trace_id: Optional[int]):
+        # Children searched so far; re-searches of the same child do not count
+        self.index = 0
+        self.child = None
+        self.moves = {}
+        self.trace_id = trace_id
+
+
+def _bound(value: float) -> Optional[float]:
+    return value if abs(value) != float('inf') else None
+
+
+class InstrumentedEngine(AIEngine):
+    """AIEngine that fills self.stats, and optionally self.trace, on every search.
+
+    Pass trace_rate to record a trace; trace_limit caps its length.
+    """
+
+    def __init__(self, *args, trace_rate: Optional[float] = None, trace_full_plies: int = 2,
+                 trace_limit: int = 100_000, seed: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.trace_rate = trace_rate
+        self.trace_full_plies = trace_full_plies
+        self.trace_limit = trace_limit
+        self.stats = SearchStats()
+        self.trace: List[dict] = []
+        self._rng = random.Random(seed)
+        self._frames: List[_Frame] = []
+        self._next_move = None
+        self._root_key = None
+
+    def get_best_move(self, state: GameState):
+        self.stats = SearchStats()
+        self.trace = []
+        self._frames = []
+        self._root_key = position_key(state)
+        try:
+            return super().get_best_move(state)
+        finally:
+            self.stats.iterations = self.iterations
+
+    def export_trace(self, path: str):
+        with open(path, "w") as f:
+            json.dump({
+                "format": TRACE_FORMAT,
+                "version": TRACE_VERSION,
+                "position": self._root_key.hex() if self._root_key is not None else None,
+                "stats": self.stats.to_json(),
+                "nodes": self.trace,
+            }, f)
+
+    def _negamax(self, state: GameState, depth: int, alpha: float, beta: float, ply: int) -> float:
+        stats = self.stats
+        if ply == len(stats.nodes_by_ply):
+            stats.nodes_by_ply.append(0)
+        stats.nodes_by_ply[ply] += 1
+
+        node = self._trace_node(depth, alpha, beta, ply)
+        frame = _Frame(node["id"] if node is not None else None)
+        self._frames.append(frame)
+        try:
+            score = super()._negamax(state, depth, alpha, beta, ply)
+        finally:
+            self._frames.pop()
+
+        if frame.index == 0:
+            # Returned before searching a move
+            if depth <= 0 or state.game_over or not state.get_valid_moves():
+                stats.leaves += 1
+                kind = "leaf"
+            else:
+                stats.tt_cutoffs += 1
+                kind = "tt"
+        elif score >= beta:
+            stats.cutoffs += 1
+            while len(stats.cutoff_index) < frame.index:
+                stats.cutoff_index.append(0)
+            stats.cutoff_index[frame.index - 1] += 1
+            kind = "cut"
+        else:
+            kind = "all"
+        if node is not None:
+            node["score"] = score
+            node["kind"] = kind
+        return score
+
+    def _trace_node(self, depth: int, alpha: float, beta: float, ply: int) -> Optional[dict]:
+        if self.trace_rate is None or len(self.trace) >= self.trace_limit:
+            return None
+        parent = self._frames[-1].trace_id if self._frames else None
+        # One draw per subtree, at its root on the first sampled ply
+        if ply > 0 and (parent is None or
+                        (ply == self.trace_full_plies + 1 and self._rng.random() >= self.trace_rate)):
+            return None
+        move = self._next_move if ply > 0 else None
+        node = {"id": len(self.trace), "parent": parent, "ply": ply, "depth": depth,
+                "move": [move[0], move[1].value] if move is not None else None,
+                "alpha": _bound(alpha), "beta": _bound(beta), "score": None, "kind": None}
+        self.trace.append(node)
+        return node
+
+    def _ordered_children(self, state: GameState, valid_moves, tt_move) -> list:
+        children = super()._ordered_children(state, valid_moves, tt_move)
+        if self._frames:
+            self._frames[-1].moves = {id(child): move for move, child, _ in children}
+        return children
+
+    def _search_child(self, state: GameState, child: GameState, depth: int, alpha: float, beta: float,
+                      ply: int) -> float:
+        if self._frames:
+            frame = self._frames[-1]
+            if child is not frame.child:
+                frame.child = child
+                frame.index += 1
+            self._next_move = frame.moves.get(id(child))
+        return super()._search_child(state, child, depth, alpha, beta, ply)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Search one position and report what the search did")
+    parser.add_argument("--depth", type=int, default=6)
+    parser.add_argument("--record", metavar="FILE", help="game record to take the position from")
+    parser.add_argument("--ply", type=int, default=0, help="position after this many moves of the record")
+    parser.add_argument("--trace", metavar="FILE", help="write a sampled trace of the tree as JSON")
+    parser.add_argument("--trace-rate", type=float, default=0.01)
+    parser.add_argument("--trace-full-plies", type=int, default=2)
+    args = parser.parse_args()
+
+    state = Replay(GameRecord.load(args.record)).seek(args.ply) if args.record else GameState()
+    engine = InstrumentedEngine(max_depth=args.depth, verbose=False,
+                                trace_rate=args.trace_rate if args.trace else None,
+                                trace_full_plies=args.trace_full_plies)
+    engine.get_best_move(state)
+    print(engine.stats.report())
+    if args.trace:
+        engine.export_trace(args.trace)
+        print(f"Wrote {len(engine.trace)} nodes to {args.trace}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Fixed-capacity particle pool and cached stone sprites for the board effects."""
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pygame
+
+# Sprites are pre-rendered at this many alpha steps instead of one per frame
+ALPHA_LEVELS = 32
+
+
+class ParticlePool:
+    """Particles stored in parallel arrays, live ones packed at the front.
+
+    Slots [0, count) are alive. Spawning writes slot `count`; a dead particle
+    is replaced by the last live one, so nothing is ever shifted or allocated
+    after construction. When the pool is full new particles are dropped.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.capacity = capacity
+        self.count = 0
+        self.position = np.zeros((capacity, 2), dtype=np.float32)
+        self.velocity = np.zeros((capacity, 2), dtype=np.float32)
+        self.life = np.zeros(capacity, dtype=np.int32)
+        self.max_life = np.ones(capacity, dtype=np.int32)
+        self.alpha = np.zeros(capacity, dtype=np.uint8)
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def spawn(self, x: float, y: float, vx: float = 0.0, vy: float = 0.0, life: int = 20) -> bool:
+        if self.count == self.capacity:
+            return False
+        i = self.count
+        self.position[i] = (x, y)
+        self.velocity[i] = (vx, vy)
+        self.life[i] = life
+        self.max_life[i] = life
+        self.alpha[i] = 255
+        self.count += 1
+        return True
+
+    def update(self):
+        """Advance every live particle one frame and drop the expired ones."""
+        n = self.count
+        if not n:
+            return
+        self.position[:n] += self.velocity[:n]
+        self.life[:n] -= 1
+        self.alpha[:n] = 255 * np.maximum(self.life[:n], 0) // self.max_life[:n]
+        # Highest index first, so a swapped-in particle has already been checked
+        for i in np.flatnonzero(self.life[:n] <= 0)[::-1]:
+            self._swap_remove(int(i))
+
+    def _swap_remove(self, i: int):
+        last = self.count - 1
+        if i != last:
+            self.position[i] = self.position[last]
+            self.velocity[i] = self.velocity[last]
+            self.life[i] = self.life[last]
+            self.max_life[i] = self.max_life[last]
+            self.alpha[i] = self.alpha[last]
+        self.count = last
+
+
+class StoneSprites:
+    """Small translucent stone surfaces, rendered once per (color, radius, alpha step)."""
+
+    def __init__(self):
+        self._ramps: Dict[Tuple, List[pygame.Surface]] = {}
+
+    def ramp(self, color: Tuple[int, int, int], radius: int, glint: bool = False) -> List[pygame.Surface]:
+        """All ALPHA_LEVELS sprites for one stone style, from transparent to opaque."""
+        key = (color, radius, glint)
+        sprites = self._ramps.get(key)
+        if sprites is None:
+            size = 2 * radius + 2
+            center = (size // 2, size // 2)
+            sprites = []
+            for level in range(ALPHA_LEVELS):
+                sprite = pygame.Surface((size, size), pygame.SRCALPHA)
+                pygame.draw.circle(sprite, (*color, level * 255 // (ALPHA_LEVELS - 1)), center, radius)
+                if glint:
+                    pygame.draw.circle(sprite, (255, 255, 255, 80), (center[0] - 2, center[1] - 2), 1)
+                sprites.append(sprite)
+            self._ramps[key] = sprites
+        return sprites
+
+    def get(self, color: Tuple[int, int, int], radius: int, alpha: int, glint: bool = False) -> pygame.Surface:
+        return self.ramp(color, radius, glint)[alpha * (ALPHA_LEVELS - 1) // 255]
+
+    def draw_pool(self, surface: pygame.Surface, pool: ParticlePool, color: Tuple[int, int, int], radius: int):
+        n = pool.count
+        if not n:
+            return
+        sprites = self.ramp(color, radius)
+        corners = (pool.position[:n] - (radius + 1)).astype(np.int32).tolist()
+        levels = (pool.alpha[:n].astype(np.int32) * (ALPHA_LEVELS - 1) // 255).tolist()
+        surface.blits([(sprites[level], corner) for level, corner in zip(levels, corners)], doreturn=False)
@@ -0,0 +1,98 @@
+"""Background search of the AI's replies while the human is thinking."""
+import threading
+from typing import List, Optional, Tuple
+
+from .engine import AIEngine, SearchAborted
+from .rules import Direction, GameState, Player, position_key
+
+class Ponderer:
+    """Searches the AI's replies in a background thread while the human thinks."""
+
+    def __init__(self, engine: AIEngine):
+        # A private engine with the same settings gives the same moves as a cold search
+        self.engine = AIEngine(max_depth=engine.max_depth, weights_path=None, verbose=False)
+        self.engine.weights = dict(engine.weights)
+        self.engine.position_db = engine.position_db
+        self.results = {}
+        self.lock = threading.Lock()
+        self.thread = None
+        self.target_keys = set()
+        self.hits = 0
+        self.misses = 0
+
+    def start_turn(self, state: GameState):
+        # The human is to move: search the positions their likely replies lead to
+        self.stop()
+        self.results = {}
+        self._start(self.likely_replies(state))
+
+    def focus(self, state: GameState):
+        # The human has committed a move: search only the position it leads to
+        if state.game_over or state.current_player != Player.PLAYER2:
+            return
+        with self.lock:
+            if position_key(state) in self.results:
+                return
+        self.stop()
+        self._start([state.copy()])
+
+    def stop(self):
+        if self.thread is not None:
+            self.engine.stop()
+            self.thread.join()
+            self.thread = None
+
+    def ready(self, state: GameState) -> bool:
+        """False while a search focused on exactly this position is still running.
+
+        Poll this before take() to let that search finish without blocking on it.
+        """
+        key = position_key(state)
+        if self.thread is None or not self.thread.is_alive() or self.target_keys != {key}:
+            return True
+        with self.lock:
+            return key in self.results
+
+    def take(self, state: GameState) -> Optional[Tuple[int, Direction]]:
+        # Never waits for a search to finish: one still running is stopped and its position counts as a miss
+        key = position_key(state)
+        self.stop()
+        with self.lock:
+            move = self.results.get(key)
+        if move is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return move
+
+    def likely_replies(self, state: GameState) -> List[GameState]:
+        replies = {}
+        for move in state.get_valid_moves():
+            for direction in (Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE):
+                new_state = state.copy()
+                new_state.make_move_instant(move, direction)
+                if not new_state.game_over and new_state.current_player == Player.PLAYER2:
+                    replies.setdefault(position_key(new_state), new_state)
+        # Player 1 prefers low evaluations, so search those replies first
+        return sorted(replies.values(), key=self.engine.evaluate_state)
+
+    def _start(self, states: List[GameState]):
+        if not states:
+            return
+        self.engine.stop_requested = False
+        self.target_keys = {position_key(state) for state in states}
+        self.thread = threading.Thread(target=self._run, args=(states,), daemon=True)
+        self.thread.start()
+
+    def _run(self, states: List[GameState]):
+        try:
+            for state in states:
+                key = position_key(state)
+                with self.lock:
+                    if key in self.results:
+                        continue
+                move = self.engine.get_best_move(state)
+                with self.lock:
+                    self.results[key] = move
+        except SearchAborted:
+            pass
@@ -0,0 +1,186 @@
+"""On-disk store of finished engine analyses, shared across games and sessions.
+
+Every analysis AIEngine completes is kept in an SQLite file keyed by the
+16-byte position_key record, so a position seen in an earlier game comes
+back without searching. The file is in WAL mode: any number of worker
+processes can read it while one of them writes.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional
+
+from .rules import Direction, GameState, position_key
+
+# Analysis database in the project root, next to weights.json
+DB_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "positions.db")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS analyses (
+    key BLOB PRIMARY KEY,
+    move INTEGER NOT NULL,
+    direction INTEGER NOT NULL,
+    score REAL NOT NULL,
+    depth INTEGER NOT NULL,
+    nodes INTEGER NOT NULL,
+    stamp REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS analyses_eviction ON analyses (depth, stamp);
+CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+# A stored analysis is only replaced by one searched at least as deep
+_UPSERT = """
+INSERT INTO analyses (key, move, direction, score, depth, nodes, stamp) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    move = excluded.move, direction = excluded.direction, score = excluded.score,
+    depth = excluded.depth, nodes = excluded.nodes, stamp = excluded.stamp
+WHERE excluded.depth >= analyses.depth
+"""
+
+
+class Analysis(NamedTuple):
+    move: int
+    direction: Direction
+    # From the side to move's point of view
+    score: float
+    depth: int
+    nodes: int
+
+
+class PositionDB:
+    """Depth-preferred, size-bounded store of analyses in one SQLite file.
+
+    Writes are buffered and committed in batches of batch_size, or once
+    flush_interval seconds have passed since the last commit. When the
+    table grows past max_entries the shallowest, oldest analyses are evicted.
+    The connection is opened lazily in each process, so a PositionDB can be
+    handed to pool workers before they start.
+    """
+
+    def __init__(self, path: str = DB_PATH, max_entries: int = 1_000_000, batch_size: int = 64,
+                 flush_interval: float = 1.0, timeout: float = 5.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.timeout = timeout
+        self.hits = 0
+        self.misses = 0
+        self._pending: Dict[bytes, tuple] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+        self._rows = 0
+        self._last_flush = time.monotonic()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_pending={}, _lock=None, _conn=None, _pid=None)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False,
+                                   isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._rows = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def use_weights(self, weights: dict):
+        """Tie the stored analyses to one set of evaluation weights.
+
+        Analyses made with different weights are deleted.
+        """
+        tag = json.dumps(weights, sort_keys=True)
+        with self._lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE name = 'weights'").fetchone()
+                if row is None or row[0] != tag:
+                    if row is not None:
+                        conn.execute("DELETE FROM analyses")
+                        self._rows = 0
+                    conn.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('weights', ?)", (tag,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def lookup(self, state: GameState) -> Optional[Analysis]:
+        key = position_key(state)
+        with self._lock:
+            row = self._pending.get(key)
+            if row is None:
+                row = self._connection().execute(
+                    "SELECT key, move, direction, score, depth, nodes FROM analyses WHERE key = ?",
+                    (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return Analysis(row[1], Direction(row[2]), row[3], row[4], row[5])
+
+    def store(self, state: GameState, move: int, direction: Direction, score: float, depth: int, nodes: int):
+        key = position_key(state)
+        with self._lock:
+            previous = self._pending.get(key)
+            if previous is None or depth >= previous[4]:
+                self._pending[key] = (key, move, direction.value, score, depth, nodes, time.time())
+            due = (len(self._pending) >= self.batch_size or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self._last_flush = time.monotonic()
+            if not self._pending:
+                return
+            rows = list(self._pending.values())
+            self._pending.clear()
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_UPSERT, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            # Counted as if every row were new; recounted before evicting
+            self._rows += len(rows)
+            if self._rows > self.max_entries:
+                self._evict(conn)
+
+    def _evict(self, conn: sqlite3.Connection):
+        self._rows = conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+        excess = self._rows - self.max_entries
+        if excess <= 0:
+            return
+        # Evict a tenth more than needed so the next few flushes do not evict again
+        excess += self.max_entries // 10
+        conn.execute("DELETE FROM analyses WHERE key IN "
+                     "(SELECT key FROM analyses ORDER BY depth, stamp LIMIT ?)", (excess,))
+        self._rows = max(0, self._rows - excess)
+
+    def __len__(self):
+        self.flush()
+        with self._lock:
+            return self._connection().execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
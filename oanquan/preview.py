@@ -0,0 +1,54 @@
+"""Outcomes of every legal move in a position, for showing before one is played."""
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Tuple
+
+from .rules import Direction, GameState, Player, position_key
+
+
+class MoveOutcome(NamedTuple):
+    # Position after the move
+    state: GameState
+    # Cells emptied by captures, in the order they are taken
+    captured: Tuple[int, ...]
+    # Change in the mover's score; a redistribution costs one stone per pit (config.pits)
+    gain: int
+
+
+def move_outcomes(state: GameState) -> Dict[Tuple[int, Direction], MoveOutcome]:
+    """MoveOutcome of each (pit, direction) the side to move can play."""
+    player1 = state.current_player == Player.PLAYER1
+    before = state.player1_score if player1 else state.player2_score
+    outcomes = {}
+    if state.game_over:
+        return outcomes
+    for pit in state.get_valid_moves():
+        for direction in (Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE):
+            after = state.copy()
+            captured = []
+            after.make_move_instant(pit, direction, captured)
+            gain = (after.player1_score if player1 else after.player2_score) - before
+            outcomes[(pit, direction)] = MoveOutcome(after, tuple(captured), gain)
+    return outcomes
+
+
+class PreviewCache:
+    """move_outcomes of the most recently used positions, keyed by position_key."""
+
+    def __init__(self, max_positions: int = 256):
+        self.max_positions = max_positions
+        self._outcomes: "OrderedDict[bytes, Dict[Tuple[int, Direction], MoveOutcome]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def outcomes(self, state: GameState) -> Dict[Tuple[int, Direction], MoveOutcome]:
+        key = position_key(state)
+        outcomes = self._outcomes.get(key)
+        if outcomes is not None:
+            self.hits += 1
+            self._outcomes.move_to_end(key)
+            return outcomes
+        self.misses += 1
+        outcomes = self._outcomes[key] = move_outcomes(state)
+        if len(self._outcomes) > self.max_positions:
+            self._outcomes.popitem(last=False)
+        return outcomes
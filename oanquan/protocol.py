@@ -0,0 +1,234 @@
+"""Line-oriented engine protocol over stdin/stdout.
+
+    python -m oanquan.protocol
+
+One engine process serves any number of searches, so its transposition
+table stays warm from one command to the next. Commands, one per line:
+
+    oanquan                                  -> id name ..., protocolok
+    isready                                  -> readyok
+    newgame                                  clear the table, back to the start position
+    position startpos [board PITS STONES QUAN] [moves 9cw 3ccw ...]
+    position key HEX [board PITS STONES QUAN] [moves ...]
+                                             a position_key as hex, on the
+                                             current board unless given
+    moves 9cw 3ccw ...                       play moves on the current position
+    go [depth N] [movetime MS] [nodes N] [infinite]
+    stop                                     end the search, still answering bestmove
+    d                                        show the current position
+    quit
+
+go answers at once and searches in the background. It prints one info
+line per completed depth and ends with a bestmove line:
+
+    info depth 6 score -2.3 nodes 48213 nps 61022 time 790 pv 9cw 3ccw 7cw
+    bestmove 9cw
+
+Scores are from the side to move's point of view. bestmove is "none" when
+the game is over. After go infinite, bestmove waits for stop or quit even
+once the search has reached MAX_DEPTH or a forced result. A command that
+cannot be carried out gets a line starting with "error"; so does a search
+that fails, which still ends with a bestmove line. position, moves, go and newgame stop a search that
+is still running first.
+"""
+import argparse
+import sys
+import threading
+import time
+from typing import Callable, List, Optional
+
+from .engine import AIEngine, SearchAborted, format_moves, parse_move
+from .evaluation import WEIGHTS_PATH
+from .rules import BoardConfig, Direction, GameState, Player, position_from_key, position_key
+
+ENGINE_NAME = "O An Quan AIEngine"
+# Depth of "go" without a depth, and the most "go infinite" searches
+DEFAULT_DEPTH = 6
+MAX_DEPTH = 64
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class EngineSession:
+    """State of one protocol connection: the position, the engine and its search thread."""
+
+    def __init__(self, write: Callable[[str], None], weights_path: Optional[str] = None):
+        self._write = write
+        self.output_lock = threading.Lock()
+        self.engine = AIEngine(max_depth=DEFAULT_DEPTH, weights_path=weights_path or WEIGHTS_PATH, verbose=False)
+        self.engine.on_iteration = self._info
+        self.config = BoardConfig()
+        self.state = GameState(self.config)
+        self.thread = None
+        # Set by stop(); an infinite search holds back bestmove until then
+        self.stopped = threading.Event()
+        self._start = 0.0
+
+    def write(self, line: str):
+        with self.output_lock:
+            self._write(line)
+
+    def handle(self, line: str) -> bool:
+        """Carry out one command line; False once the session should end."""
+        words = line.split()
+        if not words:
+            return True
+        command, args = words[0], words[1:]
+        try:
+            if command == "quit":
+                self.stop()
+                return False
+            handler = getattr(self, f"cmd_{command}", None)
+            if handler is None:
+                raise ProtocolError(f"unknown command {command!r}")
+            handler(args)
+        except (ProtocolError, ValueError) as e:
+            self.write(f"error {e}")
+        return True
+
+    def cmd_oanquan(self, args: List[str]):
+        self.write(f"id name {ENGINE_NAME}")
+        self.write("protocolok")
+
+    def cmd_isready(self, args: List[str]):
+        self.write("readyok")
+
+    def cmd_newgame(self, args: List[str]):
+        self.stop()
+        self.engine.tt.clear()
+        self.state = GameState(self.config)
+
+    def cmd_position(self, args: List[str]):
+        self.stop()
+        if args[:1] == ["startpos"]:
+            config, rest = self._board(args[1:])
+            state = GameState(config)
+        elif args[:1] == ["key"] and len(args) >= 2:
+            config, rest = self._board(args[2:])
+            state = position_from_key(bytes.fromhex(args[1]), config)
+        else:
+            raise ProtocolError("expected position startpos ... or position key HEX ...")
+        if rest and rest[0] != "moves":
+            raise ProtocolError(f"unexpected {rest[0]!r}")
+        self._play(state, rest[1:])
+        self.state = state
+        self.config = state.config
+
+    def cmd_moves(self, args: List[str]):
+        self.stop()
+        state = self.state.copy()
+        self._play(state, args)
+        self.state = state
+
+    def cmd_go(self, args: List[str]):
+        self.stop()
+        limits = {}
+        options = iter(args)
+        for option in options:
+            if option == "infinite":
+                limits[option] = True
+                continue
+            if option not in ("depth", "movetime", "nodes"):
+                raise ProtocolError(f"unknown go option {option!r}")
+            value = next(options, None)
+            if value is None:
+                raise ProtocolError(f"{option} needs a value")
+            limits[option] = int(value)
+            minimum = 1 if option == "depth" else 0
+            if limits[option] < minimum:
+                raise ProtocolError(f"{option} must be at least {minimum}")
+        # Without a depth, a time or node limit (or stop) ends the search
+        depth = limits.get("depth", MAX_DEPTH if limits else DEFAULT_DEPTH)
+        time_limit = limits["movetime"] / 1000 if "movetime" in limits else None
+        self.engine.max_depth = depth
+        self.engine.time_limit = time_limit
+        self.engine.node_limit = limits.get("nodes")
+        self.engine.stop_requested = False
+        self.stopped.clear()
+        self.thread = threading.Thread(target=self._search, args=(self.state.copy(), "infinite" in limits),
+                                       daemon=True)
+        self.thread.start()
+
+    def cmd_stop(self, args: List[str]):
+        self.stop()
+
+    def cmd_d(self, args: List[str]):
+        state = self.state
+        config = state.config
+        to_move = "1" if state.current_player == Player.PLAYER1 else "2"
+        self.write(f"key {position_key(state).hex()}")
+        self.write("player2 " + " ".join(str(state.board[cell]) for cell in reversed(config.player2_pits)))
+        self.write(f"quans {state.board[config.quans[0]]} {state.board[config.quans[1]]}")
+        self.write("player1 " + " ".join(str(state.board[cell]) for cell in config.player1_pits))
+        self.write(f"scores {state.player1_score} {state.player2_score} to_move {to_move}"
+                   + (" game_over" if state.game_over else ""))
+
+    def stop(self):
+        if self.thread is not None:
+            self.stopped.set()
+            self.engine.stop()
+            self.thread.join()
+            self.thread = None
+
+    def _board(self, args: List[str]):
+        # An optional "board PITS STONES QUAN" ahead of the rest of a position command
+        if args[:1] != ["board"]:
+            return self.config, args
+        if len(args) < 4:
+            raise ProtocolError("board needs PITS STONES QUAN")
+        return BoardConfig(*(int(value) for value in args[1:4])), args[4:]
+
+    def _play(self, state: GameState, moves: List[str]):
+        for text in moves:
+            move = parse_move(text)
+            if state.game_over or not state.make_move_instant(*move):
+                raise ProtocolError(f"illegal move {text}")
+
+    def _search(self, state: GameState, infinite: bool):
+        self._start = time.perf_counter()
+        move = (None, Direction.CLOCKWISE)
+        # So a search that fails before its first iteration does not fall back on the last one's
+        self.engine.iterations = []
+        try:
+            if not state.game_over:
+                move = self.engine.get_best_move(state)
+        except Exception as e:
+            if not isinstance(e, SearchAborted):
+                self.write(f"error search failed: {e!r}")
+            # The deepest finished iteration stands, or any legal move before the first
+            if self.engine.iterations:
+                move = self.engine.iterations[-1]["pv"][0]
+            else:
+                move = (state.get_valid_moves()[0], Direction.CLOCKWISE)
+        if infinite:
+            self.stopped.wait()
+        self.write(f"bestmove {format_moves([move]) if move[0] is not None else 'none'}")
+
+    def _info(self, iteration: dict):
+        seconds = time.perf_counter() - self._start
+        nodes = self.engine.nodes_evaluated
+        self.write(f"info depth {iteration['depth']} score {iteration['score']:.1f} nodes {nodes} "
+                   f"nps {int(nodes / seconds) if seconds > 0 else 0} time {int(seconds * 1000)} "
+                   f"pv {format_moves(iteration['pv'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the engine over a line protocol on stdin/stdout")
+    parser.add_argument("--weights", metavar="FILE", help="evaluation weights (default: the trained weights)")
+    args = parser.parse_args()
+
+    def write(line: str):
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+    session = EngineSession(write, weights_path=args.weights)
+    for line in sys.stdin:
+        if not session.handle(line):
+            break
+    session.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,229 @@
+"""Offline rendering of recorded games to PNG sequences or raw video.
+
+    python -m oanquan.render game.json --out frames/
+    python -m oanquan.render game.json --raw - | ffmpeg -f rawvideo -pix_fmt rgb24 -s 1000x700 -r 60 -i - game.mp4
+
+The game is played through OAnQuanGame's own animation and drawing code,
+so a clip looks exactly like the window. Time is virtual: every output
+frame advances the animations by 1/fps of a second in fixed steps of the
+window's 1/FPS, whatever the rendering costs, and frames come out as
+fast as they can be drawn. Without a display, set SDL_VIDEODRIVER=dummy
+(the command line does this itself).
+
+Frames are copied off the screen as RGB bytes and handed to a writer.
+PNG files are compressed on a thread pool; zlib releases the interpreter
+lock, so drawing carries on while earlier frames are encoded and saved.
+A raw stream is written by one background thread, in order.
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO, Deque, Optional
+
+# pygame greets on stdout when first imported, which would corrupt a raw stream there
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+import pygame
+
+from .engine import AIEngine
+from .gui import FPS, WINDOW_HEIGHT, WINDOW_WIDTH, OAnQuanGame
+from .replay import GameRecord
+from .rules import GameMode, position_key
+
+# Frames shown before the first move, between moves and on the final position
+HOLD_FRAMES = 30
+# Frames queued for encoding at most, per worker, before rendering waits
+QUEUE_PER_WORKER = 4
+# Level 3 encodes a frame in half the time of level 6, into a file about 1.7 times larger
+PNG_LEVEL = 3
+
+
+def png_bytes(width: int, height: int, rgb: bytes, level: int = PNG_LEVEL) -> bytes:
+    """An RGB image as a PNG file, with no row filtering."""
+    stride = width * 3
+    raw = b"".join(b"\x00" + rgb[y * stride:(y + 1) * stride] for y in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw, level))
+            + chunk(b"IEND", b""))
+
+
+class _QueuedWriter:
+    """Runs write jobs on a thread pool, blocking once too many are in flight."""
+
+    def __init__(self, workers: int):
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.pending: Deque[Future] = deque()
+        self.max_pending = workers * QUEUE_PER_WORKER
+        self.wait_seconds = 0.0
+
+    def _submit(self, job, *args):
+        while len(self.pending) >= self.max_pending:
+            start = time.perf_counter()
+            # Re-raises a failed write here, on the rendering thread
+            self.pending.popleft().result()
+            self.wait_seconds += time.perf_counter() - start
+        self.pending.append(self.pool.submit(job, *args))
+
+    def close(self):
+        while self.pending:
+            self.pending.popleft().result()
+        self.pool.shutdown()
+
+
+class PngWriter(_QueuedWriter):
+    """Writes frame_000000.png, frame_000001.png, ... into a directory."""
+
+    def __init__(self, directory: str, workers: int = 4, level: int = PNG_LEVEL):
+        super().__init__(workers)
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.level = level
+
+    def write(self, index: int, width: int, height: int, rgb: bytes):
+        self._submit(self._save, index, width, height, rgb)
+
+    def _save(self, index: int, width: int, height: int, rgb: bytes):
+        with open(os.path.join(self.directory, f"frame_{index:06d}.png"), "wb") as f:
+            f.write(png_bytes(width, height, rgb, self.level))
+
+
+class RawWriter(_QueuedWriter):
+    """Appends frames as packed RGB24 to a binary stream, in order."""
+
+    def __init__(self, stream: BinaryIO):
+        super().__init__(1)
+        self.stream = stream
+
+    def write(self, index: int, width: int, height: int, rgb: bytes):
+        self._submit(self.stream.write, rgb)
+
+    def close(self):
+        super().close()
+        self.stream.flush()
+
+
+class _RecordedGame(OAnQuanGame):
+    def check_auto_redistribute(self):
+        # A refill is a move of its own in a record, played like any other
+        return False
+
+
+class GameRenderer:
+    """Plays a GameRecord on an OAnQuanGame at a fixed virtual frame rate."""
+
+    def __init__(self, record: GameRecord, fps: int = FPS, hold_frames: int = HOLD_FRAMES):
+        if fps < 1:
+            raise ValueError("fps must be at least 1")
+        self.record = record
+        self.fps = fps
+        self.hold_frames = hold_frames
+        start = record.start_state()
+        # The game never searches, so it gets an engine without the position database or trained weights
+        self.game = _RecordedGame(idle_mode=False, config=start.config,
+                                  ai_engine=AIEngine(weights_path=None, verbose=False))
+        self.game.game_state = start
+        self.game.game_mode = GameMode.HUMAN_VS_HUMAN
+        self.game.in_menu = False
+        self.frames = 0
+        # Animation ticks owed to the virtual clock
+        self._ticks = 0.0
+
+    def render(self, writer, start_ply: int = 0, end_ply: Optional[int] = None) -> int:
+        """Draw the moves start_ply..end_ply into `writer`; returns the frame count."""
+        moves = self.record.moves
+        end_ply = len(moves) if end_ply is None else min(end_ply, len(moves))
+        state = self.game.game_state
+        for pit, direction in moves[:start_ply]:
+            state.make_move_instant(pit, direction)
+        self._hold(writer)
+        for ply in range(start_ply, end_ply):
+            pit, direction = moves[ply]
+            expected = self.game.game_state.copy()
+            if expected.game_over or not expected.make_move_instant(pit, direction):
+                raise ValueError(f"illegal move {pit} {direction.name} at ply {ply}")
+            self._play(pit, direction, writer)
+            if position_key(self.game.game_state) != position_key(expected):
+                raise ValueError(f"the animation of ply {ply} does not match the rules")
+            self._hold(writer)
+        return self.frames
+
+    def _play(self, pit, direction, writer):
+        game = self.game
+        # As if the player had chosen the pit and pressed a direction key
+        game.selected_cell = pit
+        game.waiting_for_direction = True
+        game.handle_direction_key(direction)
+        while game.has_active_effects():
+            self._frame(writer)
+
+    def _hold(self, writer):
+        for _ in range(self.hold_frames):
+            self._frame(writer)
+
+    def _frame(self, writer):
+        game = self.game
+        self._ticks += FPS / self.fps
+        while self._ticks >= 1:
+            game.update_animation()
+            self._ticks -= 1
+        game.draw_board()
+        if game.game_state.game_over and not game.has_active_effects():
+            game.draw_game_over()
+        writer.write(self.frames, WINDOW_WIDTH, WINDOW_HEIGHT, pygame.image.tobytes(game.screen, "RGB"))
+        self.frames += 1
+
+
+def _positive_int(text: str) -> int:
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render a recorded game to PNG frames or a raw RGB24 stream")
+    parser.add_argument("record", help="game record (JSON)")
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--out", metavar="DIR", help="directory for frame_NNNNNN.png files")
+    output.add_argument("--raw", metavar="FILE", help="raw RGB24 frames, - for stdout")
+    parser.add_argument("--fps", type=_positive_int, default=FPS, help="frames per second of the output")
+    parser.add_argument("--hold", type=int, default=HOLD_FRAMES, help="frames to pause between moves")
+    parser.add_argument("--start-ply", type=int, default=0)
+    parser.add_argument("--end-ply", type=int, default=None)
+    parser.add_argument("--workers", type=_positive_int, default=os.cpu_count() or 1, help="PNG encoding threads")
+    parser.add_argument("--level", type=int, default=PNG_LEVEL, help="PNG compression level, 0-9")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    renderer = GameRenderer(GameRecord.load(args.record), fps=args.fps, hold_frames=args.hold)
+    if args.out:
+        writer = PngWriter(args.out, workers=args.workers, level=args.level)
+    elif args.raw == "-":
+        writer = RawWriter(sys.stdout.buffer)
+    else:
+        writer = RawWriter(open(args.raw, "wb"))
+    start = time.perf_counter()
+    try:
+        frames = renderer.render(writer, args.start_ply, args.end_ply)
+    finally:
+        writer.close()
+        if args.raw not in (None, "-"):
+            writer.stream.close()
+    seconds = time.perf_counter() - start
+    # Keep stdout clean for a raw stream
+    print(f"Rendered {frames} frames ({frames / args.fps:.1f} s of video) in {seconds:.1f} s, "
+          f"{frames / seconds:.0f} frames/s, {writer.wait_seconds:.1f} s waiting on the writer",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Recorded games and checkpointed seeking through them.
+
+A record is a JSON file:
+
+    {"format": "oanquan-record", "version": 1,
+     "start": "<position_key as hex>",
+     "board": [pits, stones, quan_stones],
+     "moves": [[7, 1], [3, -1], ...],
+     "info": {...}}
+
+Each move is [pit, Direction value] and is replayed with
+GameState.make_move_instant; a move on an empty pit is a redistribution.
+"start", "board" and "info" are optional. Records written before "board"
+was added give the board size by the length of "start" and have the
+default stone counts.
+"""
+import json
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+from .rules import BoardConfig, Direction, GameState, position_from_key, position_key
+
+RECORD_FORMAT = "oanquan-record"
+RECORD_VERSION = 1
+# Games saved from the GUI, in the project root
+RECORDS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "records")
+
+
+class GameRecord:
+    def __init__(self, moves: Optional[List[Tuple[int, Direction]]] = None, start: Optional[GameState] = None,
+                 info: Optional[Dict] = None):
+        self.moves = list(moves or [])
+        start = start or GameState()
+        self.config = start.config
+        self.start = position_key(start)
+        self.info = dict(info or {})
+
+    def start_state(self) -> GameState:
+        return position_from_key(self.start, self.config)
+
+    def to_json(self) -> dict:
+        return {
+            "format": RECORD_FORMAT,
+            "version": RECORD_VERSION,
+            "start": self.start.hex(),
+            "board": [self.config.pits, self.config.stones, self.config.quan_stones],
+            "moves": [[pit, direction.value] for pit, direction in self.moves],
+            "info": self.info,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "GameRecord":
+        if data.get("format") != RECORD_FORMAT or data.get("version") != RECORD_VERSION:
+            raise ValueError("not an O An Quan game record")
+        moves = [(pit, Direction(direction)) for pit, direction in data["moves"]]
+        key = bytes.fromhex(data["start"]) if "start" in data else None
+        if "board" in data:
+            config = BoardConfig(*data["board"])
+            start = position_from_key(key, config) if key is not None else GameState(config)
+        else:
+            start = position_from_key(key) if key is not None else None
+        record = cls(moves, start=start, info=data.get("info"))
+        if key is not None:
+            record.start = key
+        return record
+
+    def save(self, path: Optional[str] = None) -> str:
+        if path is None:
+            os.makedirs(RECORDS_DIR, exist_ok=True)
+            path = os.path.join(RECORDS_DIR, time.strftime("game-%Y%m%d-%H%M%S.json"))
+        with open(path, "w") as f:
+            json.dump(self.to_json(), f)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "GameRecord":
+        with open(path) as f:
+            return cls.from_json(json.load(f))
+
+
+class Replay:
+    """Random access to the positions of a recorded game.
+
+    The position every `checkpoint_interval` plies is kept as its 16-byte
+    key. Seeking decodes the nearest checkpoint at or before the target
+    and replays at most interval - 1 moves; stepping forward one ply
+    continues from the current position instead. When a game would need
+    more than max_checkpoints checkpoints the interval doubles and every
+    other one is dropped, so memory stays bounded however long the game.
+    """
+
+    def __init__(self, record: GameRecord, checkpoint_interval: int = 16, max_checkpoints: int = 256):
+        self.record = record
+        self.interval = checkpoint_interval
+        self.max_checkpoints = max_checkpoints
+        self.checkpoints: List[bytes] = []
+        self._build()
+        self.ply = 0
+        self._state = record.start_state()
+
+    def __len__(self):
+        return len(self.record.moves)
+
+    def _build(self):
+        state = self.record.start_state()
+        for ply, (pit, direction) in enumerate(self.record.moves):
+            if ply % self.interval == 0:
+                self._add_checkpoint(ply, state)
+            if state.game_over or not state.make_move_instant(pit, direction):
+                raise ValueError(f"illegal move {pit} {direction.name} at ply {ply}")
+        if len(self.record.moves) % self.interval == 0:
+            self._add_checkpoint(len(self.record.moves), state)
+
+    def _add_checkpoint(self, ply: int, state: GameState):
+        while len(self.checkpoints) >= self.max_checkpoints:
+            self.checkpoints = self.checkpoints[::2]
+            self.interval *= 2
+        if ply % self.interval == 0:
+            self.checkpoints.append(position_key(state))
+
+    def seek(self, ply: int) -> GameState:
+        """Position after `ply` moves, clamped to the game; the caller may modify it."""
+        ply = max(0, min(ply, len(self.record.moves)))
+        checkpoint = ply // self.interval
+        # Continue from the current position only if no checkpoint lies between it and the target
+        if not checkpoint * self.interval <= self.ply <= ply:
+            self.ply = checkpoint * self.interval
+            self._state = position_from_key(self.checkpoints[checkpoint], self.record.config)
+        for pit, direction in self.record.moves[self.ply:ply]:
+            self._state.make_move_instant(pit, direction)
+        self.ply = ply
+        state = self._state.copy()
+        state.move_count = ply
+        return state
+
+    def step(self, plies: int) -> GameState:
+        return self.seek(self.ply + plies)
+
+    def last_move(self) -> Optional[Tuple[int, Direction]]:
+        return self.record.moves[self.ply - 1] if self.ply else None
@@ -0,0 +1,318 @@
+"""Game rules: players, directions and the GameState move engine.
+
+This module and the rest of the core package never import pygame.
+"""
+import itertools
+from enum import Enum
+from typing import List, Optional
+
+class GameMode(Enum):
+    HUMAN_VS_HUMAN = 1
+    HUMAN_VS_AI = 2
+
+class Player(Enum):
+    PLAYER1 = 0
+    PLAYER2 = 1
+
+class Direction(Enum):
+    CLOCKWISE = 1
+    COUNTER_CLOCKWISE = -1
+
+class QueryStats:
+    """Counts memoized GameState/board queries that were reused or recomputed."""
+
+    QUERIES = ("valid_moves", "redistribution", "cell_colors")
+
+    def __init__(self):
+        self.hits = dict.fromkeys(self.QUERIES, 0)
+        self.misses = dict.fromkeys(self.QUERIES, 0)
+
+    def summary(self) -> str:
+        return ", ".join(f"{name}: {self.hits[name]} reused / {self.misses[name]} computed"
+                         for name in self.QUERIES)
+
+query_stats = QueryStats()
+
+class BoardConfig:
+    """Board geometry: `pits` pits per player between two quan.
+
+    Cells are numbered around the ring as on the standard board. Cell 0 is
+    unused, Player 2's pits come first, then a quan, Player 1's pits and the
+    other quan. A row that runs out is refilled with one stone per pit for
+    `pits` points. Every count must fit in a byte of position_key.
+    """
+
+    def __init__(self, pits: int = 5, stones: int = 5, quan_stones: int = 10):
+        if pits < 1:
+            raise ValueError("a board needs at least one pit per player")
+        self.pits = pits
+        self.stones = stones
+        self.quan_stones = quan_stones
+        self.total_stones = 2 * (pits * stones + quan_stones)
+        if self.total_stones > 255:
+            raise ValueError(f"{self.total_stones} stones do not fit in a position key (at most 255)")
+        # Board length, slot 0 included
+        self.cells = 2 * pits + 3
+        self.quans = (pits + 1, 2 * pits + 2)
+        self.player1_pits = range(pits + 2, 2 * pits + 2)
+        self.player2_pits = range(1, pits + 1)
+        self.player1_row = slice(pits + 2, 2 * pits + 2)
+        self.player2_row = slice(1, pits + 1)
+        self.key_size = self.cells + 3
+        last = self.cells - 1
+        self.next_clockwise = [1] + [i % last + 1 for i in range(1, self.cells)]
+        self.next_counter_clockwise = [last] + [(i - 2) % last + 1 for i in range(1, self.cells)]
+        self._initial_board = (0, *[stones] * pits, quan_stones, *[stones] * pits, quan_stones)
+
+    def initial_board(self) -> List[int]:
+        return list(self._initial_board)
+
+    def _fields(self):
+        return self.pits, self.stones, self.quan_stones
+
+    def __eq__(self, other):
+        return isinstance(other, BoardConfig) and self._fields() == other._fields()
+
+    def __hash__(self):
+        return hash(self._fields())
+
+    def __repr__(self):
+        return f"BoardConfig(pits={self.pits}, stones={self.stones}, quan_stones={self.quan_stones})"
+
+
+STANDARD_BOARD = BoardConfig()
+
+# Versions are unique across all states, so (version, ...) keys never collide after a reset
+_state_versions = itertools.count(1)
+
+class GameState:
+    """A position and the rules that change it.
+
+    The attributes are slots, which keeps the states a search copies
+    small and quick to copy. The board stays a list: an array('B') is
+    smaller again, but every board[i] from it builds an int, which costs
+    make_move_instant and the evaluation more than copying saves.
+    """
+
+    __slots__ = ("config", "board", "current_player", "player1_score", "player2_score", "game_over", "winner",
+                 "move_count", "version", "_moves_version", "_valid_moves", "_redistribution_version",
+                 "_needs_redistribution")
+
+    def __init__(self, config: BoardConfig = STANDARD_BOARD):
+        self.config = config
+        self.board = config.initial_board()
+        self.current_player = Player.PLAYER1
+        self.player1_score = 0
+        self.player2_score = 0
+        self.game_over = False
+        self.winner = None
+        self.move_count = 0
+        self.version = next(_state_versions)
+        self._moves_version = 0
+        self._valid_moves = None
+        self._redistribution_version = 0
+        self._needs_redistribution = False
+
+    def touch(self):
+        # Must follow any direct change to board, scores, player or game_over
+        self.version = next(_state_versions)
+
+    def copy(self):
+        # Fills the slots directly instead of building a start position in __init__ first
+        new_state = GameState.__new__(GameState)
+        new_state.config = self.config
+        new_state.board = self.board[:]
+        new_state.current_player = self.current_player
+        new_state.player1_score = self.player1_score
+        new_state.player2_score = self.player2_score
+        new_state.game_over = self.game_over
+        new_state.winner = self.winner
+        new_state.move_count = self.move_count
+        new_state.version = next(_state_versions)
+        if self._moves_version == self.version:
+            new_state._valid_moves = self._valid_moves
+            new_state._moves_version = new_state.version
+        else:
+            new_state._valid_moves = None
+            new_state._moves_version = 0
+        new_state._redistribution_version = 0
+        new_state._needs_redistribution = False
+        return new_state
+
+    def get_valid_moves(self) -> List[int]:
+        # Memoized until the next mutation; callers must not modify the returned list
+        if self._moves_version == self.version:
+            query_stats.hits["valid_moves"] += 1
+            return self._valid_moves
+        query_stats.misses["valid_moves"] += 1
+
+        board = self.board
+        player1 = self.current_player == Player.PLAYER1
+        pits = self.config.player1_pits if player1 else self.config.player2_pits
+        moves = [i for i in pits if board[i] > 0]
+        
+        if not moves:
+            if (self.player1_score if player1 else self.player2_score) >= self.config.pits:
+                moves = list(pits)
+        
+        self._valid_moves = moves
+        self._moves_version = self.version
+        return moves
+
+    def needs_redistribution(self) -> bool:
+        if self._redistribution_version == self.version:
+            query_stats.hits["redistribution"] += 1
+            return self._needs_redistribution
+        query_stats.misses["redistribution"] += 1
+
+        score = self.player1_score if self.current_player == Player.PLAYER1 else self.player2_score
+        self._needs_redistribution = not self.game_over and not self.get_valid_moves() and score >= self.config.pits
+        self._redistribution_version = self.version
+        return self._needs_redistribution
+
+    def make_move_instant(self, position: int, direction: Direction, captures: Optional[List[int]] = None) -> bool:
+        # The cells emptied by captures are appended to `captures` if given
+        if position not in self.get_valid_moves():
+            return False
+        
+        if self.board[position] == 0:
+            self._redistribute_stones()
+            return True
+        
+        current_pos = position
+        stones = self.board[position]
+        self.board[position] = 0
+        quans = self.config.quans
+        
+        while stones > 0:
+            while stones > 0:
+                current_pos = self._next_position(current_pos, direction)
+                self.board[current_pos] += 1
+                stones -= 1
+            
+            next_pos = self._next_position(current_pos, direction)
+            
+            if next_pos in quans:
+                break
+            
+            if self.board[next_pos] > 0:
+                stones = self.board[next_pos]
+                self.board[next_pos] = 0
+                current_pos = next_pos
+            else:
+                for capture_pos in self._capture_stones_correct(current_pos, direction):
+                    if captures is not None:
+                        captures.append(capture_pos)
+                    captured = self.board[capture_pos]
+                    self.board[capture_pos] = 0
+                    if self.current_player == Player.PLAYER1:
+                        self.player1_score += captured
+                    else:
+                        self.player2_score += captured
+                break
+        
+        self.touch()
+        self._check_game_over()
+        
+        if not self.game_over:
+            self.current_player = Player.PLAYER2 if self.current_player == Player.PLAYER1 else Player.PLAYER1
+            self.touch()
+            # The side now to move may be left without stones or points to refill
+            self._check_game_over()
+        
+        self.move_count += 1
+        return True
+
+    def _next_position(self, pos: int, direction: Direction) -> int:
+        if direction == Direction.CLOCKWISE:
+            return self.config.next_clockwise[pos]
+        return self.config.next_counter_clockwise[pos]
+
+    def _capture_stones_correct(self, last_position: int, direction: Direction) -> List[int]:
+        current_pos = last_position
+        capture_positions = []
+        
+        while True:
+            next_pos = self._next_position(current_pos, direction)
+            
+            if self.board[next_pos] == 0:
+                capture_pos = self._next_position(next_pos, direction)
+                
+                # FIXED: Allow capturing quan (config.quans) when they have stones
+                # A pit captured earlier in the chain is already empty
+                if self.board[capture_pos] > 0 and capture_pos not in capture_positions:
+                    capture_positions.append(capture_pos)
+                    current_pos = capture_pos
+                else:
+                    break
+            else:
+                break
+        
+        return capture_positions
+
+    def _redistribute_stones(self):
+        cost = self.config.pits
+        if self.current_player == Player.PLAYER1 and self.player1_score >= cost:
+            self.player1_score -= cost
+            for i in self.config.player1_pits:
+                self.board[i] = 1
+        elif self.current_player == Player.PLAYER2 and self.player2_score >= cost:
+            self.player2_score -= cost
+            for i in self.config.player2_pits:
+                self.board[i] = 1
+        self.touch()
+
+    def _check_game_over(self):
+        # Game ends when both quan are captured (have 0 stones)
+        left_quan, right_quan = self.config.quans
+        if self.board[left_quan] == 0 and self.board[right_quan] == 0:
+            self.game_over = True
+            # Collect remaining stones for each player
+            for i in self.config.player2_pits:  # Player 2's cells
+                self.player2_score += self.board[i]
+                self.board[i] = 0
+            for i in self.config.player1_pits:  # Player 1's cells
+                self.player1_score += self.board[i]
+                self.board[i] = 0
+            
+            # Determine winner
+            if self.player1_score > self.player2_score:
+                self.winner = Player.PLAYER1
+            elif self.player2_score > self.player1_score:
+                self.winner = Player.PLAYER2
+            else:
+                self.winner = None
+            self.touch()
+        # Alternative game end: one side has no moves and can't redistribute
+        elif not self.get_valid_moves():
+            if self.current_player == Player.PLAYER1 and self.player1_score < self.config.pits:
+                self.game_over = True
+                self.winner = Player.PLAYER2
+                self.touch()
+            elif self.current_player == Player.PLAYER2 and self.player2_score < self.config.pits:
+                self.game_over = True
+                self.winner = Player.PLAYER1
+                self.touch()
+
+def position_key(state: GameState) -> bytes:
+    # The cells (cell 0 always empty), both scores and the side to move, one byte each:
+    # 16 bytes on the standard board, BoardConfig.key_size on others.
+    return bytes((*state.board, state.player1_score, state.player2_score, state.current_player.value))
+
+def position_from_key(key: bytes, config: Optional[BoardConfig] = None) -> GameState:
+    # The key holds only the cell contents, so the stone counts come from `config`; without
+    # one the board size follows from the key length, with the default stone counts
+    if config is None:
+        config = STANDARD_BOARD if len(key) == STANDARD_BOARD.key_size else BoardConfig((len(key) - 6) // 2)
+    elif len(key) != config.key_size:
+        raise ValueError(f"a {len(key)}-byte key is not a position on {config!r}")
+    cells = config.cells
+    state = GameState(config)
+    state.board = list(key[:cells])
+    state.player1_score = key[cells]
+    state.player2_score = key[cells + 1]
+    state.current_player = Player(key[cells + 2])
+    state.touch()
+    # Restores game_over and winner, which the key leaves out
+    state._check_game_over()
+    return state
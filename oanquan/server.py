@@ -0,0 +1,375 @@
+"""Asyncio server hosting many concurrent O An Quan games.
+
+    python -m oanquan.server --port 8765 --workers 4
+
+Clients speak newline-delimited JSON over TCP. Every request is one JSON
+object with a "cmd" field and gets exactly one JSON reply:
+
+    {"cmd": "new", "mode": "HUMAN_VS_AI"}          -> {"ok": true, "game_id": 1, "state": {...}}
+    {"cmd": "move", "game_id": 1, "pit": 7, "direction": "CLOCKWISE"}
+    {"cmd": "state", "game_id": 1}
+    {"cmd": "close", "game_id": 1}
+    {"cmd": "metrics"}
+
+AI turns run on a bounded process pool of AIEngine workers.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+
+from .engine import AIEngine
+from .positiondb import PositionDB
+from .rules import BoardConfig, Direction, GameMode, GameState, Player, position_from_key, position_key
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class ServerError(Exception):
+    pass
+
+
+_worker_engines: Dict[Tuple[int, Optional[str]], AIEngine] = {}
+
+
+def _ai_search(key: bytes, config: BoardConfig, depth: int,
+               db_path: Optional[str] = None) -> Tuple[Optional[int], int, int]:
+    # Runs inside a pool worker; the position arrives as its key and engines are reused between jobs
+    state = position_from_key(key, config)
+    engine = _worker_engines.get((depth, db_path))
+    if engine is None:
+        # Workers commit every analysis at once, since they may be stopped at any time
+        position_db = PositionDB(db_path, flush_interval=0.0) if db_path else None
+        engine = _worker_engines[depth, db_path] = AIEngine(max_depth=depth, verbose=False,
+                                                            position_db=position_db)
+    move, direction = engine.get_best_move(state)
+    return move, direction.value, engine.nodes_evaluated
+
+
+class LatencyStats:
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def snapshot(self) -> dict:
+        recent = sorted(self.recent)
+        percentile = lambda p: recent[min(len(recent) - 1, int(p * len(recent)))] * 1000 if recent else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms": self.max * 1000,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+        }
+
+
+class GameSession:
+    def __init__(self, game_id: int, mode: GameMode, ai_time_budget: float):
+        self.game_id = game_id
+        self.mode = mode
+        self.state = GameState()
+        self.ai_time_left = ai_time_budget
+        self.lock = asyncio.Lock()
+
+    def to_dict(self) -> dict:
+        state = self.state
+        return {
+            "game_id": self.game_id,
+            "mode": self.mode.name,
+            "board": state.board,
+            "current_player": state.current_player.name,
+            "player1_score": state.player1_score,
+            "player2_score": state.player2_score,
+            "game_over": state.game_over,
+            "winner": state.winner.name if state.winner else None,
+            "move_count": state.move_count,
+            "valid_moves": state.get_valid_moves(),
+            "ai_time_left": round(self.ai_time_left, 3),
+        }
+
+
+class GameServer:
+    def __init__(self, workers: int = 2, depth: int = 4, max_sessions: int = 10000,
+                 max_pending: Optional[int] = None, max_waiting: int = 256,
+                 move_time_limit: float = 5.0, ai_time_budget: float = 120.0,
+                 position_db: Optional[str] = None):
+        self.depth = depth
+        # Path of the analysis database shared by all workers, if any
+        self.position_db = position_db
+        self.max_sessions = max_sessions
+        self.max_waiting = max_waiting
+        self.move_time_limit = move_time_limit
+        self.ai_time_budget = ai_time_budget
+
+        # Forking a process that runs an event loop is unsafe; spawned workers only load the core package
+        self.pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        self.fallback_engine = AIEngine(max_depth=1, verbose=False)
+        self.sessions: Dict[int, GameSession] = {}
+        self._ids = itertools.count(1)
+        # Jobs submitted to the pool (running or queued inside the executor)
+        self._slots = asyncio.Semaphore(max_pending or workers * 2)
+        self._in_flight = 0
+        self._waiting = 0
+
+        self.sessions_created = 0
+        self.moves_played = 0
+        self.ai_moves = 0
+        self.ai_timeouts = 0
+        self.ai_errors = 0
+        self.rejected_busy = 0
+        self.move_latency = LatencyStats()
+        self.ai_latency = LatencyStats()
+
+    def metrics(self) -> dict:
+        return {
+            "sessions_active": len(self.sessions),
+            "sessions_created": self.sessions_created,
+            "queue_depth": self._waiting + self._in_flight,
+            "ai_waiting": self._waiting,
+            "ai_in_flight": self._in_flight,
+            "moves_played": self.moves_played,
+            "ai_moves": self.ai_moves,
+            "ai_timeouts": self.ai_timeouts,
+            "ai_errors": self.ai_errors,
+            "rejected_busy": self.rejected_busy,
+            "move_latency": self.move_latency.snapshot(),
+            "ai_latency": self.ai_latency.snapshot(),
+        }
+
+    def _get_session(self, request: dict) -> GameSession:
+        session = self.sessions.get(request.get("game_id"))
+        if session is None:
+            raise ServerError("unknown game_id")
+        return session
+
+    async def handle_request(self, request: dict) -> dict:
+        cmd = request.get("cmd")
+        if cmd == "new":
+            return self._new_game(request)
+        if cmd == "move":
+            return await self._play_move(request)
+        if cmd == "state":
+            return await self._get_state(request)
+        if cmd == "close":
+            session = self._get_session(request)
+            del self.sessions[session.game_id]
+            return {"ok": True}
+        if cmd == "metrics":
+            return {"ok": True, "metrics": self.metrics()}
+        raise ServerError(f"unknown cmd {cmd!r}")
+
+    def _new_game(self, request: dict) -> dict:
+        if len(self.sessions) >= self.max_sessions:
+            raise ServerError("session limit reached")
+        try:
+            mode = GameMode[request.get("mode", GameMode.HUMAN_VS_AI.name)]
+        except KeyError:
+            raise ServerError("invalid mode")
+        session = GameSession(next(self._ids), mode, self.ai_time_budget)
+        self.sessions[session.game_id] = session
+        self.sessions_created += 1
+        return {"ok": True, "game_id": session.game_id, "state": session.to_dict()}
+
+    async def _get_state(self, request: dict) -> dict:
+        session = self._get_session(request)
+        async with session.lock:
+            # Should the AI ever be left to move, it plays here rather than the session staying stuck
+            state = session.state.copy()
+            ai_moves = await self._play_ai_turn(session, state)
+            self._commit(session, state, ai_moves)
+            return {"ok": True, "ai_moves": ai_moves, "state": session.to_dict()}
+
+    async def _play_move(self, request: dict) -> dict:
+        session = self._get_session(request)
+        async with session.lock:
+            if session.state.game_over:
+                raise ServerError("game is over")
+            if self._ai_to_move(session):
+                raise ServerError("not your turn")
+            direction_name = request.get("direction")
+            if not isinstance(direction_name, str) or direction_name not in Direction.__members__:
+                raise ServerError("invalid direction")
+            direction = Direction[direction_name]
+            pit = request.get("pit")
+            # Rejects 7.0 and True, which compare equal to valid pits
+            if type(pit) is not int or pit not in session.state.get_valid_moves():
+                raise ServerError("illegal move")
+
+            start = time.perf_counter()
+            # Nothing is kept unless the AI's reply succeeds too, so a busy or failed AI turn
+            # leaves the session as it was, with the human still to move
+            state = session.state.copy()
+            state.make_move_instant(pit, direction)
+            ai_moves = await self._play_ai_turn(session, state)
+            self.moves_played += 1
+            self._commit(session, state, ai_moves)
+            self.move_latency.add(time.perf_counter() - start)
+
+            return {"ok": True, "ai_moves": ai_moves, "state": session.to_dict()}
+
+    def _ai_to_move(self, session: GameSession, state: Optional[GameState] = None) -> bool:
+        state = session.state if state is None else state
+        return (session.mode == GameMode.HUMAN_VS_AI and not state.game_over and
+                state.current_player == Player.PLAYER2)
+
+    async def _play_ai_turn(self, session: GameSession, state: GameState) -> list:
+        ai_moves = []
+        while self._ai_to_move(session, state):
+            ai_moves.append(await self._play_ai_move(session, state))
+        return ai_moves
+
+    def _commit(self, session: GameSession, state: GameState, ai_moves: list):
+        session.state = state
+        self.moves_played += len(ai_moves)
+        self.ai_moves += len(ai_moves)
+
+    async def _play_ai_move(self, session: GameSession, state: GameState) -> dict:
+        start = time.perf_counter()
+        timed_out = session.ai_time_left <= 0
+        failed = False
+        if not timed_out:
+            if self._waiting >= self.max_waiting:
+                self.rejected_busy += 1
+                raise ServerError("server busy")
+
+            self._waiting += 1
+            try:
+                await self._slots.acquire()
+            finally:
+                self._waiting -= 1
+
+            try:
+                deadline = min(self.move_time_limit, session.ai_time_left)
+                move, direction, nodes = await self._search_in_pool(state, deadline)
+            except asyncio.TimeoutError:
+                timed_out = True
+            except Exception:
+                # A crashed worker or a broken pool: the shallow search below still answers
+                self.ai_errors += 1
+                failed = True
+
+        if timed_out or failed:
+            # Out of time for this move or this game, or no worker result: answer with a shallow search
+            self.ai_timeouts += timed_out
+            move, direction = self.fallback_engine.get_best_move(state)
+            nodes = self.fallback_engine.nodes_evaluated
+        elapsed = time.perf_counter() - start
+        session.ai_time_left = max(0.0, session.ai_time_left - elapsed)
+        self.ai_latency.add(elapsed)
+
+        state.make_move_instant(move, direction)
+        return {"pit": move, "direction": direction.name, "nodes": nodes,
+                "seconds": round(elapsed, 4), "timed_out": timed_out}
+
+    async def _search_in_pool(self, state: GameState, deadline: float) -> Tuple[int, Direction, int]:
+        # Holds one of self._slots, which the caller has acquired
+        self._in_flight += 1
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self.pool, _ai_search, position_key(state), state.config, self.depth,
+                                          self.position_db)
+        except Exception:
+            # A broken pool refuses the job outright, so no callback will free the slot
+            self._release_slot(None)
+            raise
+        # The slot is only freed once the worker is really done, even after a timeout
+        future.add_done_callback(self._release_slot)
+        move, direction_value, nodes = await asyncio.wait_for(asyncio.shield(future), deadline)
+        return move, Direction(direction_value), nodes
+
+    def _release_slot(self, _future):
+        self._in_flight -= 1
+        self._slots.release()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    response = await self.handle_request(json.loads(line))
+                except ServerError as e:
+                    response = {"ok": False, "error": str(e)}
+                except (ValueError, AttributeError, TypeError):
+                    response = {"ok": False, "error": "malformed request"}
+                writer.write(json.dumps(response).encode() + b"\n")
+                # Stop reading from a client that is not consuming its replies
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT):
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+
+class GameClient:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def connect(cls, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> "GameClient":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def request(self, cmd: str, **fields) -> dict:
+        self.writer.write(json.dumps({"cmd": cmd, **fields}).encode() + b"\n")
+        await self.writer.drain()
+        return json.loads(await self.reader.readline())
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="O An Quan game server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    parser.add_argument("--move-time", type=float, default=5.0, help="seconds per AI move")
+    parser.add_argument("--game-budget", type=float, default=120.0, help="total AI seconds per game")
+    parser.add_argument("--position-db", metavar="PATH", help="SQLite file of stored analyses to reuse")
+    args = parser.parse_args()
+
+    async def run():
+        server = GameServer(workers=args.workers, depth=args.depth, max_sessions=args.max_sessions,
+                            move_time_limit=args.move_time, ai_time_budget=args.game_budget,
+                            position_db=args.position_db)
+        try:
+            await server.serve(args.host, args.port)
+        finally:
+            server.shutdown()
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""A transposition table in shared memory, and Lazy SMP search on top of it.
+
+SharedTable stands in for AIEngine.tt in any number of processes at once.
+It is a fixed array of slots in a multiprocessing.shared_memory block,
+each three 64-bit words:
+
+    check = hash ^ data ^ score bits
+    data  = depth | flag << 8 | move << 16
+    score   (float64)
+
+There are no locks. A reader that catches a slot halfway through another
+process's write finds check, data and score out of step and treats the
+slot as empty, so a torn entry costs a miss but never a wrong score:
+each writer makes the check word from its own data and score, never from
+what is in the slot, so two writes that interleave cannot agree. The
+hash is crc32 and adler32 of the position_key, which, unlike hash(), is
+the same in every process. A store always replaces the slot it hashes to,
+except that a shallower result never overwrites a deeper one for the
+same position.
+
+LazySMP keeps worker processes that all search the position they are
+given, sharing one SharedTable: each finds much of its tree already
+searched by the others. Odd workers search one ply deeper, so the
+workers spread out instead of walking the same tree in step. The first
+worker to finish its depth answers and the rest are stopped. With
+shared=False every worker keeps a private table instead, for comparison.
+A search that fails in a worker raises the same error in the caller; a
+worker that dies outright closes the pool and raises RuntimeError.
+"""
+import multiprocessing
+import pickle
+import queue
+import struct
+import threading
+import traceback
+import zlib
+from multiprocessing import shared_memory
+from typing import Optional, Tuple
+
+from .engine import AIEngine, SearchAborted
+from .evaluation import WEIGHTS_PATH, load_weights
+from .rules import Direction, GameState, position_from_key, position_key
+
+SLOT_WORDS = 3
+DEFAULT_ENTRIES = 1 << 20
+# How often a search waiting on the workers checks that they are still running
+POLL_SECONDS = 0.5
+
+
+def _hash(key: bytes) -> int:
+    return zlib.crc32(key) | zlib.adler32(key) << 32
+
+
+class SharedTable:
+    """Fixed-size, lock-free transposition table with the dict interface AIEngine uses.
+
+    Create one with create=True and open it in other processes by name.
+    The creator unlinks the block on close().
+    """
+
+    def __init__(self, name: Optional[str] = None, entries: int = DEFAULT_ENTRIES, create: bool = False):
+        self.entries = entries
+        self.created = create
+        self.memory = shared_memory.SharedMemory(name=name, create=create, size=entries * SLOT_WORDS * 8)
+        self.name = self.memory.name
+        if create:
+            self.memory.buf[:] = bytes(len(self.memory.buf))
+        # The same words as integers and as floats
+        self.words = self.memory.buf.cast("Q")
+        self.floats = self.memory.buf.cast("d")
+
+    def get(self, key: bytes, default=None):
+        h = _hash(key)
+        slot = h % self.entries * SLOT_WORDS
+        words = self.words
+        check, data, score_bits = words[slot], words[slot + 1], words[slot + 2]
+        if check ^ data ^ score_bits != h or not data:
+            return default
+        move = data >> 16
+        return (data & 0xFF, self.floats[slot + 2], data >> 8 & 0xFF,
+                (move >> 1, Direction.CLOCKWISE if move & 1 else Direction.COUNTER_CLOCKWISE) if move else None)
+
+    def __getitem__(self, key: bytes):
+        entry = self.get(key)
+        if entry is None:
+            raise KeyError(key)
+        return entry
+
+    def __contains__(self, key: bytes) -> bool:
+        return self.get(key) is not None
+
+    def __setitem__(self, key: bytes, entry):
+        depth, score, flag, move = entry
+        h = _hash(key)
+        slot = h % self.entries * SLOT_WORDS
+        words = self.words
+        if words[slot] ^ words[slot + 1] ^ words[slot + 2] == h and words[slot + 1] & 0xFF > depth:
+            return
+        # The engine stores depths of 1 and up, so data is never 0 like an empty slot's
+        data = depth | flag << 8
+        if move is not None:
+            data |= (move[0] << 1 | (move[1] == Direction.CLOCKWISE)) << 16
+        score_bits = struct.unpack("<Q", struct.pack("<d", score))[0]
+        self.floats[slot + 2] = score
+        words[slot + 1] = data
+        words[slot] = h ^ data ^ score_bits
+
+    def __len__(self) -> int:
+        # Slots in use; scans the whole table
+        words = self.words
+        return sum(1 for slot in range(0, self.entries * SLOT_WORDS, SLOT_WORDS) if words[slot + 1])
+
+    def clear(self):
+        self.memory.buf[:] = bytes(len(self.memory.buf))
+
+    def close(self):
+        self.words.release()
+        self.floats.release()
+        self.memory.close()
+        if self.created:
+            self.memory.unlink()
+
+
+def _worker(index: int, table_name: Optional[str], entries: int, weights: dict, commands, results):
+    table = SharedTable(table_name, entries) if table_name is not None else None
+    engine = AIEngine(weights_path=None, verbose=False)
+    engine.weights = weights
+    if table is not None:
+        engine.tt = table
+    latest = []
+    # Id of the last search told to stop, which may not have started yet
+    stopped = [0]
+    ready = threading.Condition()
+
+    def listen():
+        while True:
+            command = commands.get()
+            with ready:
+                if command is not None and command[0] == "stop":
+                    stopped[0] = command[1]
+                else:
+                    latest[:] = [command]
+                    ready.notify()
+                engine.stop()
+
+    threading.Thread(target=listen, daemon=True).start()
+    while True:
+        with ready:
+            while not latest:
+                ready.wait()
+            command = latest.pop()
+            engine.stop_requested = False
+        if command is None:
+            if table is not None:
+                table.close()
+            return
+        search_id, key, config, depth = command
+        if search_id <= stopped[0]:
+            # Stopped before it started
+            results.put((search_id, None, None, 0, 0, None))
+            continue
+        # Odd workers run a ply ahead of the even ones
+        engine.max_depth = depth + index % 2
+        try:
+            move, direction = engine.get_best_move(position_from_key(key, config))
+            results.put((search_id, move, direction.value, engine.depth_reached, engine.nodes_evaluated, None))
+        except SearchAborted:
+            results.put((search_id, None, None, engine.depth_reached, engine.nodes_evaluated, None))
+        except Exception as e:
+            # Sent back to be raised by the caller; the queue drops what it cannot pickle, so check first
+            try:
+                pickle.dumps(e)
+            except Exception:
+                e = RuntimeError(traceback.format_exc())
+            results.put((search_id, None, None, engine.depth_reached, engine.nodes_evaluated, e))
+
+
+class LazySMP:
+    """Searches each position with several worker processes at once.
+
+    The interface follows AIEngine: get_best_move(), max_depth, and
+    nodes_evaluated (summed over the workers) and depth_reached afterwards.
+    The workers are started by the first search.
+    """
+
+    def __init__(self, workers: int = 2, max_depth: int = 8, weights: Optional[dict] = None,
+                 shared: bool = True, entries: int = DEFAULT_ENTRIES):
+        self.workers = workers
+        self.max_depth = max_depth
+        self.weights = dict(weights) if weights is not None else load_weights(WEIGHTS_PATH)
+        self.shared = shared
+        self.entries = entries
+        self.nodes_evaluated = 0
+        self.depth_reached = 0
+        self.table = None
+        self.processes = []
+        self.commands = []
+        self.results = None
+        self._search_id = 0
+
+    def start(self):
+        if self.processes:
+            return
+        context = multiprocessing.get_context("spawn")
+        if self.shared:
+            self.table = SharedTable(entries=self.entries, create=True)
+        self.results = context.Queue()
+        for index in range(self.workers):
+            commands = context.Queue()
+            process = context.Process(target=_worker, daemon=True,
+                                      args=(index, self.table.name if self.table is not None else None,
+                                            self.entries, self.weights, commands, self.results))
+            process.start()
+            self.commands.append(commands)
+            self.processes.append(process)
+
+    def get_best_move(self, state: GameState) -> Tuple[int, Direction]:
+        self.start()
+        self._search_id += 1
+        key = position_key(state)
+        for commands in self.commands:
+            commands.put((self._search_id, key, state.config, self.max_depth))
+        best = None
+        self.nodes_evaluated = 0
+        self.depth_reached = 0
+        # Every worker answers once, finished or stopped, before the next search starts
+        answered = 0
+        while answered < self.workers:
+            try:
+                search_id, move, direction, depth, nodes, error = self.results.get(timeout=POLL_SECONDS)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if search_id != self._search_id:
+                continue
+            answered += 1
+            self.nodes_evaluated += nodes
+            if error is not None:
+                # The others' answers to this search are skipped by the next one
+                for commands in self.commands:
+                    commands.put(("stop", self._search_id))
+                raise error
+            if best is None and move is not None:
+                best = (move, Direction(direction))
+                self.depth_reached = depth
+                for commands in self.commands:
+                    commands.put(("stop", self._search_id))
+        return best if best is not None else (None, Direction.CLOCKWISE)
+
+    def _check_workers(self):
+        for index, process in enumerate(self.processes):
+            if not process.is_alive():
+                exitcode = process.exitcode
+                self.close()
+                raise RuntimeError(f"Lazy SMP worker {index} exited with code {exitcode}")
+
+    def close(self):
+        for commands in self.commands:
+            commands.put(None)
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        self.commands = []
+        if self.table is not None:
+            self.table.close()
+            self.table = None
@@ -0,0 +1,389 @@
+"""Exact results by depth-first proof-number search (df-pn).
+
+    python -m oanquan.solver --pits 3 --stones 2 --quan-stones 4
+    python -m oanquan.solver --record game.json --ply 120 --max-nodes 2000000
+
+The solver never calls evaluate_state. It answers whether the side to
+move wins, loses or draws under best play. It runs two binary searches:
+one tries to prove a win for the side to move, the other a win for the
+opponent. A draw is a position where both are disproven.
+
+Each search keeps pn/dn (proof and disproof numbers) in a transposition
+table of at most max_entries positions. When the table is full, the
+entries with the smallest subtrees are garbage-collected. A line that
+repeats a position on the current path, or runs past max_plies, counts
+as no win for the attacker, so proofs are always exact. A disproof that
+rests on repeating a position above it on the path only holds on that
+path: it is kept aside until the search leaves its parent, and never
+enters the table. One that rests on the ply limit is marked in the
+table, and a draw that rests on it is reported as UNKNOWN, in this
+solve() and in any later one that reuses the entry.
+"""
+import argparse
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .engine import format_moves
+from .replay import GameRecord, Replay
+from .rules import BoardConfig, Direction, GameState, Player, position_from_key, position_key
+
+INF = 1 << 40
+# Scheduling priority the hint process gives up in favour of the window
+WORKER_NICENESS = 10
+
+
+class Outcome(Enum):
+    WIN = 1
+    DRAW = 0
+    LOSS = -1
+    UNKNOWN = None
+
+
+class SolveResult(NamedTuple):
+    # From the side to move's point of view
+    outcome: Outcome
+    # A move that keeps the outcome: the win, or a move that avoids losing a draw
+    move: Optional[Tuple[int, Direction]]
+    # Distinct positions in the proof (or disproof) trees
+    proof_size: int
+    nodes: int
+    seconds: float
+    collections: int
+
+
+class _BudgetExceeded(Exception):
+    pass
+
+
+class Solver:
+    """df-pn over GameState with a size-bounded transposition table.
+
+    One table is kept per attacking side and reused by later solve() calls
+    until it is garbage-collected. An entry is (pn, dn, work, horizon):
+    horizon marks a disproof that depends on max_plies.
+    """
+
+    def __init__(self, max_nodes: Optional[int] = 1_000_000, max_entries: int = 1_000_000,
+                 max_plies: int = 200, time_limit: Optional[float] = None):
+        self.max_nodes = max_nodes
+        self.max_entries = max_entries
+        self.max_plies = max_plies
+        self.time_limit = time_limit
+        self.tables: Dict[Player, Dict[bytes, Tuple[int, int, int, bool]]] = {Player.PLAYER1: {}, Player.PLAYER2: {}}
+        self.nodes = 0
+        self.collections = 0
+        self._attacker = None
+        self._tt = None
+        # Positions on the current path, by ply
+        self._path: Dict[bytes, int] = {}
+        # Disproofs that rest on repeating a position on the path: key -> (value, ply of the parent),
+        # dropped when the parent leaves the path
+        self._local: Dict[bytes, Tuple[Tuple[int, int, int, bool], int]] = {}
+        self._local_by_ply: Dict[int, List[bytes]] = {}
+        # Whether the last prove() ended in a disproof that depends on max_plies
+        self._horizon = False
+        self._deadline = None
+
+    def solve(self, state: GameState) -> SolveResult:
+        start = time.perf_counter()
+        self.nodes = 0
+        self.collections = 0
+        self._deadline = start + self.time_limit if self.time_limit is not None else None
+        me = state.current_player
+        opponent = Player.PLAYER2 if me == Player.PLAYER1 else Player.PLAYER1
+
+        outcome, move, size = Outcome.UNKNOWN, None, 0
+        if state.game_over:
+            outcome = (Outcome.DRAW if state.winner is None else
+                       Outcome.WIN if state.winner == me else Outcome.LOSS)
+        else:
+            won = self.prove(state, me)
+            if won:
+                outcome = Outcome.WIN
+            elif won is not None:
+                horizon = self._horizon
+                lost = self.prove(state, opponent)
+                if lost:
+                    outcome = Outcome.LOSS
+                elif lost is not None and not horizon and not self._horizon:
+                    outcome = Outcome.DRAW
+            if outcome == Outcome.WIN:
+                move, size = self._proof(state, me)
+            elif outcome == Outcome.LOSS:
+                size = self._proof(state, opponent)[1]
+            elif outcome == Outcome.DRAW:
+                # Root of the opponent's search: a disproven move holds the draw
+                move, size = self._proof(state, opponent, disproof=True)
+                size += self._proof(state, me, disproof=True)[1]
+        return SolveResult(outcome, move, size, self.nodes, time.perf_counter() - start, self.collections)
+
+    def prove(self, state: GameState, attacker: Player) -> Optional[bool]:
+        """Whether `attacker` can force a win; None if the budget ran out first."""
+        self._use(attacker)
+        try:
+            pn, dn, _, self._horizon = self._mid(state, position_key(state), INF, INF, 0)
+        except _BudgetExceeded:
+            return None
+        return pn == 0
+
+    def _use(self, attacker: Player):
+        self._attacker = attacker
+        self._tt = self.tables[attacker]
+        self._path = {}
+        self._local = {}
+        self._local_by_ply = {}
+
+    def _leave(self, key: bytes, ply: int):
+        del self._path[key]
+        # Disproofs found below this position may rely on the path above it, which changes now
+        for local_key in self._local_by_ply.pop(ply, ()):
+            if local_key in self._local and self._local[local_key][1] == ply:
+                del self._local[local_key]
+
+    def _children(self, state: GameState) -> List[Tuple[Tuple[int, Direction], bytes, GameState]]:
+        valid_moves = state.get_valid_moves()
+        if state.board[valid_moves[0]] == 0:
+            # Out of stones: every move is the same redistribution
+            moves = [(valid_moves[0], Direction.CLOCKWISE)]
+        else:
+            moves = [(move, direction) for move in valid_moves
+                     for direction in (Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE)]
+        children = {}
+        for move in moves:
+            child = state.copy()
+            child.make_move_instant(*move)
+            children.setdefault(position_key(child), (move, child))
+        return [(move, key, child) for key, (move, child) in children.items()]
+
+    def _value(self, key: bytes, child: GameState, ply: int) -> Tuple[int, int, int, bool]:
+        # (pn, dn, the shallowest ply whose repetition a disproof rests on or INF, horizon)
+        if child.game_over:
+            return (0, INF, INF, False) if child.winner == self._attacker else (INF, 0, INF, False)
+        if key in self._path:
+            return INF, 0, self._path[key], False
+        if ply > self.max_plies:
+            return INF, 0, INF, True
+        local = self._local.get(key)
+        if local is not None:
+            return local[0]
+        entry = self._tt.get(key)
+        return (entry[0], entry[1], INF, entry[3]) if entry is not None else (1, 1, INF, False)
+
+    def _mid(self, state: GameState, key: bytes, pn_threshold: int, dn_threshold: int,
+             ply: int) -> Tuple[int, int, int, bool]:
+        self.nodes += 1
+        if self.max_nodes is not None and self.nodes > self.max_nodes:
+            raise _BudgetExceeded()
+        if self._deadline is not None and not self.nodes & 255 and time.perf_counter() > self._deadline:
+            raise _BudgetExceeded()
+
+        nodes_before = self.nodes
+        children = self._children(state)
+        or_node = state.current_player == self._attacker
+        self._path[key] = ply
+        try:
+            while True:
+                values = [self._value(child_key, child, ply + 1) for _, child_key, child in children]
+                if or_node:
+                    pn = min(value[0] for value in values)
+                    dn = min(INF, sum(value[1] for value in values))
+                else:
+                    pn = min(INF, sum(value[0] for value in values))
+                    dn = min(value[1] for value in values)
+                if pn >= pn_threshold or dn >= dn_threshold:
+                    break
+                # Most proving child, and the thresholds that send the search back here
+                side = 0 if or_node else 1
+                order = sorted(range(len(values)), key=lambda i: values[i][side])
+                best = order[0]
+                second = values[order[1]][side] if len(order) > 1 else INF
+                child_pn, child_dn = values[best][:2]
+                if or_node:
+                    child_pn_threshold = min(pn_threshold, second + 1)
+                    child_dn_threshold = min(INF, dn_threshold - dn + child_dn)
+                else:
+                    child_pn_threshold = min(INF, pn_threshold - pn + child_pn)
+                    child_dn_threshold = min(dn_threshold, second + 1)
+                _, child_key, child = children[best]
+                self._mid(child, child_key, child_pn_threshold, child_dn_threshold, ply + 1)
+        finally:
+            self._leave(key, ply)
+
+        repetition, horizon = INF, False
+        if dn == 0:
+            if or_node:
+                # Disproven through every child
+                repetition = min(value[2] for value in values)
+                horizon = any(value[3] for value in values)
+            else:
+                # Through the disproven child that depends on the least
+                _, _, repetition, horizon = max((value for value in values if value[1] == 0),
+                                                key=lambda value: (not value[3], value[2]))
+            if repetition < ply:
+                self._local[key] = ((pn, dn, repetition, horizon), ply - 1)
+                self._local_by_ply.setdefault(ply - 1, []).append(key)
+                return pn, dn, repetition, horizon
+            # Repetitions of this position or below it hold on any path to it
+            repetition = INF
+        previous = self._tt.get(key)
+        work = (previous[2] if previous is not None else 0) + self.nodes - nodes_before + 1
+        self._tt[key] = (pn, dn, work, horizon)
+        if len(self._tt) > self.max_entries:
+            self._collect()
+        return pn, dn, repetition, horizon
+
+    def _collect(self):
+        # Drop the half of the table with the least work behind it
+        works = sorted(entry[2] for entry in self._tt.values())
+        threshold = works[len(works) // 2]
+        for key in [key for key, entry in self._tt.items() if entry[2] <= threshold]:
+            del self._tt[key]
+        self.collections += 1
+
+    def _proof(self, state: GameState, attacker: Player, disproof: bool = False
+               ) -> Tuple[Optional[Tuple[int, Direction]], int]:
+        """Root move and size of the proof (or disproof) tree for `attacker`.
+
+        Entries lost to garbage collection are searched again.
+        """
+        self._use(attacker)
+        solved = 1 if disproof else 0
+        seen = set()
+        root_move = None
+
+        def visit(node: GameState, key: bytes, ply: int):
+            nonlocal root_move
+            if key in seen:
+                return
+            seen.add(key)
+            if node.game_over or ply > self.max_plies:
+                return
+            # Proof: one child at the attacker's nodes, all of them at the defender's
+            one = (node.current_player == self._attacker) != disproof
+            self._path[key] = ply
+            chosen = []
+            for move, child_key, child in self._children(node):
+                value = self._value(child_key, child, ply + 1)
+                if value[solved] != 0 and not child.game_over and child_key not in self._path:
+                    value = self._mid(child, child_key, INF, INF, ply + 1)
+                if value[solved] == 0:
+                    chosen.append((move, child_key, child))
+                    if one:
+                        break
+            if ply == 0 and chosen:
+                root_move = chosen[0][0]
+            # Still on the path, as during the search, so disproofs that rest on it hold below
+            for _, child_key, child in chosen:
+                visit(child, child_key, ply + 1)
+            self._leave(key, ply)
+
+        try:
+            visit(state, position_key(state), 0)
+        except _BudgetExceeded:
+            pass
+        return root_move, len(seen)
+
+
+def solve(state: GameState, **limits) -> SolveResult:
+    return Solver(**limits).solve(state)
+
+
+def _solve_key(key: bytes, config: BoardConfig, limits: dict) -> SolveResult:
+    return solve(position_from_key(key, config), **limits)
+
+
+def _lower_priority():
+    if hasattr(os, "nice"):
+        os.nice(WORKER_NICENESS)
+
+
+class Hints:
+    """Solves positions in a background process, one request at a time.
+
+    request() returns at once; on_update is called, from a pool thread,
+    when the result arrives. Results, including UNKNOWN ones that ran out
+    of budget, are cached by position key. The process is started by the
+    first request().
+    """
+
+    MAX_RESULTS = 4096
+
+    def __init__(self, on_update: Optional[Callable[[], None]] = None, **limits):
+        self.limits = limits
+        self.on_update = on_update
+        self.results: Dict[bytes, SolveResult] = {}
+        self.pending = set()
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def request(self, state: GameState):
+        key = position_key(state)
+        with self.lock:
+            if key in self.results or key in self.pending:
+                return
+            self.pending.add(key)
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                            initializer=_lower_priority)
+        future = self.pool.submit(_solve_key, key, state.config, self.limits)
+        future.add_done_callback(lambda done: self._finish(key, done))
+
+    def result(self, state: GameState) -> Optional[SolveResult]:
+        with self.lock:
+            return self.results.get(position_key(state))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
+
+    def _finish(self, key: bytes, future):
+        failed = future.cancelled() or future.exception() is not None
+        with self.lock:
+            self.pending.discard(key)
+            if failed:
+                return
+            if len(self.results) >= self.MAX_RESULTS:
+                self.results.clear()
+            self.results[key] = future.result()
+        if self.on_update is not None:
+            self.on_update()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve a position exactly with proof-number search")
+    parser.add_argument("--position", metavar="HEX", help="position_key of the position as hex")
+    parser.add_argument("--record", metavar="FILE", help="game record to take the position from")
+    parser.add_argument("--ply", type=int, default=0, help="position after this many moves of the record")
+    parser.add_argument("--pits", type=int, default=5, help="board of the position, or of the start position")
+    parser.add_argument("--stones", type=int, default=5)
+    parser.add_argument("--quan-stones", type=int, default=10)
+    parser.add_argument("--max-nodes", type=int, default=1_000_000)
+    parser.add_argument("--max-entries", type=int, default=1_000_000, help="transposition table size")
+    parser.add_argument("--max-plies", type=int, default=200)
+    parser.add_argument("--time", type=float, default=None, help="time limit in seconds")
+    args = parser.parse_args()
+
+    config = BoardConfig(args.pits, args.stones, args.quan_stones)
+    if args.position:
+        state = position_from_key(bytes.fromhex(args.position), config)
+    elif args.record:
+        state = Replay(GameRecord.load(args.record)).seek(args.ply)
+    else:
+        state = GameState(config)
+    result = solve(state, max_nodes=args.max_nodes, max_entries=args.max_entries,
+                   max_plies=args.max_plies, time_limit=args.time)
+    to_move = "Player 1" if state.current_player == Player.PLAYER1 else "Player 2"
+    print(f"{to_move} to move: {result.outcome.name}"
+          + (f", play {format_moves([result.move])}" if result.move else ""))
+    print(f"proof size {result.proof_size}, {result.nodes} nodes in {result.seconds:.2f} s, "
+          f"{result.collections} table collections")
+
+
+if __name__ == "__main__":
+    main()
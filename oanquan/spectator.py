@@ -0,0 +1,271 @@
+"""Grid view of many live games, for watching self-play or server sessions.
+
+    python -m oanquan.spectator --boards 64 --depth 1
+
+SpectatorView draws any list of GameStates into scaled tiles. Cells are
+blitted from sprites cached per stone count, and a tile is redrawn only
+when its position changes, so the cost of a frame follows the number of
+boards that moved rather than the number shown. The command line plays
+self-play games locally (random moves with --depth 0).
+"""
+import argparse
+import math
+import random
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import pygame
+
+from .engine import AIEngine
+from .gui import (BACKGROUND_COLOR, BOARD_COLOR, FPS, PLAYER1_COLOR, PLAYER2_COLOR, QUAN_COLOR,
+                  STONE_COLOR, TEXT_COLOR, VALID_MOVE_COLOR, WINDOW_HEIGHT, WINDOW_WIDTH)
+from .rules import STANDARD_BOARD, BoardConfig, Direction, GameState, Player, position_key
+
+# Tile height as a fraction of its width
+TILE_ASPECT = 0.5
+TILE_GAP = 4
+
+
+def grid_layout(count: int, width: int, height: int) -> Tuple[int, int, int]:
+    """Columns, rows and tile width that fit `count` tiles into width x height."""
+    best = (1, count, 0)
+    for columns in range(1, count + 1):
+        rows = -(-count // columns)
+        tile_width = min((width - TILE_GAP) // columns - TILE_GAP,
+                         int(((height - TILE_GAP) // rows - TILE_GAP) / TILE_ASPECT))
+        if tile_width > best[2]:
+            best = (columns, rows, tile_width)
+    return best
+
+
+class BoardRenderer:
+    """Draws whole boards of one geometry at one tile size from cached surfaces."""
+
+    def __init__(self, tile_width: int, config: BoardConfig = STANDARD_BOARD):
+        self.config = config
+        self.width = tile_width
+        self.height = int(tile_width * TILE_ASPECT)
+        w, h = self.width, self.height
+        header = int(h * 0.22)
+        margin = max(1, w // 60)
+        quan_width = int(w * 0.12)
+        gap = max(1, w // 120)
+        pits = config.pits
+        pit_width = (w - 2 * margin - 2 * quan_width - (pits + 1) * gap) // pits
+        row_height = (h - header - margin - gap) // 2
+        board_top = header
+
+        # Cell rectangles relative to the tile
+        left_quan, right_quan = config.quans
+        self.cells: Dict[int, pygame.Rect] = {
+            left_quan: pygame.Rect(margin, board_top, quan_width, 2 * row_height + gap),
+            right_quan: pygame.Rect(w - margin - quan_width, board_top, quan_width, 2 * row_height + gap),
+        }
+        for i in range(pits):
+            x = margin + quan_width + gap + i * (pit_width + gap)
+            self.cells[pits - i] = pygame.Rect(x, board_top, pit_width, row_height)
+            self.cells[pits + 2 + i] = pygame.Rect(x, board_top + row_height + gap, pit_width, row_height)
+
+        self.font = pygame.font.Font(None, max(10, int(header * 0.95)))
+        self.count_font = pygame.font.Font(None, max(10, int(row_height * 0.55)))
+        self.stone_radius = max(1, min(pit_width, row_height) // 10)
+        self._background = self._render_background()
+        self._cell_sprites: Dict[tuple, pygame.Surface] = {}
+        self._texts: Dict[tuple, pygame.Surface] = {}
+        self._game_over = pygame.Surface((w, h), pygame.SRCALPHA)
+        self._game_over.fill((0, 0, 0, 110))
+
+    def _render_background(self) -> pygame.Surface:
+        surface = pygame.Surface((self.width, self.height))
+        surface.fill((160, 130, 90))
+        pygame.draw.rect(surface, TEXT_COLOR, surface.get_rect(), max(1, self.width // 150))
+        return surface
+
+    def text(self, value: str, color) -> pygame.Surface:
+        key = (value, color)
+        surface = self._texts.get(key)
+        if surface is None:
+            surface = self._texts[key] = self.font.render(value, True, color)
+        return surface
+
+    def cell_sprite(self, index: int, stones: int, playable: bool) -> pygame.Surface:
+        quan = index in self.config.quans
+        key = (quan, self.cells[index].size, stones, playable)
+        sprite = self._cell_sprites.get(key)
+        if sprite is None:
+            sprite = self._cell_sprites[key] = self._render_cell(self.cells[index].size, quan, stones, playable)
+        return sprite
+
+    def _render_cell(self, size, quan: bool, stones: int, playable: bool) -> pygame.Surface:
+        sprite = pygame.Surface(size)
+        sprite.fill(QUAN_COLOR if quan else VALID_MOVE_COLOR if playable else BOARD_COLOR)
+        rect = sprite.get_rect()
+        pygame.draw.rect(sprite, TEXT_COLOR, rect, 1)
+        radius = self.stone_radius + (1 if quan else 0)
+        ring = min(rect.width, rect.height) / 2 - radius - 2
+        # Up to 8 stones in a ring; beyond that, or when stones would be specks, the count
+        if stones and (stones > 8 or radius < 2):
+            label = self.count_font.render(str(stones), True, TEXT_COLOR)
+            sprite.blit(label, label.get_rect(center=rect.center))
+        else:
+            if stones == 1:
+                ring = 0
+            for i in range(stones):
+                angle = i * 2 * math.pi / stones
+                x = rect.centerx + ring * math.cos(angle)
+                y = rect.centery + ring * math.sin(angle)
+                pygame.draw.circle(sprite, STONE_COLOR, (int(x), int(y)), radius)
+        return sprite
+
+    def render(self, surface: pygame.Surface, origin: Tuple[int, int], state: GameState, label: str = ""):
+        ox, oy = origin
+        surface.blit(self._background, origin)
+        to_move = state.current_player
+        player1_pits = self.config.player1_pits
+        quans = self.config.quans
+        blits = []
+        for index, rect in self.cells.items():
+            playable = (not state.game_over and index not in quans and state.board[index] > 0 and
+                        (index in player1_pits) == (to_move == Player.PLAYER1))
+            blits.append((self.cell_sprite(index, state.board[index], playable), (ox + rect.x, oy + rect.y)))
+        surface.blits(blits, doreturn=False)
+
+        # Header: label, then each score in its player's colour; the side to move is underlined
+        x = ox + self.cells[quans[0]].x
+        y = oy + 1
+        if label:
+            text = self.text(label, TEXT_COLOR)
+            surface.blit(text, (x, y))
+            x += text.get_width() + self.width // 30
+        for player, score, color in ((Player.PLAYER1, state.player1_score, PLAYER1_COLOR),
+                                     (Player.PLAYER2, state.player2_score, PLAYER2_COLOR)):
+            text = self.text(str(score), color)
+            surface.blit(text, (x, y))
+            if player == to_move and not state.game_over:
+                pygame.draw.line(surface, color, (x, y + text.get_height()),
+                                 (x + text.get_width(), y + text.get_height()), 2)
+            x += text.get_width() + self.width // 30
+
+        if state.game_over:
+            surface.blit(self._game_over, origin)
+            result = ("P1 wins" if state.winner == Player.PLAYER1 else
+                      "P2 wins" if state.winner == Player.PLAYER2 else "Draw")
+            text = self.text(result, (255, 255, 255))
+            surface.blit(text, text.get_rect(center=(ox + self.width // 2, oy + self.height // 2)))
+
+
+class SpectatorView:
+    """Keeps a grid of board tiles on a surface up to date.
+
+    draw() returns the rectangles it changed, ready for
+    pygame.display.update.
+    """
+
+    def __init__(self, surface: pygame.Surface, count: int, labels: Optional[Sequence[str]] = None,
+                 config: BoardConfig = STANDARD_BOARD):
+        self.surface = surface
+        self.count = count
+        self.labels = list(labels) if labels is not None else [str(i + 1) for i in range(count)]
+        self.columns, self.rows, tile_width = grid_layout(count, *surface.get_size())
+        self.renderer = BoardRenderer(tile_width, config)
+        self.tiles = [pygame.Rect(TILE_GAP + (i % self.columns) * (tile_width + TILE_GAP),
+                                  TILE_GAP + (i // self.columns) * (self.renderer.height + TILE_GAP),
+                                  tile_width, self.renderer.height)
+                      for i in range(count)]
+        self._drawn: List[Optional[tuple]] = [None] * count
+        self._cleared = False
+        self.tiles_drawn = 0
+
+    def invalidate(self):
+        # Redraw everything, e.g. after the window was covered
+        self._drawn = [None] * self.count
+        self._cleared = False
+
+    def draw(self, states: Sequence[GameState]) -> List[pygame.Rect]:
+        dirty = []
+        if not self._cleared:
+            self.surface.fill(BACKGROUND_COLOR)
+            self._cleared = True
+            dirty.append(self.surface.get_rect())
+        for i, state in enumerate(states[:self.count]):
+            key = (position_key(state), state.game_over, self.labels[i])
+            if self._drawn[i] == key:
+                continue
+            self.renderer.render(self.surface, self.tiles[i].topleft, state, self.labels[i])
+            self._drawn[i] = key
+            self.tiles_drawn += 1
+            dirty.append(self.tiles[i])
+        return dirty
+
+
+class SelfPlayFeed:
+    """Games advanced a few moves per frame, restarted a moment after they end."""
+
+    def __init__(self, count: int, depth: int = 1, moves_per_frame: int = 8, seed: int = 0,
+                 restart_delay: float = 2.0, config: BoardConfig = STANDARD_BOARD):
+        self.config = config
+        self.states = [GameState(config) for _ in range(count)]
+        self.engine = AIEngine(max_depth=depth, weights_path=None, verbose=False) if depth > 0 else None
+        self.moves_per_frame = moves_per_frame
+        self.rng = random.Random(seed)
+        self.restart_delay = restart_delay
+        self._next = 0
+        self._finished_at: Dict[int, float] = {}
+
+    def step(self):
+        now = time.monotonic()
+        for _ in range(self.moves_per_frame):
+            i = self._next
+            self._next = (self._next + 1) % len(self.states)
+            state = self.states[i]
+            if state.game_over:
+                if now - self._finished_at.setdefault(i, now) >= self.restart_delay:
+                    self.states[i] = GameState(self.config)
+                    del self._finished_at[i]
+                continue
+            if self.engine is not None:
+                move, direction = self.engine.get_best_move(state)
+            else:
+                move = self.rng.choice(state.get_valid_moves())
+                direction = self.rng.choice((Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE))
+            state.make_move_instant(move, direction)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Watch many self-play games at once")
+    parser.add_argument("--boards", type=int, default=64)
+    parser.add_argument("--depth", type=int, default=1, help="engine depth, 0 for random moves")
+    parser.add_argument("--moves-per-frame", type=int, default=8)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--pits", type=int, default=5, help="pits per player")
+    args = parser.parse_args()
+    config = BoardConfig(args.pits)
+
+    pygame.init()
+    screen = pygame.display.set_mode((WINDOW_WIDTH, WINDOW_HEIGHT))
+    view = SpectatorView(screen, args.boards, config=config)
+    feed = SelfPlayFeed(args.boards, args.depth, args.moves_per_frame, args.seed, config=config)
+    clock = pygame.time.Clock()
+    last_caption = time.monotonic()
+
+    running = True
+    while running:
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE):
+                running = False
+            elif event.type == pygame.WINDOWEXPOSED:
+                view.invalidate()
+        feed.step()
+        pygame.display.update(view.draw(feed.states))
+        clock.tick(FPS)
+        if time.monotonic() - last_caption > 1.0:
+            pygame.display.set_caption(f"O An Quan - {args.boards} games - {clock.get_fps():.0f} FPS")
+            last_caption = time.monotonic()
+
+    pygame.quit()
+    sys.exit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""Board symmetries and canonical position keys.
+
+Two transformations map an O An Quan position onto an equivalent one:
+
+* side swap: rotate the ring by half its length (six cells on the standard
+  board), so each player's row, the two quan, the scores and the side to
+  move trade places. Directions keep their sense.
+* mirror: reflect the ring around the middle of each row. Each row
+  maps onto itself, the quan trade places and every Direction flips.
+
+Caches keyed by canonical_key() hold one entry per equivalence class. A
+move stored against the canonical position is mapped back with
+from_canonical_move(). A side swap changes who is to move, so values
+stored under a swapped key must be relative to the side to move. Pass
+allow_swap=False for values from AIEngine.evaluate_state, which always
+scores from Player 2's point of view and counts the quan for Player 2.
+"""
+from enum import Enum
+from functools import lru_cache
+from typing import List, Tuple
+
+from .rules import STANDARD_BOARD, BoardConfig, Direction, GameState, Player
+
+
+@lru_cache(maxsize=None)
+def _cell_maps(config: BoardConfig) -> Tuple[List[int], List[int]]:
+    # Cell index -> cell index under a side swap and under a mirror, slot 0 is unused
+    ring = config.cells - 1
+    swap = [0] + [(i + config.pits) % ring + 1 for i in range(1, config.cells)]
+    mirror = [0] + [(config.pits + 1 - i) % ring or ring for i in range(1, config.cells)]
+    return swap, mirror
+
+
+class Symmetry(Enum):
+    IDENTITY = 0
+    MIRROR = 1
+    SWAP = 2
+    SWAP_MIRROR = 3
+
+    @property
+    def swaps_sides(self) -> bool:
+        return self.value & 2 != 0
+
+    @property
+    def mirrors(self) -> bool:
+        return self.value & 1 != 0
+
+
+def map_cell(index: int, symmetry: Symmetry, config: BoardConfig = STANDARD_BOARD) -> int:
+    swap, mirror = _cell_maps(config)
+    if symmetry.swaps_sides:
+        index = swap[index]
+    if symmetry.mirrors:
+        index = mirror[index]
+    return index
+
+
+def map_move(move: Tuple[int, Direction], symmetry: Symmetry,
+             config: BoardConfig = STANDARD_BOARD) -> Tuple[int, Direction]:
+    position, direction = move
+    if symmetry.mirrors:
+        direction = Direction(-direction.value)
+    return map_cell(position, symmetry, config), direction
+
+
+# Every symmetry is its own inverse
+from_canonical_move = map_move
+
+
+def transform_state(state: GameState, symmetry: Symmetry) -> GameState:
+    new_state = state.copy()
+    for i in range(1, state.config.cells):
+        new_state.board[map_cell(i, symmetry, state.config)] = state.board[i]
+    if symmetry.swaps_sides:
+        new_state.player1_score, new_state.player2_score = state.player2_score, state.player1_score
+        new_state.current_player = Player.PLAYER2 if state.current_player == Player.PLAYER1 else Player.PLAYER1
+        if state.winner is not None:
+            new_state.winner = Player.PLAYER2 if state.winner == Player.PLAYER1 else Player.PLAYER1
+    new_state.touch()
+    return new_state
+
+
+def _key(board, player1_score: int, player2_score: int, player: Player) -> bytes:
+    # Same record layout as position_key, so position_from_key decodes it
+    return bytes((*board, player1_score, player2_score, player.value))
+
+
+def canonical_form(state: GameState, allow_swap: bool = True) -> Tuple[bytes, Symmetry]:
+    """Return the canonical key of state and the symmetry that produces it."""
+    board = state.board
+    swap_cell, mirror_cell = _cell_maps(state.config)
+    swap = allow_swap and state.current_player == Player.PLAYER2
+    if swap:
+        board = [board[i] for i in swap_cell]
+        p1_score, p2_score, player = state.player2_score, state.player1_score, Player.PLAYER1
+    else:
+        p1_score, p2_score, player = state.player1_score, state.player2_score, state.current_player
+
+    mirrored = [board[i] for i in mirror_cell]
+    mirror = mirrored < board
+    key = _key(mirrored if mirror else board, p1_score, p2_score, player)
+    return key, Symmetry(2 * swap + mirror)
+
+
+def canonical_key(state: GameState, allow_swap: bool = True) -> bytes:
+    return canonical_form(state, allow_swap)[0]
+
+
+def to_canonical_move(state: GameState, move: Tuple[int, Direction], allow_swap: bool = True) -> Tuple[int, Direction]:
+    return map_move(move, canonical_form(state, allow_swap)[1], state.config)
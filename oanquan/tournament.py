@@ -0,0 +1,296 @@
+"""Match play between AIEngine configurations, with Elo estimates and SPRT.
+
+    python -m oanquan.tournament --engine d3:depth=3 --engine d4:depth=4 --games 200
+    python -m oanquan.tournament --gauntlet --engine fit:depth=4,weights=weights.json \\
+        --engine base:depth=4 --engine t05:time=0.5 --sprt --elo1 30
+
+Every pairing plays each opening twice, once with each engine moving
+first. Openings are short random lines from the start position, no two of
+them equal under the board symmetries. Games run in a spawn-based process
+pool. A pairing with --sprt stops as soon as its sequential probability
+ratio test accepts either hypothesis. Time-limited engines only compare
+fairly when there is one free core per worker.
+"""
+import argparse
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .engine import AIEngine
+from .evaluation import load_weights
+from .rules import Direction, GameState, Player
+from .symmetry import canonical_key
+
+MAX_PLIES = 400
+
+
+class EngineConfig(NamedTuple):
+    name: str
+    depth: int = 4
+    time_limit: Optional[float] = None
+    # Weights file; None plays with DEFAULT_WEIGHTS
+    weights: Optional[str] = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "EngineConfig":
+        """Build a config from NAME:key=value,... (keys: depth, time, weights)."""
+        name, _, options = spec.partition(":")
+        fields = {"name": name}
+        for option in filter(None, options.split(",")):
+            key, _, value = option.partition("=")
+            if key == "depth":
+                fields["depth"] = int(value)
+            elif key == "time":
+                fields["time_limit"] = float(value)
+                fields.setdefault("depth", 30)
+            elif key == "weights":
+                fields["weights"] = value
+            else:
+                raise ValueError(f"unknown engine option {key!r} in {spec!r}")
+        return cls(**fields)
+
+
+def generate_openings(count: int, plies: int = 4, seed: int = 0) -> List[Tuple[Tuple[int, int], ...]]:
+    """Distinct random opening lines, as (pit, direction value) moves."""
+    rng = random.Random(seed)
+    openings = []
+    seen = set()
+    for _ in range(count * 100):
+        if len(openings) == count:
+            break
+        state = GameState()
+        line = []
+        for _ in range(plies):
+            move = rng.choice(state.get_valid_moves())
+            direction = rng.choice((Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE))
+            state.make_move_instant(move, direction)
+            line.append((move, direction.value))
+            if state.game_over:
+                break
+        key = canonical_key(state)
+        if not state.game_over and key not in seen:
+            seen.add(key)
+            openings.append(tuple(line))
+    if len(openings) < count:
+        raise ValueError(f"only {len(openings)} distinct {plies}-ply openings found; use longer openings")
+    return openings
+
+
+_worker_engines: Dict[EngineConfig, AIEngine] = {}
+
+
+def _engine(config: EngineConfig) -> AIEngine:
+    engine = _worker_engines.get(config)
+    if engine is None:
+        engine = AIEngine(max_depth=config.depth, time_limit=config.time_limit, weights_path=None, verbose=False)
+        engine.weights = load_weights(config.weights)
+        _worker_engines[config] = engine
+    return engine
+
+
+def play_game(first: EngineConfig, second: EngineConfig, opening) -> float:
+    """Play one game from an opening; returns the score of `first` (1, 0.5 or 0).
+
+    `first` moves for Player 1 after the opening line. Games still running
+    after MAX_PLIES plies are scored as draws.
+    """
+    state = GameState()
+    for move, direction in opening:
+        state.make_move_instant(move, Direction(direction))
+    engines = {Player.PLAYER1: _engine(first), Player.PLAYER2: _engine(second)}
+    for engine in engines.values():
+        engine.tt.clear()
+
+    while not state.game_over and state.move_count < MAX_PLIES:
+        move, direction = engines[state.current_player].get_best_move(state)
+        state.make_move_instant(move, direction)
+
+    if state.winner == Player.PLAYER1:
+        return 1.0
+    if state.winner == Player.PLAYER2:
+        return 0.0
+    return 0.5
+
+
+def _play_job(args) -> Tuple[int, float]:
+    pairing, first, second, opening, swapped = args
+    score = play_game(first, second, opening)
+    return pairing, (1.0 - score) if swapped else score
+
+
+def expected_score(elo: float) -> float:
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def score_to_elo(score: float) -> float:
+    score = min(max(score, 1e-6), 1.0 - 1e-6)
+    return -400.0 * math.log10(1.0 / score - 1.0)
+
+
+class MatchStats:
+    """Wins, draws and losses of engine A against engine B."""
+
+    def __init__(self):
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+
+    @property
+    def games(self) -> int:
+        return self.wins + self.draws + self.losses
+
+    def add(self, score: float):
+        if score == 1.0:
+            self.wins += 1
+        elif score == 0.0:
+            self.losses += 1
+        else:
+            self.draws += 1
+
+    def score(self) -> float:
+        return (self.wins + 0.5 * self.draws) / self.games if self.games else 0.5
+
+    def variance(self) -> float:
+        # Per-game variance of the score, from the observed result frequencies
+        if not self.games:
+            return 0.0
+        mean = self.score()
+        return (self.wins + 0.25 * self.draws) / self.games - mean * mean
+
+    def elo(self, z: float = 1.96) -> Tuple[float, float, float]:
+        """Elo difference of A over B with a (lower, upper) interval at the given z."""
+        mean = self.score()
+        margin = z * math.sqrt(self.variance() / self.games) if self.games else 0.5
+        return score_to_elo(mean), score_to_elo(mean - margin), score_to_elo(mean + margin)
+
+    def llr(self, elo0: float, elo1: float) -> float:
+        """Log-likelihood ratio of H1 (elo1) over H0 (elo0), normal approximation."""
+        variance = self.variance()
+        if not self.games or variance <= 0.0:
+            return 0.0
+        s0, s1 = expected_score(elo0), expected_score(elo1)
+        return self.games * (s1 - s0) * (2.0 * self.score() - s0 - s1) / (2.0 * variance)
+
+
+class SPRT:
+    def __init__(self, elo0: float = 0.0, elo1: float = 30.0, alpha: float = 0.05, beta: float = 0.05):
+        self.elo0 = elo0
+        self.elo1 = elo1
+        self.lower = math.log(beta / (1.0 - alpha))
+        self.upper = math.log((1.0 - beta) / alpha)
+
+    def decision(self, stats: MatchStats) -> Optional[str]:
+        """The accepted hypothesis, "H1" or "H0", or None while inconclusive."""
+        llr = stats.llr(self.elo0, self.elo1)
+        if llr >= self.upper:
+            return "H1"
+        if llr <= self.lower:
+            return "H0"
+        return None
+
+
+def pairings(configs: List[EngineConfig], gauntlet: bool = False) -> List[Tuple[int, int]]:
+    if gauntlet:
+        return [(0, j) for j in range(1, len(configs))]
+    return list(itertools.combinations(range(len(configs)), 2))
+
+
+def run_tournament(configs: List[EngineConfig], games: int, workers: int = os.cpu_count() or 1,
+                   gauntlet: bool = False, sprt: Optional[SPRT] = None, opening_plies: int = 4, seed: int = 0,
+                   verbose: bool = True) -> dict:
+    """Play up to `games` games per pairing and return the results by pairing."""
+    if len({config.name for config in configs}) != len(configs):
+        raise ValueError("engine names must be unique")
+    pairs = pairings(configs, gauntlet)
+    openings = generate_openings((games + 1) // 2, opening_plies, seed)
+    stats = [MatchStats() for _ in pairs]
+    decisions: List[Optional[str]] = [None] * len(pairs)
+
+    def jobs_for(index):
+        a, b = pairs[index]
+        for opening in openings:
+            yield index, configs[a], configs[b], opening, False
+            yield index, configs[b], configs[a], opening, True
+
+    # Interleave the pairings so every one of them makes progress
+    queues = [itertools.islice(jobs_for(index), games) for index in range(len(pairs))]
+    schedule = (job for round_ in itertools.zip_longest(*queues) for job in round_ if job is not None)
+    in_flight = set()
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        while True:
+            # Keep a bounded number of games queued, skipping pairings SPRT has already decided
+            while len(in_flight) < 2 * workers:
+                job = next((job for job in schedule if decisions[job[0]] is None), None)
+                if job is None:
+                    break
+                in_flight.add(pool.submit(_play_job, job))
+            if not in_flight:
+                break
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index, score = future.result()
+                stats[index].add(score)
+                if sprt is not None and decisions[index] is None:
+                    decisions[index] = sprt.decision(stats[index])
+                    if decisions[index] and verbose:
+                        a, b = pairs[index]
+                        print(f"SPRT {configs[a].name} vs {configs[b].name}: accepted {decisions[index]} "
+                              f"after {stats[index].games} games")
+
+    results = []
+    for (a, b), match, decision in zip(pairs, stats, decisions):
+        elo, low, high = match.elo()
+        results.append({
+            "a": configs[a].name, "b": configs[b].name,
+            "wins": match.wins, "draws": match.draws, "losses": match.losses,
+            "score": match.score(), "elo": elo, "elo_low": low, "elo_high": high,
+            "llr": match.llr(sprt.elo0, sprt.elo1) if sprt else None, "sprt": decision,
+        })
+    return {"engines": [config._asdict() for config in configs], "pairings": results}
+
+
+def print_results(summary: dict):
+    for row in summary["pairings"]:
+        games = row["wins"] + row["draws"] + row["losses"]
+        line = (f"{row['a']:>12s} vs {row['b']:<12s} +{row['wins']} ={row['draws']} -{row['losses']} "
+                f"({games} games)  Elo {row['elo']:+7.1f} [{row['elo_low']:+7.1f}, {row['elo_high']:+7.1f}]")
+        if row["llr"] is not None:
+            line += f"  LLR {row['llr']:+.2f} {row['sprt'] or 'undecided'}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin or gauntlet matches between engine configurations")
+    parser.add_argument("--engine", action="append", required=True, metavar="NAME:depth=4,time=0.5,weights=PATH",
+                        help="engine configuration; give at least two")
+    parser.add_argument("--games", type=int, default=100, help="maximum games per pairing")
+    parser.add_argument("--gauntlet", action="store_true", help="play the first engine against each of the others")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--opening-plies", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--sprt", action="store_true", help="stop a pairing once SPRT is conclusive")
+    parser.add_argument("--elo0", type=float, default=0.0)
+    parser.add_argument("--elo1", type=float, default=30.0)
+    parser.add_argument("--alpha", type=float, default=0.05)
+    parser.add_argument("--beta", type=float, default=0.05)
+    parser.add_argument("--out", help="write the results as JSON")
+    args = parser.parse_args()
+
+    configs = [EngineConfig.parse(spec) for spec in args.engine]
+    if len(configs) < 2:
+        parser.error("give at least two --engine configurations")
+    sprt = SPRT(args.elo0, args.elo1, args.alpha, args.beta) if args.sprt else None
+    summary = run_tournament(configs, args.games, args.workers, args.gauntlet, sprt, args.opening_plies, args.seed)
+    print_results(summary)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
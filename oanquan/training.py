@@ -0,0 +1,216 @@
+"""Self-play data generation and evaluation weight fitting.
+
+    python -m oanquan.training generate --games 100000 --out selfplay/
+    python -m oanquan.training fit --data selfplay/ --model linear --out weights.json
+
+`generate` plays AIEngine against itself in worker processes. It streams
+every position with the final result into fixed-size .npz chunks, so memory
+does not grow with the number of games. `fit` streams the chunks back and
+fits the evaluate_state weights. It writes a JSON weights file that
+AIEngine loads at startup (weights.json in the project root by default).
+"""
+import argparse
+import glob
+import json
+import os
+import random
+from multiprocessing import Pool
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .codec import RECORD_SIZE, SCORE1, SCORE2, records_from_keys
+from .engine import AIEngine
+from .evaluation import WEIGHTS_PATH
+from .rules import Direction, GameState, Player, position_key
+
+FEATURES = ("score_diff", "position_weight", "quan_value")
+DEFAULT_CHUNK_SIZE = 1 << 16
+MAX_PLIES = 400
+
+
+def extract_features(records: np.ndarray) -> np.ndarray:
+    """Feature matrix for a batch of raw records, from Player 2's point of view.
+
+    Column j is the term that evaluate_state multiplies by weight FEATURES[j].
+    """
+    records = records.astype(np.int32, copy=False)
+    features = np.empty((len(records), len(FEATURES)), dtype=np.float64)
+    features[:, 0] = records[:, SCORE2] - records[:, SCORE1]
+    features[:, 1] = records[:, 1:6].sum(axis=1) - records[:, 7:12].sum(axis=1)
+    features[:, 2] = records[:, 6] + records[:, 12]
+    return features
+
+
+def play_selfplay_game(seed: int, depth: int = 2, random_plies: int = 4,
+                       epsilon: float = 0.1) -> Optional[Tuple[List[bytes], float, int]]:
+    """Play one game and return (positions, outcome, final margin).
+
+    outcome is 1.0/0.5/0.0 for a Player 2 win/draw/loss and margin is the
+    final Player 2 minus Player 1 score. Games that hit MAX_PLIES are dropped.
+    """
+    rng = random.Random(seed)
+    engine = AIEngine(max_depth=depth, weights_path=None, verbose=False)
+    state = GameState()
+    positions = []
+
+    while not state.game_over:
+        if state.move_count >= MAX_PLIES:
+            return None
+        positions.append(position_key(state))
+        if state.move_count < random_plies or rng.random() < epsilon:
+            move = rng.choice(state.get_valid_moves())
+            direction = rng.choice((Direction.CLOCKWISE, Direction.COUNTER_CLOCKWISE))
+        else:
+            move, direction = engine.get_best_move(state)
+        state.make_move_instant(move, direction)
+
+    if state.winner == Player.PLAYER2:
+        outcome = 1.0
+    elif state.winner == Player.PLAYER1:
+        outcome = 0.0
+    else:
+        outcome = 0.5
+    return positions, outcome, state.player2_score - state.player1_score
+
+
+def _play_job(args):
+    return play_selfplay_game(*args)
+
+
+class ChunkWriter:
+    def __init__(self, out_dir: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        os.makedirs(out_dir, exist_ok=True)
+        self.out_dir = out_dir
+        self.chunk_size = chunk_size
+        self.records = np.empty((chunk_size, RECORD_SIZE), dtype=np.uint8)
+        self.outcomes = np.empty(chunk_size, dtype=np.float32)
+        self.margins = np.empty(chunk_size, dtype=np.float32)
+        self.fill = 0
+        self.chunks_written = len(glob.glob(os.path.join(out_dir, "chunk_*.npz")))
+        self.positions_written = 0
+
+    def add_game(self, positions, outcome: float, margin: float):
+        rows = records_from_keys(positions)
+        start = 0
+        while start < len(rows):
+            count = min(len(rows) - start, self.chunk_size - self.fill)
+            end = self.fill + count
+            self.records[self.fill:end] = rows[start:start + count]
+            self.outcomes[self.fill:end] = outcome
+            self.margins[self.fill:end] = margin
+            self.fill = end
+            start += count
+            if self.fill == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        if not self.fill:
+            return
+        path = os.path.join(self.out_dir, f"chunk_{self.chunks_written:05d}.npz")
+        np.savez(path, records=self.records[:self.fill], outcomes=self.outcomes[:self.fill],
+                 margins=self.margins[:self.fill])
+        self.chunks_written += 1
+        self.positions_written += self.fill
+        self.fill = 0
+
+
+def generate(out_dir: str, games: int, workers: int = os.cpu_count() or 1, depth: int = 2,
+             chunk_size: int = DEFAULT_CHUNK_SIZE, seed: int = 0) -> int:
+    writer = ChunkWriter(out_dir, chunk_size)
+    jobs = ((seed + i, depth) for i in range(games))
+    finished = dropped = 0
+    with Pool(workers) as pool:
+        # imap keeps only a bounded number of finished games in flight
+        for result in pool.imap_unordered(_play_job, jobs, chunksize=16):
+            if result is None:
+                dropped += 1
+            else:
+                writer.add_game(*result)
+                finished += 1
+            if (finished + dropped) % 1000 == 0:
+                print(f"{finished + dropped}/{games} games, {writer.positions_written + writer.fill} positions")
+    writer.flush()
+    print(f"Wrote {writer.positions_written} positions from {finished} games ({dropped} dropped at {MAX_PLIES} plies)")
+    return writer.positions_written
+
+
+def iter_chunks(data_dir: str):
+    for path in sorted(glob.glob(os.path.join(data_dir, "chunk_*.npz"))):
+        with np.load(path) as chunk:
+            yield extract_features(chunk["records"]), chunk["outcomes"], chunk["margins"]
+
+
+def _with_intercept(features: np.ndarray) -> np.ndarray:
+    return np.hstack([features, np.ones((len(features), 1))])
+
+
+def fit_linear(data_dir: str, ridge: float = 1e-6) -> np.ndarray:
+    """Least squares fit of the final score margin, one streaming pass."""
+    n = len(FEATURES) + 1
+    xtx = np.zeros((n, n))
+    xty = np.zeros(n)
+    for features, _, margins in iter_chunks(data_dir):
+        x = _with_intercept(features)
+        xtx += x.T @ x
+        xty += x.T @ margins
+    coef = np.linalg.solve(xtx + ridge * np.eye(n), xty)
+    return coef[:-1]
+
+
+def fit_logistic(data_dir: str, iterations: int = 10, ridge: float = 1e-6, tol: float = 1e-8) -> np.ndarray:
+    """Logistic fit of the game result by Newton's method, one pass per iteration."""
+    n = len(FEATURES) + 1
+    coef = np.zeros(n)
+    for _ in range(iterations):
+        hessian = ridge * np.eye(n)
+        gradient = -ridge * coef
+        for features, outcomes, _ in iter_chunks(data_dir):
+            x = _with_intercept(features)
+            p = 1.0 / (1.0 + np.exp(-(x @ coef)))
+            gradient += x.T @ (outcomes - p)
+            hessian += (x * (p * (1.0 - p))[:, None]).T @ x
+        step = np.linalg.solve(hessian, gradient)
+        coef += step
+        if np.abs(step).max() < tol:
+            break
+    return coef[:-1]
+
+
+def fit(data_dir: str, model: str = "linear") -> dict:
+    coef = fit_linear(data_dir) if model == "linear" else fit_logistic(data_dir)
+    if coef[0] <= 0:
+        raise ValueError("fitted score_diff weight is not positive; generate more games")
+    # evaluate_state works in points: keep score_diff at 1 so the terminal value still dominates
+    return {name: float(value / coef[0]) for name, value in zip(FEATURES, coef)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Self-play data and evaluation weight fitting")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    gen = commands.add_parser("generate", help="play self-play games into .npz chunks")
+    gen.add_argument("--out", required=True)
+    gen.add_argument("--games", type=int, default=10000)
+    gen.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    gen.add_argument("--depth", type=int, default=2)
+    gen.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    gen.add_argument("--seed", type=int, default=0)
+
+    fit_cmd = commands.add_parser("fit", help="fit evaluate_state weights from chunks")
+    fit_cmd.add_argument("--data", required=True)
+    fit_cmd.add_argument("--model", choices=("linear", "logistic"), default="linear")
+    fit_cmd.add_argument("--out", default=WEIGHTS_PATH)
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        generate(args.out, args.games, args.workers, args.depth, args.chunk_size, args.seed)
+    else:
+        weights = fit(args.data, args.model)
+        with open(args.out, "w") as f:
+            json.dump(weights, f, indent=2)
+        print(f"Wrote {args.out}: {weights}")
+
+
+if __name__ == "__main__":
+    main()
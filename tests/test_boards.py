@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from oanquan import AIEngine
+from oanquan.replay import GameRecord, Replay
+from oanquan.rules import STANDARD_BOARD, BoardConfig, Direction, GameState, Player, position_from_key, position_key
+
+CONFIGS = [BoardConfig(1, 3, 5), BoardConfig(3, 2, 4), STANDARD_BOARD, BoardConfig(7, 3, 10), BoardConfig(9, 4, 20)]
+
+
+@pytest.mark.parametrize("config", CONFIGS, ids=repr)
+def test_layout(config):
+    pits = config.pits
+    board = config.initial_board()
+    assert len(board) == config.cells == 2 * pits + 3
+    assert board[0] == 0 and sum(board) == config.total_stones
+    assert [board[quan] for quan in config.quans] == [config.quan_stones] * 2
+    assert all(board[pit] == config.stones for pit in (*config.player1_pits, *config.player2_pits))
+    # Both directions walk the whole ring of cells 1..cells-1, one the reverse of the other
+    for step, back in ((config.next_clockwise, config.next_counter_clockwise),
+                       (config.next_counter_clockwise, config.next_clockwise)):
+        seen, cell = [], 1
+        for _ in range(config.cells - 1):
+            seen.append(cell)
+            assert back[step[cell]] == cell
+            cell = step[cell]
+        assert cell == 1 and sorted(seen) == list(range(1, config.cells))
+
+
+def test_rejects_boards_that_do_not_fit():
+    with pytest.raises(ValueError):
+        BoardConfig(0)
+    with pytest.raises(ValueError):
+        BoardConfig(20, 6, 10)
+
+
+@pytest.mark.parametrize("config", CONFIGS, ids=repr)
+def test_keys_round_trip(config):
+    rng = random.Random(5)
+    state = GameState(config)
+    while not state.game_over:
+        key = position_key(state)
+        assert len(key) == config.key_size
+        for restored in (position_from_key(key, config), position_from_key(key)):
+            assert position_key(restored) == key
+            assert restored.config.pits == config.pits
+        state.make_move_instant(rng.choice(state.get_valid_moves()), rng.choice(list(Direction)))
+
+
+@pytest.mark.parametrize("config", [BoardConfig(24, 1, 10), BoardConfig(7, 3, 4)], ids=repr)
+def test_records_keep_the_stone_counts(config):
+    # Neither board fits a key with the default 5 stones per pit and 10 per quan
+    rng = random.Random(3)
+    state = GameState(config)
+    moves = []
+    while not state.game_over and len(moves) < 12:
+        move = (rng.choice(state.get_valid_moves()), rng.choice(list(Direction)))
+        state.make_move_instant(*move)
+        moves.append(move)
+    key = position_key(state)
+    assert position_from_key(key, config).config == config
+    record = GameRecord.from_json(GameRecord(moves, start=GameState(config)).to_json())
+    assert record.start_state().config == config
+    replay = Replay(record, checkpoint_interval=4)
+    assert position_key(replay.seek(len(moves))) == key
+    assert replay.seek(len(moves) // 2).config == config
+
+
+@pytest.mark.parametrize("config", CONFIGS, ids=repr)
+def test_refill_costs_one_point_per_pit(config):
+    state = GameState(config)
+    for pit in config.player1_pits:
+        state.board[pit] = 0
+    state.player1_score = config.pits
+    state.touch()
+    assert state.get_valid_moves() == list(config.player1_pits) and not state.game_over
+    state.make_move_instant(state.get_valid_moves()[0], Direction.CLOCKWISE)
+    assert state.player1_score == 0
+    assert [state.board[pit] for pit in config.player1_pits] == [1] * config.pits
+
+
+@pytest.mark.parametrize("config", CONFIGS, ids=repr)
+def test_engine_plays_any_board(config):
+    state = GameState(config)
+    pit, direction = AIEngine(max_depth=2, weights_path=None, verbose=False).get_best_move(state)
+    assert state.current_player == Player.PLAYER1 and pit in config.player1_pits
@@ -0,0 +1,49 @@
+import random
+
+import numpy as np
+import pytest
+
+from oanquan import codec
+from oanquan.rules import Direction, GameState, position_key
+
+
+def sample_states(count: int, seed: int = 1):
+    rng = random.Random(seed)
+    states, state = [], GameState()
+    while len(states) < count:
+        if state.game_over:
+            state = GameState()
+        state.make_move_instant(rng.choice(state.get_valid_moves()), rng.choice(list(Direction)))
+        states.append(state.copy())
+    return states
+
+
+def test_single_positions_round_trip():
+    for state in sample_states(200):
+        key = position_key(state)
+        assert position_key(codec.decode(codec.encode(state))) == key
+        assert position_key(codec.unpack(codec.pack(state))) == key
+        assert codec.pack(state) == int.from_bytes(key, "big")
+
+
+def test_batches_round_trip():
+    states = sample_states(500)
+    records = codec.encode_batch(states)
+    assert records.shape == (500, codec.RECORD_SIZE) and records.dtype == np.uint8
+    assert [position_key(state) for state in codec.decode_batch(records)] == [position_key(s) for s in states]
+    assert codec.pack_batch(records) == [codec.pack(state) for state in states]
+    assert np.array_equal(codec.unpack_batch(codec.pack_batch(records)), records)
+
+
+@pytest.mark.parametrize("count", [0, 1, 7])
+def test_arbitrary_records_round_trip(count):
+    records = np.random.default_rng(count).integers(0, 256, (count, codec.RECORD_SIZE), dtype=np.uint8)
+    if count:
+        # Trailing zero bytes must survive the conversion to bytes
+        records[0, -4:] = 0
+    keys = codec.keys_from_records(records)
+    assert keys == [bytes(record) for record in records]
+    assert np.array_equal(codec.records_from_keys(keys), records)
+    values = codec.pack_batch(records)
+    assert values == [int.from_bytes(key, "big") for key in keys]
+    assert np.array_equal(codec.unpack_batch(iter(values)), records)
@@ -0,0 +1,111 @@
+import random
+
+import pytest
+
+from oanquan import AIEngine, Direction, GameState
+from oanquan.instrument import InstrumentedEngine
+
+
+class NoTable(dict):
+    """A transposition table that never keeps anything."""
+
+    def __setitem__(self, key, value):
+        pass
+
+
+def negamax(engine, state, depth, ply, max_ply):
+    # Plain full-window negamax with the engine's move set, capture extension and evaluation
+    valid_moves = state.get_valid_moves()
+    if depth <= 0 or state.game_over or not valid_moves:
+        return engine._relative_eval(state)
+    best = float("-inf")
+    for _, child, gain in engine._ordered_children(state, valid_moves, None):
+        new_depth = depth - 1
+        if engine.CAPTURE_EXTENSION and gain > 0 and new_depth == 0 and ply < max_ply:
+            new_depth = 1
+        score = negamax(engine, child, new_depth, ply + 1, max_ply)
+        best = max(best, score if child.current_player == state.current_player else -score)
+    return best
+
+
+def sample_positions(count, seed=3):
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        state = GameState()
+        for _ in range(rng.randrange(0, 30)):
+            if state.game_over:
+                break
+            state.make_move_instant(rng.choice(state.get_valid_moves()), rng.choice(list(Direction)))
+        if not state.game_over:
+            positions.append(state)
+    return positions
+
+
+def engine(table: bool, reductions: bool):
+    engine = AIEngine(weights_path=None, verbose=False)
+    if not table:
+        engine.tt = NoTable()
+    if not reductions:
+        engine.LMR_MIN_DEPTH = 1000
+    return engine
+
+
+@pytest.mark.parametrize("depth", [1, 2, 3])
+@pytest.mark.parametrize("table", [False, True], ids=["no-table", "table"])
+def test_pvs_matches_negamax(depth, table):
+    for state in sample_positions(12):
+        search = engine(table, reductions=False)
+        expected = negamax(search, state, depth, 0, depth + 2)
+        assert search._search_root(state, depth, 0.0) == pytest.approx(expected)
+
+
+@pytest.mark.parametrize("depth", [1, 2])
+def test_reductions_leave_shallow_searches_exact(depth):
+    # Late-move reductions start at LMR_MIN_DEPTH, so shallower searches are still exact
+    for state in sample_positions(12):
+        search = engine(table=True, reductions=True)
+        assert depth < search.LMR_MIN_DEPTH
+        assert search._search_root(state, depth, 0.0) == pytest.approx(negamax(search, state, depth, 0, depth + 2))
+
+
+def test_best_move_is_legal_and_pv_starts_with_it():
+    for state in sample_positions(6):
+        search = AIEngine(max_depth=4, weights_path=None, verbose=False)
+        pit, direction = search.get_best_move(state)
+        assert pit in state.get_valid_moves()
+        assert search.iterations[-1]["pv"][0] == (pit, direction)
+
+
+def test_iterations_time_each_depth_on_its_own():
+    search = AIEngine(max_depth=5, weights_path=None, verbose=False)
+    search.get_best_move(sample_positions(1)[0])
+    elapsed = 0.0
+    for iteration in search.iterations:
+        assert 0 <= iteration["seconds"] <= iteration["total_seconds"]
+        elapsed += iteration["seconds"]
+        assert elapsed <= iteration["total_seconds"] + 1e-6
+
+
+class FirstDrawOnly:
+    """Stands in for random.Random: keeps the first sampled subtree and no other."""
+
+    def __init__(self):
+        self.draws = 0
+
+    def random(self):
+        self.draws += 1
+        return 0.0 if self.draws == 1 else 1.0
+
+
+def test_trace_keeps_whole_sampled_subtrees():
+    search = InstrumentedEngine(max_depth=4, weights_path=None, verbose=False, trace_rate=0.5, trace_full_plies=1)
+    search._rng = FirstDrawOnly()
+    search.get_best_move(GameState())
+    nodes = {node["id"]: node for node in search.trace}
+    assert all(node["parent"] is None or node["parent"] in nodes for node in nodes.values())
+    sampled = [node for node in nodes.values() if node["ply"] == 2]
+    assert len(sampled) == 1
+    # Nodes below the sampled ply are kept with their subtree root, without draws of their own
+    assert max(node["ply"] for node in nodes.values()) > 2
+    assert search._rng.draws == search.stats.nodes_by_ply[2]
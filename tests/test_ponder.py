@@ -0,0 +1,33 @@
+import time
+
+from oanquan import AIEngine, Direction, GameState
+from oanquan.ponder import Ponderer
+
+
+def human_move():
+    state = GameState()
+    assert state.make_move_instant(9, Direction.CLOCKWISE)
+    return state
+
+
+def test_take_stops_a_running_search_without_waiting():
+    ponderer = Ponderer(AIEngine(max_depth=30, weights_path=None, verbose=False))
+    state = human_move()
+    ponderer.focus(state)
+    assert not ponderer.ready(state)
+    start = time.perf_counter()
+    assert ponderer.take(state) is None
+    assert time.perf_counter() - start < 1.0
+    assert ponderer.thread is None and ponderer.misses == 1
+
+
+def test_ready_once_the_focused_search_finishes():
+    engine = AIEngine(max_depth=3, weights_path=None, verbose=False)
+    ponderer = Ponderer(engine)
+    state = human_move()
+    ponderer.focus(state)
+    deadline = time.perf_counter() + 30
+    while not ponderer.ready(state) and time.perf_counter() < deadline:
+        time.sleep(0.01)
+    assert ponderer.take(state) == engine.get_best_move(state)
+    assert ponderer.hits == 1
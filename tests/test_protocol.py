@@ -0,0 +1,66 @@
+import time
+
+import pytest
+
+from oanquan.protocol import EngineSession
+
+
+@pytest.fixture
+def session():
+    lines = []
+    session = EngineSession(lines.append)
+    session.lines = lines
+    yield session
+    session.stop()
+
+
+def finish(session):
+    if session.thread is not None:
+        session.thread.join()
+    return session.lines
+
+
+@pytest.mark.parametrize("command", ["go depth 0", "go depth -3", "go nodes -1", "go movetime -5"])
+def test_go_rejects_out_of_range_limits(session, command):
+    session.handle(command)
+    assert session.thread is None
+    assert len(session.lines) == 1 and session.lines[0].startswith("error")
+
+
+def test_go_answers_a_legal_move(session):
+    session.handle("position startpos moves 7cw")
+    session.handle("go depth 2")
+    lines = finish(session)
+    assert [line.split()[0] for line in lines] == ["info", "info", "bestmove"]
+    move = lines[-1].split()[1]
+    assert move != "none" and "None" not in move
+
+
+def test_bestmove_none_when_the_game_is_over(session):
+    session.state.game_over = True
+    session.handle("go depth 3")
+    assert finish(session) == ["bestmove none"]
+
+
+def test_infinite_holds_bestmove_until_stop(session):
+    session.handle("go infinite depth 2")
+    deadline = time.monotonic() + 30
+    while sum(line.startswith("info") for line in session.lines) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    # The search is done, but bestmove waits for stop
+    session.thread.join(0.2)
+    assert session.thread.is_alive()
+    assert not any(line.startswith("bestmove") for line in session.lines)
+    session.handle("stop")
+    assert session.lines[-1].startswith("bestmove") and session.lines[-1] != "bestmove none"
+
+
+def test_failed_search_still_answers_bestmove(session, monkeypatch):
+    def fail(state):
+        raise RuntimeError("broken")
+
+    monkeypatch.setattr(session.engine, "get_best_move", fail)
+    session.handle("go depth 2")
+    lines = finish(session)
+    assert lines[0].startswith("error") and "broken" in lines[0]
+    assert lines[-1].startswith("bestmove") and lines[-1] != "bestmove none"
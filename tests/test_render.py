@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+
+import pytest
+
+pytest.importorskip("pygame")
+
+from oanquan import Direction, GameRecord, GameState
+from oanquan.positiondb import DB_PATH
+from oanquan.render import GameRenderer, main
+
+
+class FrameCounter:
+    def __init__(self):
+        self.frames = 0
+
+    def write(self, index, width, height, rgb):
+        assert len(rgb) == width * height * 3
+        self.frames += 1
+
+
+def short_record(plies: int = 3, seed: int = 1) -> GameRecord:
+    rng = random.Random(seed)
+    state = GameState()
+    moves = []
+    for _ in range(plies):
+        move = (rng.choice(state.get_valid_moves()), rng.choice(list(Direction)))
+        state.make_move_instant(*move)
+        moves.append(move)
+    return GameRecord(moves)
+
+
+def test_render_leaves_no_position_db():
+    existed = os.path.exists(DB_PATH)
+    renderer = GameRenderer(short_record(), fps=30, hold_frames=1)
+    assert renderer.game.ai_engine.position_db is None
+    writer = FrameCounter()
+    assert renderer.render(writer) == writer.frames > 0
+    assert os.path.exists(DB_PATH) == existed
+
+
+def test_renderer_rejects_zero_fps():
+    with pytest.raises(ValueError):
+        GameRenderer(short_record(), fps=0)
+
+
+@pytest.mark.parametrize("fps", ["0", "-30"])
+def test_cli_rejects_fps_below_one(monkeypatch, tmp_path, fps):
+    monkeypatch.setattr(sys, "argv", ["render", str(tmp_path / "game.json"), "--out", str(tmp_path), "--fps", fps])
+    with pytest.raises(SystemExit) as exit_info:
+        main()
+    assert exit_info.value.code == 2
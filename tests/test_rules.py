@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from oanquan.rules import BoardConfig, Direction, GameState, Player
+
+
+def position(board, player=Player.PLAYER1, player1_score=0, player2_score=0):
+    state = GameState()
+    state.board = list(board)
+    state.current_player = player
+    state.player1_score = player1_score
+    state.player2_score = player2_score
+    state.touch()
+    return state
+
+
+def stones(state):
+    return sum(state.board) + state.player1_score + state.player2_score
+
+
+def test_captured_cells_are_emptied_and_scored():
+    # 7 sows into 8; 9 is empty so 10 is taken, then 11 is empty so the quan at 12 is taken too
+    state = position([0, 3, 0, 2, 0, 4, 10, 1, 0, 0, 4, 0, 10])
+    captures = []
+    assert state.make_move_instant(7, Direction.CLOCKWISE, captures)
+    assert captures == [10, 12]
+    assert state.board[10] == state.board[12] == 0
+    assert state.player1_score == 14
+    assert state.current_player == Player.PLAYER2 and not state.game_over
+
+
+def test_sowing_that_stops_before_a_quan_captures_nothing():
+    state = position([0, 3, 0, 2, 0, 4, 10, 0, 0, 0, 1, 0, 10])
+    captures = []
+    assert state.make_move_instant(10, Direction.CLOCKWISE, captures)
+    assert captures == [] and state.player1_score == 0
+    assert state.board[11] == 1
+
+
+def test_a_capture_chain_never_takes_a_cell_twice():
+    # Every other cell empty all the way round: the chain must stop instead of looping
+    state = position([0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0, 1, 0])
+    state.board[6] = 1
+    captures = []
+    state.make_move_instant(7, Direction.CLOCKWISE, captures)
+    assert len(captures) == len(set(captures))
+
+
+def test_game_ends_when_both_quan_are_empty():
+    state = position([0, 0, 0, 0, 0, 2, 0, 1, 0, 0, 0, 0, 0], player1_score=10, player2_score=20)
+    state._check_game_over()
+    assert state.game_over
+    # The stones left in each row go to the row's owner
+    assert (state.player1_score, state.player2_score) == (11, 22)
+    assert state.winner == Player.PLAYER2
+
+
+def test_side_without_stones_or_points_to_refill_loses():
+    state = position([0, 1, 0, 0, 0, 0, 10, 0, 0, 0, 0, 0, 10], player1_score=4)
+    state._check_game_over()
+    assert state.game_over and state.winner == Player.PLAYER2
+
+
+def test_side_without_stones_refills_its_row_for_one_point_per_pit():
+    state = position([0, 1, 0, 0, 0, 0, 10, 0, 0, 0, 0, 0, 10], player1_score=7)
+    assert state.get_valid_moves() == [7, 8, 9, 10, 11] and not state.game_over
+    state.make_move_instant(7, Direction.CLOCKWISE)
+    assert state.board[7:12] == [1] * 5 and state.player1_score == 2
+
+
+@pytest.mark.parametrize("config", [BoardConfig(), BoardConfig(3, 2, 4), BoardConfig(7, 3, 10)])
+def test_random_games_conserve_stones_and_end(config):
+    rng = random.Random(7)
+    for _ in range(20):
+        state = GameState(config)
+        for _ in range(1000):
+            if state.game_over:
+                break
+            assert state.make_move_instant(rng.choice(state.get_valid_moves()), rng.choice(list(Direction)))
+            assert stones(state) == config.total_stones
+        assert state.game_over
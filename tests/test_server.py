@@ -0,0 +1,109 @@
+import asyncio
+import json
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from oanquan.rules import Player
+from oanquan.server import GameServer, ServerError
+
+
+class BrokenPool:
+    def submit(self, *args, **kwargs):
+        raise BrokenProcessPool("worker died")
+
+    def shutdown(self, *args, **kwargs):
+        pass
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+@pytest.fixture
+def server():
+    server = GameServer(workers=1, depth=2)
+    yield server
+    server.shutdown()
+
+
+async def new_game(server):
+    return (await server.handle_request({"cmd": "new"}))["game_id"]
+
+
+@pytest.mark.parametrize("fields", [
+    {"pit": 7.0, "direction": "CLOCKWISE"},
+    {"pit": True, "direction": "CLOCKWISE"},
+    {"pit": "7", "direction": "CLOCKWISE"},
+    {"pit": 7, "direction": ["x"]},
+    {"pit": 7, "direction": None},
+    {"pit": 7, "direction": "SIDEWAYS"},
+])
+def test_move_rejects_wrong_types(server, fields):
+    async def play():
+        game_id = await new_game(server)
+        with pytest.raises(ServerError):
+            await server.handle_request({"cmd": "move", "game_id": game_id, **fields})
+        return server.sessions[game_id].state
+
+    state = run(play())
+    assert state.move_count == 0 and state.current_player == Player.PLAYER1
+
+
+def test_busy_server_keeps_the_human_to_move(server):
+    async def play():
+        game_id = await new_game(server)
+        server.max_waiting = 0
+        with pytest.raises(ServerError, match="busy"):
+            await server.handle_request({"cmd": "move", "game_id": game_id, "pit": 7, "direction": "CLOCKWISE"})
+        assert server.sessions[game_id].state.current_player == Player.PLAYER1
+        server.max_waiting = 10
+        return await server.handle_request({"cmd": "move", "game_id": game_id, "pit": 7, "direction": "CLOCKWISE"})
+
+    reply = run(play())
+    assert reply["ok"] and len(reply["ai_moves"]) == 1
+    assert reply["state"]["current_player"] == "PLAYER1" and server.moves_played == 2
+
+
+def test_broken_pool_falls_back_to_the_shallow_search(server):
+    async def play():
+        game_id = await new_game(server)
+        server.pool.shutdown()
+        server.pool = BrokenPool()
+        return await server.handle_request({"cmd": "move", "game_id": game_id, "pit": 7, "direction": "CLOCKWISE"})
+
+    reply = run(play())
+    assert reply["ok"] and reply["ai_moves"] and reply["state"]["current_player"] == "PLAYER1"
+    assert server.ai_errors == 1 and server._in_flight == 0
+
+
+def test_every_line_gets_one_reply(server):
+    class Reader:
+        def __init__(self, lines):
+            self.lines = [line.encode() + b"\n" for line in lines] + [b""]
+
+        async def readline(self):
+            return self.lines.pop(0)
+
+    class Writer:
+        def __init__(self):
+            self.replies = []
+
+        def write(self, data):
+            self.replies.append(json.loads(data))
+
+        async def drain(self):
+            pass
+
+        def close(self):
+            pass
+
+    lines = ['{"cmd": "new"}',
+             '{"cmd": "move", "game_id": 1, "pit": 7.0, "direction": "CLOCKWISE"}',
+             '{"cmd": "move", "game_id": 1, "pit": 7, "direction": ["x"]}',
+             '[1, 2]',
+             'not json',
+             '{"cmd": "state", "game_id": 1}']
+    writer = Writer()
+    run(server.handle_connection(Reader(lines), writer))
+    assert [reply["ok"] for reply in writer.replies] == [True, False, False, False, False, True]
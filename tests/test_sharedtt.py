@@ -0,0 +1,153 @@
+from multiprocessing import shared_memory
+
+import pytest
+
+from oanquan import GameState
+from oanquan.evaluation import DEFAULT_WEIGHTS
+from oanquan.rules import Direction, position_key
+from oanquan.sharedtt import SLOT_WORDS, LazySMP, SharedTable, _hash
+
+
+@pytest.fixture
+def table():
+    table = SharedTable(entries=64, create=True)
+    yield table
+    table.close()
+
+
+def keys(count):
+    state = GameState()
+    found = []
+    for pit in state.get_valid_moves():
+        for direction in Direction:
+            child = state.copy()
+            child.make_move_instant(pit, direction)
+            found.append(position_key(child))
+    return found[:count]
+
+
+@pytest.mark.parametrize("move", [None, (7, Direction.CLOCKWISE), (11, Direction.COUNTER_CLOCKWISE)])
+def test_entries_round_trip(table, move):
+    key = keys(1)[0]
+    table[key] = (5, -12.25, 2, move)
+    assert key in table
+    assert table[key] == (5, -12.25, 2, move)
+    assert len(table) == 1
+
+
+def test_missing_key(table):
+    key = keys(1)[0]
+    assert key not in table
+    assert table.get(key, "missing") == "missing"
+    with pytest.raises(KeyError):
+        table[key]
+
+
+def test_shallower_result_keeps_the_deeper_one(table):
+    key = keys(1)[0]
+    table[key] = (6, 1.0, 0, (7, Direction.CLOCKWISE))
+    table[key] = (3, 2.0, 1, (8, Direction.CLOCKWISE))
+    assert table[key] == (6, 1.0, 0, (7, Direction.CLOCKWISE))
+    table[key] = (6, 3.0, 1, None)
+    assert table[key] == (6, 3.0, 1, None)
+
+
+def test_torn_slot_reads_as_missing(table):
+    key = keys(1)[0]
+    table[key] = (4, 8.5, 0, (9, Direction.COUNTER_CLOCKWISE))
+    slot = _hash(key) % table.entries * SLOT_WORDS
+    # A score from another process's write that has not updated the check word yet
+    table.floats[slot + 2] = 99.0
+    assert key not in table
+
+
+class _WriteHook:
+    """Wraps a table's float view and runs `hook` right after the first score is written."""
+
+    def __init__(self, floats, hook):
+        self.floats = floats
+        self.hook = hook
+
+    def __getitem__(self, index):
+        return self.floats[index]
+
+    def __setitem__(self, index, value):
+        self.floats[index] = value
+        hook, self.hook = self.hook, None
+        if hook is not None:
+            hook()
+
+
+def test_interleaved_writers_read_as_missing():
+    # Few enough slots that two of the keys share one
+    table = SharedTable(entries=4, create=True)
+    slots = {}
+    for key in keys(10):
+        slots.setdefault(_hash(key) % table.entries, []).append(key)
+    first, second = next(found for found in slots.values() if len(found) >= 2)[:2]
+    other = SharedTable(table.name, table.entries)
+    floats = table.floats
+
+    def other_store():
+        other[second] = (3, -40.0, 1, (10, Direction.CLOCKWISE))
+
+    # The other process stores its whole entry between this one's score and its check word
+    table.floats = _WriteHook(floats, other_store)
+    try:
+        table[first] = (5, 12.5, 0, (7, Direction.COUNTER_CLOCKWISE))
+        assert first not in table
+        assert second not in table
+    finally:
+        table.floats = floats
+        other.close()
+        table.close()
+
+
+def test_other_handles_see_the_same_slots(table):
+    first, second = keys(2)
+    other = SharedTable(table.name, table.entries)
+    try:
+        table[first] = (2, 0.5, 0, None)
+        other[second] = (3, -0.5, 1, (10, Direction.CLOCKWISE))
+        assert other[first] == (2, 0.5, 0, None)
+        assert table[second] == (3, -0.5, 1, (10, Direction.CLOCKWISE))
+    finally:
+        other.close()
+
+
+def test_creator_unlinks_on_close():
+    table = SharedTable(entries=8, create=True)
+    name = table.name
+    table.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=name)
+
+
+def test_lazy_smp_returns_a_legal_move():
+    state = GameState()
+    search = LazySMP(workers=2, max_depth=2, weights=DEFAULT_WEIGHTS, entries=1 << 10)
+    try:
+        pit, direction = search.get_best_move(state)
+        assert pit in state.get_valid_moves() and isinstance(direction, Direction)
+        assert search.nodes_evaluated > 0
+    finally:
+        search.close()
+
+
+def test_lazy_smp_raises_a_worker_error():
+    search = LazySMP(workers=2, max_depth=2, weights={}, entries=1 << 10)
+    try:
+        with pytest.raises(KeyError):
+            search.get_best_move(GameState())
+    finally:
+        search.close()
+
+
+def test_lazy_smp_raises_when_a_worker_dies():
+    search = LazySMP(workers=2, max_depth=2, weights=DEFAULT_WEIGHTS, entries=1 << 10)
+    search.start()
+    search.processes[0].kill()
+    search.processes[0].join()
+    with pytest.raises(RuntimeError):
+        search.get_best_move(GameState())
+    assert not search.processes
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+from oanquan.rules import BoardConfig, Direction, GameState, position_key
+from oanquan.solver import Outcome, Solver
+
+
+def children(state):
+    moves = state.get_valid_moves()
+    if state.board[moves[0]] == 0:
+        moves = [(moves[0], Direction.CLOCKWISE)]
+    else:
+        moves = [(move, direction) for move in moves for direction in Direction]
+    for move in moves:
+        child = state.copy()
+        child.make_move_instant(*move)
+        yield child
+
+
+def retrograde(root):
+    """Exact outcome of every position reachable from root; endless play is a draw."""
+    states, edges, stack = {}, {}, [root]
+    while stack:
+        state = stack.pop()
+        key = position_key(state)
+        if key in states:
+            continue
+        states[key] = state
+        if not state.game_over:
+            edges[key] = [(position_key(child), child.current_player != state.current_player)
+                          for child in children(state)]
+            stack.extend(children(state))
+    value = {key: (Outcome.DRAW if state.winner is None else
+                   Outcome.WIN if state.winner == state.current_player else Outcome.LOSS)
+             for key, state in states.items() if state.game_over}
+    flip = {Outcome.WIN: Outcome.LOSS, Outcome.LOSS: Outcome.WIN, None: None}
+    changed = True
+    while changed:
+        changed = False
+        for key, child_edges in edges.items():
+            if key in value:
+                continue
+            outcomes = [flip[value.get(child)] if swapped else value.get(child) for child, swapped in child_edges]
+            if Outcome.WIN in outcomes:
+                value[key], changed = Outcome.WIN, True
+            elif all(outcome == Outcome.LOSS for outcome in outcomes):
+                value[key], changed = Outcome.LOSS, True
+    return {key: value.get(key, Outcome.DRAW) for key in states}
+
+
+def game_positions(config, seed=1):
+    rng = random.Random(seed)
+    state = GameState(config)
+    while not state.game_over:
+        yield state.copy()
+        state.make_move_instant(rng.choice(state.get_valid_moves()), rng.choice(list(Direction)))
+
+
+@pytest.mark.parametrize("config", [BoardConfig(2, 1, 2), BoardConfig(2, 2, 2), BoardConfig(3, 1, 2)])
+def test_solve_matches_retrograde_analysis(config):
+    truth = retrograde(GameState(config))
+    for state in game_positions(config):
+        assert Solver(max_nodes=300_000).solve(state).outcome == truth[position_key(state)]
+
+
+@pytest.mark.parametrize("max_plies", [6, 10])
+def test_reused_tables_never_report_a_false_draw(max_plies):
+    # Disproofs cut by max_plies or a repetition stay in the tables for the next solve()
+    config = BoardConfig(3, 1, 2)
+    truth = retrograde(GameState(config))
+    solver = Solver(max_nodes=300_000, max_plies=max_plies)
+    for seed in range(3):
+        for state in game_positions(config, seed):
+            outcome = solver.solve(state).outcome
+            assert outcome in (truth[position_key(state)], Outcome.UNKNOWN)
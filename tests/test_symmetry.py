@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from oanquan.rules import BoardConfig, Direction, GameState, position_key
+from oanquan.symmetry import Symmetry, canonical_form, canonical_key, map_cell, map_move, transform_state
+
+CONFIGS = [BoardConfig(3, 2, 4), BoardConfig(), BoardConfig(7, 3, 10)]
+
+
+def summary(state):
+    return (position_key(state), state.game_over, state.winner)
+
+
+def game_positions(config, seed):
+    rng = random.Random(seed)
+    state = GameState(config)
+    while not state.game_over:
+        yield state
+        state = state.copy()
+        state.make_move_instant(rng.choice(state.get_valid_moves()), rng.choice(list(Direction)))
+
+
+@pytest.mark.parametrize("config", CONFIGS, ids=lambda config: f"{config.pits}-pits")
+def test_symmetries_commute_with_moves(config):
+    for seed in range(5):
+        for state in game_positions(config, seed):
+            for symmetry in Symmetry:
+                image = transform_state(state, symmetry)
+                assert summary(transform_state(image, symmetry)) == summary(state)
+                assert (sorted(image.get_valid_moves())
+                        == sorted(map_cell(pit, symmetry, config) for pit in state.get_valid_moves()))
+                for pit in state.get_valid_moves():
+                    for direction in Direction:
+                        after = state.copy()
+                        after.make_move_instant(pit, direction)
+                        mapped = image.copy()
+                        mapped.make_move_instant(*map_move((pit, direction), symmetry, config))
+                        assert summary(transform_state(after, symmetry)) == summary(mapped)
+
+
+@pytest.mark.parametrize("config", CONFIGS, ids=lambda config: f"{config.pits}-pits")
+def test_canonical_key_is_shared_by_the_whole_class(config):
+    for seed in range(5):
+        for state in game_positions(config, seed):
+            key, symmetry = canonical_form(state)
+            assert position_key(transform_state(state, symmetry)) == key
+            for other in Symmetry:
+                assert canonical_key(transform_state(state, other)) == key
+            # Without swaps, only the mirror may be applied
+            key, symmetry = canonical_form(state, allow_swap=False)
+            assert not symmetry.swaps_sides